@@ -0,0 +1,432 @@
+"""Ganhos ajustados por equity de all-in (all-in EV) a partir de históricos de mãos.
+
+Lê arquivos de histórico no formato do PokerStars mão a mão (sem carregar o
+arquivo inteiro), extrai cada all-in que chegou ao showdown com todas as cartas
+conhecidas e a mesa no momento do all-in, e calcula a equity exata de cada
+jogador com a enumeração do app, repartindo potes laterais e dinheiro morto.
+
+Cenários equivalentes por troca de naipes são calculados uma vez: o resultado
+fica num LRU limitado e pedidos iguais em andamento esperam o mesmo cálculo. A
+enumeração roda num pool de processos com um número limitado de tarefas
+pendentes, então a memória não cresce com o tamanho do arquivo (só com o número
+de jogadores distintos no relatório).
+
+Valores em fichas ou dinheiro, descontado o rake na mesma proporção do pote.
+
+Uso:
+    python allin_ev.py historicos/*.txt --workers 8
+    python allin_ev.py historicos/ --csv allin_ev.csv --top 50
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app import (
+    SHARE_UNITS,
+    SidePotAccumulator,
+    _all_suit_symmetries,
+    _enumerate_exact,
+    lookup_preflop_matchup,
+    parse_card,
+)
+
+Card = int
+# (mãos na ordem dos jogadores, mesa no all-in, nível do investimento de cada jogador)
+SpotKey = Tuple[Tuple[Tuple[Card, ...], ...], Tuple[Card, ...], Tuple[int, ...]]
+# Fração de cada pote (pelos jogadores elegíveis) que cabe a cada jogador do showdown.
+SpotShares = Tuple[Tuple[Tuple[int, ...], Tuple[float, ...]], ...]
+
+HAND_START = re.compile(r"^(?:PokerStars|Poker Stars) (?:Hand|Game|Zoom Hand) #")
+AMOUNT = r"[^\d\s]?([\d,]*\.?\d+)"
+SEAT = re.compile(r"^Seat \d+: (.+?) \(" + AMOUNT + r" in chips")
+ACTION = re.compile(r"^(.+?): (posts|calls|bets|raises|checks|folds)\b(.*)$")
+RAISE_TO = re.compile(r"to " + AMOUNT)
+TRAILING_AMOUNT = re.compile(AMOUNT + r"(?: and is all-in)?\s*$")
+UNCALLED = re.compile(r"^Uncalled bet \(" + AMOUNT + r"\) returned to (.+)$")
+COLLECTED = re.compile(r"^(.+?) collected " + AMOUNT + r" from")
+SHOWS = re.compile(r"^(.+?): shows \[(.+?)\]")
+SUMMARY_CARDS = re.compile(r"^Seat \d+: (.+?)(?: \((?:button|small blind|big blind)\))* (?:showed|mucked) \[(.+?)\]")
+RAKE = re.compile(r"Rake " + AMOUNT)
+STREET = re.compile(r"^\*\*\* (FLOP|TURN|RIVER) \*\*\*")
+CARD_GROUPS = re.compile(r"\[([^\]]+)\]")
+
+
+def parse_amount(text: str) -> int:
+    """Valor em centésimos (fichas de torneio também, para manter tudo inteiro)."""
+    try:
+        return int(Decimal(text.replace(",", "")) * 100)
+    except InvalidOperation as exc:
+        raise ValueError(f"Valor inválido: {text}") from exc
+
+
+class AllInSpot:
+    """All-in que foi ao showdown: jogadores, cartas, mesa no all-in e investimentos."""
+
+    __slots__ = ("players", "hands", "board", "invested", "dead", "rake")
+
+    def __init__(
+        self,
+        players: Sequence[str],
+        hands: Sequence[Tuple[Card, Card]],
+        board: Sequence[Card],
+        invested: Sequence[int],
+        dead: Sequence[int],
+        rake: int,
+    ) -> None:
+        self.players = tuple(players)
+        self.hands = tuple(hands)
+        self.board = tuple(board)
+        self.invested = tuple(invested)
+        self.dead = tuple(dead)
+        self.rake = rake
+
+    def key(self) -> SpotKey:
+        """Forma canônica por troca de naipes; os jogadores mantêm a ordem."""
+        levels = sorted(set(self.invested))
+        ranks = tuple(levels.index(amount) + 1 for amount in self.invested)
+        return min(
+            (
+                tuple(tuple(sorted(symmetry[card] for card in hand)) for hand in self.hands),
+                tuple(sorted(symmetry[card] for card in self.board)),
+                ranks,
+            )
+            for symmetry in _all_suit_symmetries()
+        )
+
+    def expected_net(self, shares: SpotShares) -> List[float]:
+        """Resultado esperado (fichas recebidas menos investidas) de cada jogador do showdown."""
+        by_eligible = dict(shares)
+        everyone = list(self.invested) + list(self.dead)
+        pot = sum(everyone)
+        keep = (pot - self.rake) / pot if pot else 0.0
+        expected = [0.0] * len(self.players)
+        previous = 0
+        for level in sorted(set(everyone)):
+            amount = sum(min(stake, level) - min(stake, previous) for stake in everyone)
+            previous = level
+            eligible = tuple(idx for idx, stake in enumerate(self.invested) if stake >= level)
+            if not eligible:
+                continue
+            if len(eligible) == 1:
+                expected[eligible[0]] += amount
+                continue
+            for idx, share in zip(eligible, by_eligible[eligible]):
+                expected[idx] += amount * share
+        return [value * keep - stake for value, stake in zip(expected, self.invested)]
+
+
+class ParsedHand:
+    __slots__ = ("net", "spot")
+
+    def __init__(self, net: Dict[str, int], spot: Optional[AllInSpot]) -> None:
+        self.net = net
+        self.spot = spot
+
+
+def iter_hand_texts(paths: Sequence[str]) -> Iterator[List[str]]:
+    """Linhas de cada mão, lendo os arquivos (ou diretórios) de forma preguiçosa."""
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(root, name) for root, _, names in os.walk(path) for name in names if name.endswith(".txt")
+            )
+        else:
+            files = [path]
+        for file_path in files:
+            with open(file_path, encoding="utf-8-sig", errors="replace") as handle:
+                lines: List[str] = []
+                for raw in handle:
+                    line = raw.strip()
+                    if HAND_START.match(line) and lines:
+                        yield lines
+                        lines = []
+                    if line:
+                        lines.append(line)
+                if lines:
+                    yield lines
+
+
+def parse_hand(lines: Sequence[str]) -> Optional[ParsedHand]:
+    """Resultado de cada jogador e, se houver, o all-in levado ao showdown."""
+    seated = set()
+    invested: Dict[str, int] = {}
+    street: Dict[str, int] = {}
+    collected: Dict[str, int] = {}
+    cards: Dict[str, Tuple[Card, Card]] = {}
+    folded = set()
+    all_in = set()
+    board: List[Card] = []
+    board_at_action: Optional[int] = None
+    rake = 0
+    in_summary = False
+    for line in lines:
+        if line.startswith("*** SUMMARY ***"):
+            in_summary = True
+            continue
+        if in_summary:
+            match = RAKE.search(line)
+            if match and line.startswith("Total pot"):
+                rake = parse_amount(match.group(1))
+            match = SUMMARY_CARDS.match(line)
+            if match and match.group(1) not in cards:
+                cards[match.group(1)] = tuple(parse_card(token) for token in match.group(2).split())  # type: ignore[assignment]
+            continue
+        match = SEAT.match(line)
+        if match:
+            seated.add(match.group(1))
+            continue
+        match = STREET.match(line)
+        if match:
+            board = [parse_card(token) for group in CARD_GROUPS.findall(line) for token in group.split()]
+            street = {}
+            continue
+        match = ACTION.match(line)
+        if match:
+            name, action, rest = match.groups()
+            if action == "folds":
+                folded.add(name)
+            elif action == "raises":
+                raise_to = RAISE_TO.search(rest)
+                if raise_to is None:
+                    return None
+                total = parse_amount(raise_to.group(1))
+                invested[name] = invested.get(name, 0) + total - street.get(name, 0)
+                street[name] = total
+            elif action != "checks":
+                amount = TRAILING_AMOUNT.search(rest)
+                if amount is None:
+                    return None
+                value = parse_amount(amount.group(1))
+                invested[name] = invested.get(name, 0) + value
+                # A ante não conta para o que o jogador já pôs na rua.
+                if "ante" not in rest:
+                    street[name] = street.get(name, 0) + value
+            else:
+                invested.setdefault(name, 0)
+            if action != "posts":
+                board_at_action = len(board)
+            if rest.endswith("and is all-in"):
+                all_in.add(name)
+            continue
+        match = UNCALLED.match(line)
+        if match:
+            name = match.group(2)
+            invested[name] = invested.get(name, 0) - parse_amount(match.group(1))
+            continue
+        match = COLLECTED.match(line)
+        if match:
+            collected[match.group(1)] = collected.get(match.group(1), 0) + parse_amount(match.group(2))
+            continue
+        match = SHOWS.match(line)
+        if match:
+            cards[match.group(1)] = tuple(parse_card(token) for token in match.group(2).split())  # type: ignore[assignment]
+    if not invested:
+        return None
+    net = {name: collected.get(name, 0) - stake for name, stake in invested.items() if name in seated or not seated}
+    showdown = [name for name in invested if name not in folded]
+    spot = None
+    if (
+        len(showdown) >= 2
+        and board_at_action is not None
+        and board_at_action < 5
+        and len(all_in.intersection(showdown)) >= len(showdown) - 1
+        and all(len(cards.get(name, ())) == 2 for name in showdown)
+    ):
+        spot = AllInSpot(
+            showdown,
+            [cards[name] for name in showdown],
+            board[:board_at_action],
+            [invested[name] for name in showdown],
+            [stake for name, stake in invested.items() if name in folded],
+            rake,
+        )
+    return ParsedHand(net, spot)
+
+
+def evaluate_spot(hands: Tuple[Tuple[Card, ...], ...], board: Tuple[Card, ...], levels: Tuple[int, ...]) -> SpotShares:
+    """Fração exata de cada pote (pelos elegíveis) de cada jogador.
+
+    O heads-up pré-flop vem da matriz pré-calculada quando ela existe; o resto
+    (e o heads-up sem matriz, ~15 s por confronto) usa a enumeração exata.
+    """
+    # Listas: uma tupla de duas cartas seria lida como entrada (id, cartas).
+    known = [list(hand) for hand in hands[1:]]
+    side_pots = None
+    total = 0
+    if not board and len(hands) == 2:
+        found = lookup_preflop_matchup(hands[0], known)
+        if found is not None:
+            result = found[0]
+            total = result.total
+            side_pots = SidePotAccumulator.from_table(levels, result.table)  # type: ignore[arg-type]
+    if side_pots is None:
+        result = _enumerate_exact(hands[0], board, len(hands) - 1, known, stacks=levels)
+        total = result.total
+        side_pots = result.side_pots
+    scale = SHARE_UNITS * total
+    return tuple(
+        (eligible, tuple(pot_chips[idx] / (scale * amount) for idx in eligible))
+        for pot_chips, (amount, eligible) in zip(side_pots.chips, side_pots.pots)  # type: ignore[union-attr]
+        if len(eligible) > 1
+    )
+
+
+class PlayerTotals:
+    __slots__ = ("hands", "net", "allin_hands", "allin_net", "allin_ev")
+
+    def __init__(self) -> None:
+        self.hands = 0
+        self.net = 0
+        self.allin_hands = 0
+        self.allin_net = 0
+        self.allin_ev = 0.0
+
+    @property
+    def adjusted(self) -> float:
+        return self.net - self.allin_net + self.allin_ev
+
+
+class AllInReplay:
+    """Agrega resultados por jogador, com os all-ins calculados no pool sem repetir cenários."""
+
+    def __init__(self, pool: Optional[ProcessPoolExecutor], max_pending: int, cache_size: int) -> None:
+        self.pool = pool
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self.players: Dict[str, PlayerTotals] = {}
+        self.cache: "OrderedDict[SpotKey, SpotShares]" = OrderedDict()
+        self.pending: Dict[SpotKey, Tuple[Future, List[Tuple[AllInSpot, Dict[str, int]]]]] = {}
+        self.hands = 0
+        self.spots = 0
+        self.evaluated = 0
+
+    def add(self, hand: ParsedHand) -> None:
+        self.hands += 1
+        for name, value in hand.net.items():
+            totals = self.players.get(name)
+            if totals is None:
+                totals = self.players[name] = PlayerTotals()
+            totals.hands += 1
+            totals.net += value
+        spot = hand.spot
+        if spot is None:
+            return
+        self.spots += 1
+        key = spot.key()
+        shares = self.cache.get(key)
+        if shares is not None:
+            self.cache.move_to_end(key)
+            self._settle(spot, hand.net, shares)
+            return
+        if key in self.pending:
+            self.pending[key][1].append((spot, hand.net))
+            return
+        self.evaluated += 1
+        if self.pool is None:
+            self._store(key, evaluate_spot(*key))
+            self._settle(spot, hand.net, self.cache[key])
+            return
+        self.pending[key] = (self.pool.submit(evaluate_spot, *key), [(spot, hand.net)])
+        if len(self.pending) >= self.max_pending:
+            self.drain(FIRST_COMPLETED)
+
+    def drain(self, return_when: str = "ALL_COMPLETED") -> None:
+        if not self.pending:
+            return
+        done, _ = wait([future for future, _ in self.pending.values()], return_when=return_when)
+        for key in [key for key, (future, _) in self.pending.items() if future in done]:
+            future, waiting = self.pending.pop(key)
+            self._store(key, future.result())
+            for spot, net in waiting:
+                self._settle(spot, net, self.cache[key])
+
+    def _store(self, key: SpotKey, shares: SpotShares) -> None:
+        self.cache[key] = shares
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _settle(self, spot: AllInSpot, net: Dict[str, int], shares: SpotShares) -> None:
+        for name, expected in zip(spot.players, spot.expected_net(shares)):
+            totals = self.players[name]
+            totals.allin_hands += 1
+            totals.allin_net += net.get(name, 0)
+            totals.allin_ev += expected
+
+
+def replay(paths: Sequence[str], workers: int, max_pending: int, cache_size: int) -> AllInReplay:
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        state = AllInReplay(pool, max_pending, cache_size)
+        for lines in iter_hand_texts(paths):
+            try:
+                hand = parse_hand(lines)
+            except ValueError:
+                # Mão com carta ou valor ilegível: ignorada, o resto do arquivo segue.
+                continue
+            if hand is not None:
+                state.add(hand)
+            if state.hands and state.hands % 50000 == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{state.hands} mãos, {state.spots} all-ins ({elapsed:.0f}s)", file=sys.stderr)
+        state.drain()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{state.hands} mãos, {state.spots} all-ins, {state.evaluated} cenários calculados em {elapsed:.1f}s",
+        file=sys.stderr,
+    )
+    return state
+
+
+def report(state: AllInReplay, top: int, csv_path: Optional[str]) -> None:
+    ranked = sorted(state.players.items(), key=lambda item: (-item[1].hands, item[0]))
+    header = ("jogador", "mãos", "resultado", "all-ins", "resultado all-in", "all-in EV", "ajustado", "sorte")
+    rows = [
+        (
+            name,
+            totals.hands,
+            totals.net / 100,
+            totals.allin_hands,
+            totals.allin_net / 100,
+            round(totals.allin_ev / 100, 2),
+            round(totals.adjusted / 100, 2),
+            round((totals.allin_net - totals.allin_ev) / 100, 2),
+        )
+        for name, totals in ranked
+    ]
+    if csv_path:
+        with open(csv_path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(header)
+            writer.writerows(rows)
+    print(f"{header[0]:<20} {header[1]:>7} {header[2]:>12} {header[3]:>7} {header[6]:>12} {header[7]:>10}")
+    for row in rows[:top]:
+        print(f"{row[0][:20]:<20} {row[1]:>7} {row[2]:>12.2f} {row[3]:>7} {row[6]:>12.2f} {row[7]:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="All-in EV por jogador a partir de históricos de mãos.")
+    parser.add_argument("paths", nargs="+", help="Arquivos .txt de histórico ou diretórios com eles.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-pending", type=int, default=256, help="Cenários em cálculo ao mesmo tempo.")
+    parser.add_argument("--cache-size", type=int, default=100000, help="Cenários canônicos guardados no LRU.")
+    parser.add_argument("--top", type=int, default=20, help="Jogadores mostrados no terminal.")
+    parser.add_argument("--csv", default=None, help="Grava o relatório completo em CSV.")
+    args = parser.parse_args()
+    state = replay(args.paths, args.workers, max(1, args.max_pending), max(1, args.cache_size))
+    report(state, args.top, args.csv)
+
+
+if __name__ == "__main__":
+    main()
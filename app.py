@@ -1,17 +1,34 @@
 import random
 import math
 import json
+import cProfile
+import io
+import pstats
+import mmap
+import multiprocessing
 import os
+import struct
+import sys
+import threading
 import time
-from itertools import combinations as combos
-from dataclasses import dataclass
-from collections import Counter, defaultdict
-from typing import Dict, List, Optional, Sequence, Tuple, Literal
-from concurrent.futures import ProcessPoolExecutor, as_completed, Future
+from array import array
+from bisect import bisect_left
+from functools import lru_cache, wraps
+from itertools import combinations as combos, combinations_with_replacement, permutations
+from dataclasses import dataclass, field
+from collections import Counter, OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple, Literal
+import concurrent.futures
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, Future
 
 import streamlit as st
 from treys import Card as TreysCard, Evaluator
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy é opcional: só o kernel vetorizado do backend de threads usa
+    np = None  # type: ignore[assignment]
+
 # #region agent log
 LOG_PATH = "/Users/test/poker_app/.cursor/debug.log"
 
@@ -329,6 +346,219 @@ div[data-testid="stRadio"] label {
 """
 
 
+# Métricas do processo, exportadas no formato de texto do Prometheus.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ITERATION_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class MetricsRegistry:
+    """Contadores e histogramas sem lock no caminho quente.
+
+    Cada thread escreve no próprio shard (um dict registrado uma única vez), e a
+    exportação soma os shards: um incremento é uma soma num dict que só aquela
+    thread altera, seguro também em builds sem GIL. Gauges são funções lidas na exportação.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: List[Dict[MetricKey, object]] = []
+        self._register_lock = threading.Lock()
+        self._descriptions: Dict[str, Tuple[str, str]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._collectors: List[Callable[[], List[Tuple[str, Dict[str, str], float]]]] = []
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Optional[Tuple[float, ...]] = None) -> None:
+        self._descriptions[name] = (kind, help_text)
+        if buckets is not None:
+            self._buckets[name] = buckets
+
+    def add_collector(self, collector: Callable[[], List[Tuple[str, Dict[str, str], float]]]) -> None:
+        """Função chamada na exportação que devolve amostras (nome, rótulos, valor) de gauges."""
+        self._collectors.append(collector)
+
+    def _shard(self) -> Dict[MetricKey, object]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._register_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + value  # type: ignore[operator]
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        shard = self._shard()
+        state = shard.get(key)
+        buckets = self._buckets[name]
+        if state is None:
+            # Contagem por faixa (não cumulativa; a última é +Inf) e a soma no fim.
+            state = shard[key] = [0.0] * (len(buckets) + 2)
+        state[bisect_left(buckets, value)] += 1  # type: ignore[index]
+        state[-1] += value  # type: ignore[index]
+
+    def value(self, name: str, **labels: str) -> float:
+        key = (name, tuple(sorted(labels.items())))
+        return sum(shard.get(key, 0) for shard in list(self._shards))  # type: ignore[misc]
+
+    def snapshot(self) -> Dict[MetricKey, object]:
+        totals: Dict[MetricKey, object] = {}
+        for shard in list(self._shards):
+            for key, entry in dict(shard).items():
+                if isinstance(entry, list):
+                    merged = totals.setdefault(key, [0.0] * len(entry))
+                    for idx, count in enumerate(entry):
+                        merged[idx] += count  # type: ignore[index]
+                else:
+                    totals[key] = totals.get(key, 0) + entry  # type: ignore[operator]
+        return totals
+
+    def render(self) -> str:
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+
+        def label_text(labels: Sequence[Tuple[str, str]], extra: str = "") -> str:
+            parts = ['%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"')) for name, value in labels]
+            if extra:
+                parts.append(extra)
+            return "{" + ",".join(parts) + "}" if parts else ""
+
+        samples: Dict[str, List[str]] = {}
+        for (name, labels), entry in sorted(self.snapshot().items(), key=lambda item: item[0]):
+            lines = samples.setdefault(name, [])
+            if isinstance(entry, list):
+                cumulative = 0.0
+                for bound, count in zip(self._buckets[name], entry):
+                    cumulative += count
+                    bound_label = 'le="%g"' % bound
+                    lines.append(f"{name}_bucket{label_text(labels, bound_label)} {cumulative:g}")
+                cumulative += entry[-2]
+                inf_label = 'le="+Inf"'
+                lines.append(f"{name}_bucket{label_text(labels, inf_label)} {cumulative:g}")
+                lines.append(f"{name}_sum{label_text(labels)} {entry[-1]:g}")
+                lines.append(f"{name}_count{label_text(labels)} {cumulative:g}")
+            else:
+                lines.append(f"{name}{label_text(labels)} {entry:g}")
+        for collector in self._collectors:
+            try:
+                collected = collector()
+            except Exception:
+                continue
+            for name, labels, value in collected:
+                samples.setdefault(name, []).append(f"{name}{label_text(sorted(labels.items()))} {value:g}")
+        output = []
+        for name, lines in samples.items():
+            kind, help_text = self._descriptions.get(name, ("untyped", ""))
+            output.append(f"# HELP {name} {help_text}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(lines)
+        return "\n".join(output) + "\n"
+
+
+METRICS = MetricsRegistry()
+METRICS.describe("poker_calculations_total", "counter", "Cálculos de equity por método.")
+METRICS.describe("poker_exact_fallbacks_total", "counter", "Cálculos que saíram da enumeração completa, por método.")
+METRICS.describe("poker_calculation_iterations_total", "counter", "Iterações ou cenários entregues, por método.")
+METRICS.describe("poker_calculation_seconds", "histogram", "Latência dos cálculos de equity.", LATENCY_BUCKETS)
+METRICS.describe("poker_calculation_iterations", "histogram", "Iterações por cálculo.", ITERATION_BUCKETS)
+METRICS.describe("poker_cache_requests_total", "counter", "Chamadas às funções com st.cache_data/st.cache_resource.")
+METRICS.describe("poker_cache_misses_total", "counter", "Chamadas que executaram a função (fora do cache).")
+METRICS.describe("poker_exact_cache_events_total", "counter", "Eventos do LRU de resultados exatos (hit, miss, eviction).")
+METRICS.describe("poker_exact_cache_entries", "gauge", "Entradas no LRU de resultados exatos.")
+METRICS.describe("poker_exact_cache_bytes", "gauge", "Bytes estimados no LRU de resultados exatos.")
+METRICS.describe("poker_pool_tasks_submitted_total", "counter", "Tarefas enviadas ao pool.")
+METRICS.describe("poker_pool_tasks_completed_total", "counter", "Tarefas concluídas ou canceladas no pool.")
+METRICS.describe("poker_pool_busy_seconds_total", "counter", "Tempo de worker ocupado executando tarefas.")
+METRICS.describe("poker_pool_task_seconds", "histogram", "Duração de cada tarefa no worker.", LATENCY_BUCKETS)
+METRICS.describe("poker_pool_queue_wait_seconds", "histogram", "Espera entre o envio e o início da tarefa.", LATENCY_BUCKETS)
+METRICS.describe("poker_pool_pending", "gauge", "Tarefas pendentes (na fila ou em execução).")
+METRICS.describe("poker_pool_workers", "gauge", "Workers do pool.")
+
+
+def record_calculation(method: str, iterations: int, latency: float) -> None:
+    METRICS.inc("poker_calculations_total", method=method)
+    METRICS.inc("poker_calculation_iterations_total", iterations, method=method)
+    METRICS.observe("poker_calculation_seconds", latency, method=method)
+    METRICS.observe("poker_calculation_iterations", iterations, method=method)
+
+
+def metered_cache(cache_decorator: Callable, name: str) -> Callable:
+    """Aplica ``st.cache_data``/``st.cache_resource`` contando chamadas e execuções (misses)."""
+
+    def decorate(function: Callable) -> Callable:
+        @wraps(function)
+        def compute(*args, **kwargs):  # type: ignore[no-untyped-def]
+            METRICS.inc("poker_cache_misses_total", cache=name)
+            return function(*args, **kwargs)
+
+        cached = cache_decorator(compute)
+
+        @wraps(function)
+        def lookup(*args, **kwargs):  # type: ignore[no-untyped-def]
+            METRICS.inc("poker_cache_requests_total", cache=name)
+            return cached(*args, **kwargs)
+
+        lookup.clear = cached.clear  # type: ignore[attr-defined]
+        return lookup
+
+    return decorate
+
+
+@metered_cache(st.cache_resource(show_spinner=False), "start_metrics_export")
+def start_metrics_export() -> Dict[str, object]:
+    """Exporta ``METRICS`` uma vez por processo, conforme as variáveis de ambiente.
+
+    ``POKER_METRICS_PORT`` abre ``GET /metrics`` local para o Prometheus raspar;
+    ``POKER_METRICS_FILE`` regrava o arquivo a cada ``POKER_METRICS_INTERVAL``
+    segundos (padrão 15), para o textfile collector do node_exporter.
+    """
+    exports: Dict[str, object] = {}
+    port = os.environ.get("POKER_METRICS_PORT")
+    if port:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = METRICS.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", int(port)), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="poker-metrics-http", daemon=True).start()
+        exports["port"] = server.server_address[1]
+    path = os.environ.get("POKER_METRICS_FILE")
+    if path:
+        interval = max(1.0, float(os.environ.get("POKER_METRICS_INTERVAL", "15")))
+
+        def write_periodically() -> None:
+            while True:
+                temporary = f"{path}.tmp"
+                try:
+                    with open(temporary, "w", encoding="utf-8") as handle:
+                        handle.write(METRICS.render())
+                    os.replace(temporary, path)
+                except OSError:
+                    pass
+                time.sleep(interval)
+
+        threading.Thread(target=write_periodically, name="poker-metrics-file", daemon=True).start()
+        exports["file"] = path
+    return exports
+
+
 def trigger_rerun() -> None:
     """Dispara um rerun compatível com versões antigas do Streamlit."""
     rerun_fn = getattr(st, "rerun", None) or getattr(st, "experimental_rerun", None)
@@ -345,15 +575,64 @@ def running_on_streamlit_cloud() -> bool:
     return os.environ.get("STREAMLIT_RUNTIME_ENV") == "cloud"
 
 
+ParallelBackend = Literal["process", "interpreter", "thread", "serial"]
+PARALLEL_BACKENDS: Tuple[ParallelBackend, ...] = ("process", "interpreter", "thread", "serial")
+
+
+def gil_disabled() -> bool:
+    """True em builds free-threaded (PEP 703) com o GIL desligado."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def parallel_backend_available(backend: ParallelBackend) -> bool:
+    if backend == "process":
+        return not running_on_streamlit_cloud()
+    if backend == "interpreter":
+        return hasattr(concurrent.futures, "InterpreterPoolExecutor")
+    return True
+
+
+def choose_parallel_backend() -> ParallelBackend:
+    """Backend de execução paralela conforme o ambiente (ou ``POKER_PARALLEL_BACKEND``).
+
+    Processos fora do Streamlit Cloud; lá, onde pools de processos são
+    desativados, threads: num build free-threaded rodam os kernels de tabela em
+    paralelo de verdade e, com o GIL ligado, o Monte Carlo rápido usa o kernel
+    numpy (``_mc_worker_numpy``), que solta o GIL. Sem nenhum dos dois, serial.
+    Sub-interpretadores só entram se pedidos explicitamente: ``validate_engines.py``
+    os exercita quando o Python os tem, mas ainda não são escolhidos sozinhos.
+    """
+    if (os.cpu_count() or 1) < 2:
+        return "serial"
+    requested = os.environ.get("POKER_PARALLEL_BACKEND", "").strip().lower()
+    if requested in PARALLEL_BACKENDS and parallel_backend_available(requested):  # type: ignore[arg-type]
+        return requested  # type: ignore[return-value]
+    if parallel_backend_available("process"):
+        return "process"
+    return "thread" if gil_disabled() or np is not None else "serial"
+
+
+def pool_backend(pool: Optional[Executor]) -> ParallelBackend:
+    """Backend de um pool de ``create_parallel_pool`` ("serial" sem pool)."""
+    if pool is None:
+        return "serial"
+    return getattr(pool, "backend", "process")
+
+
+def pure_python_workers(pool: Optional[Executor]) -> int:
+    """Workers que aceleram os kernels em Python puro: threads com o GIL ligado contam como um."""
+    if pool is None or (pool_backend(pool) == "thread" and not gil_disabled()):
+        return 1
+    return getattr(pool, "_max_workers", 1) or 1
+
+
 def allow_parallel_workers() -> bool:
-    """Permite multiprocessing apenas fora do Streamlit Cloud."""
-    if running_on_streamlit_cloud():
-        return False
-    cpu_count = os.cpu_count() or 1
-    return cpu_count > 1
+    """Há paralelismo quando algum backend além do serial está disponível."""
+    return choose_parallel_backend() != "serial"
 
 
-@st.cache_resource(show_spinner=False)
+@metered_cache(st.cache_resource(show_spinner=False), "build_card_grid")
 def build_card_grid() -> Dict[str, List[Dict[str, object]]]:
     """Cria metadados do baralho para desenhar a grade visual."""
     grid: Dict[str, List[Dict[str, object]]] = {}
@@ -576,7 +855,7 @@ def parse_card(card_text: str) -> Card:
     return TreysCard.new(treys_notation)
 
 
-@st.cache_data(show_spinner=False)
+@metered_cache(st.cache_data(show_spinner=False), "build_deck")
 def build_deck() -> Tuple[Card, ...]:
     """Retorna um novo baralho padrão de 52 cartas."""
     deck = []
@@ -593,41 +872,22 @@ def remove_known_cards(deck: Sequence[Card], known_cards: Sequence[Card]) -> Lis
 
 
 def best_hand_rank_7(cards: Sequence[Card], board_cards: Optional[Sequence[Card]] = None) -> Tuple[int, int]:
-    """Determina o ranking de uma mão usando o avaliador Treys."""
-    _log(
-        "debug-session",
-        "run1",
-        "RANK",
-        "app.py:75",
-        "best_hand_rank_7 entrada",
-        {"len_cards": len(cards), "len_board": 0 if board_cards is None else len(board_cards)},
-    )
+    """Determina o ranking de uma mão com o backend de avaliação escolhido (``get_evaluator_backend``)."""
     if board_cards is None:
         if len(cards) < 5:
             raise ValueError(f"best_hand_rank_7 precisa de pelo menos 5 cartas, recebeu {len(cards)}")
-        hand = list(cards[:2])
-        board = list(cards[2:])
+        hand = cards[:2]
+        board = cards[2:]
     else:
         if len(cards) < 2:
             raise ValueError("Informe pelo menos duas cartas da mão do jogador.")
-        hand = cards if isinstance(cards, list) else list(cards)
-        board = board_cards if isinstance(board_cards, list) else list(board_cards)
+        hand = cards
+        board = board_cards
         if len(hand) + len(board) < 5:
             raise ValueError("São necessárias ao menos 5 cartas combinadas para avaliar a mão.")
 
-    rank_value = EVALUATOR.evaluate(hand, board)
-    class_int = EVALUATOR.get_rank_class(rank_value)
-    category = TREYS_CLASS_TO_CATEGORY[class_int]
-    result = (category, -rank_value)
-    _log(
-        "debug-session",
-        "run1",
-        "RANK",
-        "app.py:89",
-        "best_hand_rank_7 saída",
-        {"result": result},
-    )
-    return result
+    rank_value = get_evaluator_backend().rank(hand, board)
+    return TREYS_CLASS_TO_CATEGORY[EVALUATOR.get_rank_class(rank_value)], -rank_value
 
 
 def board_only_rank_value(board_cards: Sequence[Card]) -> Optional[Tuple[int, int]]:
@@ -640,6 +900,259 @@ def board_only_rank_value(board_cards: Sequence[Card]) -> Optional[Tuple[int, in
     return best_hand_rank_7(hand_cards, community)
 
 
+# Bits de naipe do Treys (s, h, d, c) e o "nibble" de 4 bits usado para contar cartas por naipe.
+SUIT_BITS = (1, 2, 4, 8)
+SUIT_NIBBLE = {1: 1, 2: 1 << 4, 4: 1 << 8, 8: 1 << 12}
+# Soma de nibbles com algum naipe >= 5: (n + 3) liga o bit 3 do nibble.
+FLUSH_CARRY = 0x3333
+FLUSH_MASK = 0x8888
+
+
+@lru_cache(maxsize=None)
+def _seven_card_tables() -> Tuple[Dict[int, int], Dict[int, int], Tuple[int, ...]]:
+    """Tabelas do avaliador rápido, montadas uma vez por processo a partir das do Treys.
+
+    ``unsuited``: produto dos primos dos 7 ranks -> melhor ranking sem flush.
+    ``flushes``: produto dos primos de 5 a 7 cartas do mesmo naipe -> melhor flush.
+    ``categories``: ranking Treys -> categoria (0..8).
+    """
+    primes = TreysCard.PRIMES
+    unsuited = dict(EVALUATOR.table.unsuited_lookup)
+    for size in (6, 7):
+        larger: Dict[int, int] = {}
+        for ranks in combinations_with_replacement(range(13), size):
+            if any(ranks[idx] == ranks[idx + 4] for idx in range(size - 4)):
+                continue
+            product = 1
+            for rank in ranks:
+                product *= primes[rank]
+            larger[product] = min(unsuited[product // primes[rank]] for rank in set(ranks))
+        unsuited = larger
+    flushes = dict(EVALUATOR.table.flush_lookup)
+    smaller = flushes
+    for size in (6, 7):
+        larger = {}
+        for ranks in combos(range(13), size):
+            product = 1
+            for rank in ranks:
+                product *= primes[rank]
+            larger[product] = min(smaller[product // primes[rank]] for rank in ranks)
+        flushes.update(larger)
+        smaller = larger
+    categories = (0,) + tuple(
+        TREYS_CLASS_TO_CATEGORY[EVALUATOR.get_rank_class(value)] for value in range(1, 7463)
+    )
+    return unsuited, flushes, categories
+
+
+def _flush_value(cards: Sequence[Card], suit_counts: int, flushes: Dict[int, int]) -> int:
+    """Melhor flush entre ``cards`` (o naipe com 5+ cartas é lido de ``suit_counts``)."""
+    for suit_bit in SUIT_BITS:
+        if (suit_counts // SUIT_NIBBLE[suit_bit]) & 0xF >= 5:
+            product = 1
+            for card in cards:
+                if (card >> 12) & 0xF == suit_bit:
+                    product *= card & 0xFF
+            return flushes[product]
+    raise ValueError("Nenhum naipe com 5 cartas.")
+
+
+@lru_cache(maxsize=None)
+def _numpy_rank_tables() -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """As tabelas de ``_seven_card_tables`` em arrays, para a consulta vetorizada do kernel numpy.
+
+    ``products``/``values``: produtos de primos sem flush, ordenados para ``searchsorted``.
+    ``flush_values``: máscara de 13 bits dos ranks de um naipe -> melhor flush
+    (7463, pior que qualquer mão, com menos de 5 cartas no naipe).
+    """
+    unsuited, flushes, _ = _seven_card_tables()
+    products = np.array(sorted(unsuited), dtype=np.int64)
+    values = np.array([unsuited[product] for product in products.tolist()], dtype=np.int32)
+    flush_values = np.full(1 << 13, 7463, dtype=np.int32)
+    for mask in range(1 << 13):
+        ranks = [rank for rank in range(13) if mask >> rank & 1]
+        if 5 <= len(ranks) <= 7:
+            product = 1
+            for rank in ranks:
+                product *= TreysCard.PRIMES[rank]
+            flush_values[mask] = flushes[product]
+    return products, values, flush_values
+
+
+def numpy_rank_values(cards: "np.ndarray") -> "np.ndarray":
+    """Ranking Treys (menor é melhor) de cada grupo de 7 cartas no último eixo de ``cards``.
+
+    Mesmo valor de ``fast_rank_value``, só com operações de array: o numpy solta
+    o GIL nelas, então threads avaliam blocos em paralelo mesmo com o GIL ligado.
+    """
+    products, values, flush_values = _numpy_rank_tables()
+    ranked = values[np.searchsorted(products, np.prod(cards & 0xFF, axis=-1))]
+    suits = (cards >> 12) & 0xF
+    rank_bits = (cards >> 16) & 0x1FFF
+    for suit_bit in SUIT_BITS:
+        masks = np.where(suits == suit_bit, rank_bits, 0).sum(axis=-1)
+        np.minimum(ranked, flush_values[masks], out=ranked)
+    return ranked
+
+
+def fast_rank_value(cards: Sequence[Card]) -> int:
+    """Ranking Treys (menor é melhor) de 7 cartas por consulta em tabela.
+
+    Mesmo valor de ``EVALUATOR.evaluate``, sem testar as 21 combinações de 5 cartas.
+    """
+    unsuited, flushes, _ = _seven_card_tables()
+    product = 1
+    suit_counts = 0
+    for card in cards:
+        product *= card & 0xFF
+        suit_counts += SUIT_NIBBLE[(card >> 12) & 0xF]
+    value = unsuited[product]
+    if (suit_counts + FLUSH_CARRY) & FLUSH_MASK:
+        value = min(value, _flush_value(cards, suit_counts, flushes))
+    return value
+
+
+class EvaluatorBackend:
+    """Avaliador intercambiável: ranking Treys (menor é melhor) de mão + board com 5 a 7 cartas.
+
+    ``rank_batch``, opcional, ranqueia de uma vez uma lista de mãos de 7 cartas
+    (para kernels vetorizados); a escolha automática mede só ``rank``, o caminho
+    dos motores mão a mão, mas confere os dois contra o Treys.
+    """
+
+    __slots__ = ("name", "rank", "prepare", "rank_batch")
+
+    def __init__(
+        self,
+        name: str,
+        rank: Callable[[Sequence[Card], Sequence[Card]], int],
+        prepare: Optional[Callable[[], object]] = None,
+        rank_batch: Optional[Callable[[Sequence[Sequence[Card]]], List[int]]] = None,
+    ) -> None:
+        self.name = name
+        self.rank = rank
+        # Montagem de tabelas etc., feita antes de medir (não entra na taxa).
+        self.prepare = prepare
+        self.rank_batch = rank_batch
+
+
+def _treys_rank(hand: Sequence[Card], board: Sequence[Card]) -> int:
+    return EVALUATOR.evaluate(list(hand), list(board))
+
+
+def _table_rank(hand: Sequence[Card], board: Sequence[Card]) -> int:
+    # As tabelas por produto de primos cobrem só 7 cartas; mesas incompletas usam o Treys.
+    if len(hand) + len(board) != 7:
+        return EVALUATOR.evaluate(list(hand), list(board))
+    return fast_rank_value(tuple(hand) + tuple(board))
+
+
+def _numpy_rank_batch(hands: Sequence[Sequence[Card]]) -> List[int]:
+    return numpy_rank_values(np.array(hands, dtype=np.int64)).tolist()
+
+
+def _numpy_rank(hand: Sequence[Card], board: Sequence[Card]) -> int:
+    # Uma mão por chamada paga o custo fixo do numpy: existe para conferência; o ganho está no lote.
+    if len(hand) + len(board) != 7:
+        return EVALUATOR.evaluate(list(hand), list(board))
+    return _numpy_rank_batch([tuple(hand) + tuple(board)])[0]
+
+
+EVALUATOR_BACKENDS: Dict[str, EvaluatorBackend] = {}
+
+
+def register_evaluator_backend(backend: EvaluatorBackend) -> None:
+    """Disponibiliza um backend para a escolha automática (e para ``POKER_EVALUATOR_BACKEND``)."""
+    EVALUATOR_BACKENDS[backend.name] = backend
+
+
+register_evaluator_backend(EvaluatorBackend("treys", _treys_rank))
+register_evaluator_backend(EvaluatorBackend("table", _table_rank, _seven_card_tables))
+if np is not None:
+    register_evaluator_backend(EvaluatorBackend("numpy", _numpy_rank, _numpy_rank_tables, _numpy_rank_batch))
+EVALUATOR_BENCHMARK_HANDS = 2000
+
+
+class EvaluatorSelection:
+    """Backend escolhido no processo e as taxas medidas (mãos de 7 cartas por segundo)."""
+
+    __slots__ = ("backend", "rates", "source")
+
+    def __init__(self, backend: EvaluatorBackend, rates: Dict[str, float], source: str) -> None:
+        self.backend = backend
+        self.rates = rates
+        self.source = source
+
+    def rank(self, hand: Sequence[Card], board: Sequence[Card]) -> int:
+        return self.backend.rank(hand, board)
+
+    def meta(self) -> Dict[str, object]:
+        return {
+            "backend": self.backend.name,
+            "hands_per_sec": self.rates.get(self.backend.name, 0.0),
+            "source": self.source,
+        }
+
+
+def benchmark_evaluator_backend(
+    backend: EvaluatorBackend, samples: Sequence[Tuple[Card, ...]], expected: Sequence[int]
+) -> Optional[float]:
+    """Taxa do backend nas mãos de ``samples``; None se algum ranking diverge do Treys (ou ele falha)."""
+    try:
+        if backend.prepare is not None:
+            backend.prepare()
+        start = time.perf_counter()
+        values = [backend.rank(cards[:2], cards[2:]) for cards in samples]
+        elapsed = time.perf_counter() - start
+        if backend.rank_batch is not None and backend.rank_batch(samples) != list(expected):
+            return None
+    except Exception:
+        return None
+    if values != list(expected):
+        return None
+    return len(samples) / elapsed if elapsed > 0 else float("inf")
+
+
+@lru_cache(maxsize=None)
+def get_evaluator_backend() -> EvaluatorSelection:
+    """Escolhe, uma vez por processo (inclusive em cada worker do pool), o avaliador mais rápido e correto.
+
+    Um microbenchmark com mãos de 7 cartas fixas compara cada backend registrado
+    com o Treys e mede a taxa. ``POKER_EVALUATOR_BACKEND`` força um backend pelo
+    nome (ainda conferido e medido); um nome desconhecido ou incorreto cai na escolha automática.
+    """
+    rng = random.Random(EVALUATOR_BENCHMARK_HANDS)
+    deck = build_deck()
+    samples = [tuple(rng.sample(deck, 7)) for _ in range(EVALUATOR_BENCHMARK_HANDS)]
+    expected = [EVALUATOR.evaluate(list(cards[:2]), list(cards[2:])) for cards in samples]
+    requested = os.environ.get("POKER_EVALUATOR_BACKEND", "").strip().lower()
+    if requested in EVALUATOR_BACKENDS:
+        rate = benchmark_evaluator_backend(EVALUATOR_BACKENDS[requested], samples, expected)
+        if rate is not None:
+            return EvaluatorSelection(EVALUATOR_BACKENDS[requested], {requested: rate}, "override")
+    rates: Dict[str, float] = {}
+    for name, backend in EVALUATOR_BACKENDS.items():
+        rate = benchmark_evaluator_backend(backend, samples, expected)
+        if rate is not None:
+            rates[name] = rate
+    best = max(rates, key=rates.__getitem__)
+    return EvaluatorSelection(EVALUATOR_BACKENDS[best], rates, "benchmark")
+
+
+def suit_symmetries(card_groups: Sequence[Sequence[Card]]) -> List[Dict[Card, Card]]:
+    """Permutações de naipe (como mapas carta -> carta) que preservam cada grupo de cartas.
+
+    A identidade vem sempre primeiro.
+    """
+    symmetries = []
+    for image in permutations(SUIT_BITS):
+        suit_map = dict(zip(SUIT_BITS, image))
+        card_map = {card: (card & ~0xF000) | (suit_map[(card >> 12) & 0xF] << 12) for card in build_deck()}
+        if all({card_map[card] for card in group} == set(group) for group in card_groups):
+            symmetries.append(card_map)
+    return symmetries
+
+
 def format_card(card: Card) -> str:
     """Representação amigável usando símbolos de naipe."""
     notation = TreysCard.int_to_str(card)
@@ -658,13 +1171,221 @@ def format_hand(cards: Sequence[Card]) -> str:
     return " ".join(format_card(card) for card in sorted_cards)
 
 
-@st.cache_resource(show_spinner=False)
-def get_monte_carlo_pool(max_workers: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
-    """Cria (e cacheia) um pool de workers para o Monte Carlo no modo rápido."""
+def _timed_task(function: Callable, args: Tuple, kwargs: Dict[str, object]) -> Tuple[object, float, float]:
+    """Roda a tarefa no worker devolvendo (resultado, início no relógio de parede, tempo ocupado)."""
+    started = time.time()
+    busy_start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, started, time.perf_counter() - busy_start
+
+
+class _MeteredFuture(Future):
+    """Future entregue por ``InstrumentedExecutor``; cancelar cancela a tarefa no pool."""
+
+    def __init__(self, inner: Future) -> None:
+        super().__init__()
+        self._inner = inner
+
+    def cancel(self) -> bool:
+        if not self._inner.cancel():
+            return False
+        return super().cancel()
+
+
+class InstrumentedExecutor(Executor):
+    """Envolve um pool medindo espera na fila, tempo ocupado dos workers e tarefas pendentes.
+
+    As tarefas rodam via ``_timed_task`` (função de módulo, válida em processos,
+    threads e sub-interpretadores) e o resultado volta sem o envelope de medição.
+    """
+
+    def __init__(self, pool: Executor, name: str, backend: ParallelBackend = "process") -> None:
+        self.pool = pool
+        self.name = name
+        self.backend = backend
+        self._max_workers = getattr(pool, "_max_workers", None)
+        METRICS.add_collector(self.metric_samples)
+
+    @property
+    def pending(self) -> int:
+        submitted = METRICS.value("poker_pool_tasks_submitted_total", pool=self.name)
+        return max(0, int(submitted - METRICS.value("poker_pool_tasks_completed_total", pool=self.name)))
+
+    def submit(self, fn, /, *args, **kwargs):  # type: ignore[no-untyped-def, override]
+        submitted_at = time.time()
+        inner = self.pool.submit(_timed_task, fn, args, kwargs)
+        outer = _MeteredFuture(inner)
+        METRICS.inc("poker_pool_tasks_submitted_total", pool=self.name)
+
+        def complete(done: Future) -> None:
+            METRICS.inc("poker_pool_tasks_completed_total", pool=self.name)
+            if done.cancelled():
+                if not outer.done():
+                    Future.cancel(outer)
+                    outer.set_running_or_notify_cancel()
+                return
+            error = done.exception()
+            if outer.done():
+                return
+            if error is not None:
+                outer.set_exception(error)
+                return
+            result, started, busy = done.result()
+            METRICS.observe("poker_pool_queue_wait_seconds", max(0.0, started - submitted_at), pool=self.name)
+            METRICS.observe("poker_pool_task_seconds", busy, pool=self.name)
+            METRICS.inc("poker_pool_busy_seconds_total", busy, pool=self.name)
+            outer.set_result(result)
+
+        inner.add_done_callback(complete)
+        return outer
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self.pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def metric_samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        labels = {"pool": self.name}
+        return [
+            ("poker_pool_workers", labels, float(self._max_workers or 0)),
+            ("poker_pool_pending", labels, float(self.pending)),
+        ]
+
+
+@metered_cache(st.cache_resource(show_spinner=False), "get_monte_carlo_pool")
+def get_monte_carlo_pool(max_workers: Optional[int] = None) -> Optional[Executor]:
+    """Cria (e cacheia) o pool de workers dos motores paralelos no backend do ambiente."""
     workers = max_workers or (os.cpu_count() or 1)
-    if workers < 2:
+    backend = choose_parallel_backend()
+    if workers < 2 or backend == "serial":
         return None
-    return ProcessPoolExecutor(max_workers=workers)
+    return create_parallel_pool(backend, workers)
+
+
+def create_parallel_pool(backend: ParallelBackend, workers: int) -> Executor:
+    """Pool instrumentado de ``workers`` no backend pedido, sem cache (``validate_engines.py`` testa cada um).
+
+    Todos os backends expõem a mesma interface ``Executor`` (``submit``); os
+    workers são funções de módulo com argumentos imutáveis, válidos em qualquer um.
+    """
+    if backend == "interpreter":
+        pool: Executor = concurrent.futures.InterpreterPoolExecutor(max_workers=workers, initializer=_warm_up_worker)
+    elif backend == "thread":
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="poker-mc")
+    elif backend == "process":
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_up_worker)
+    else:
+        raise ValueError(f"Backend paralelo sem pool: {backend}")
+    return InstrumentedExecutor(pool, "monte_carlo", backend)
+
+
+def _warm_up_worker() -> None:
+    """Initializer dos workers: escolhe o avaliador do processo antes da primeira tarefa."""
+    get_evaluator_backend()
+
+
+PROFILE_PHASES = ("deal_board", "deal_opponents", "evaluate", "compare")
+PHASE_DEAL_BOARD, PHASE_DEAL_OPPONENTS, PHASE_EVALUATE, PHASE_COMPARE = range(len(PROFILE_PHASES))
+PROFILE_PHASE_LABELS = {
+    "deal_board": "Distribuir o board",
+    "deal_opponents": "Distribuir os oponentes",
+    "evaluate": "Avaliar as mãos",
+    "compare": "Comparar e acumular",
+}
+# Uma iteração medida a cada 64: cinco leituras de relógio por amostra, bem menos de 1% do laço.
+PROFILE_SAMPLE_EVERY = 64
+# Fase inicial sorteada da amostragem sistemática (gerador próprio: não mexe no ``random`` global).
+_PROFILE_OFFSETS = random.Random()
+
+
+class PhaseProfile:
+    """Tempo por fase do laço quente, medido só numa fração das iterações.
+
+    ``sample()`` no início da iteração diz se ela é medida; nas medidas,
+    ``mark(fase)`` soma o tempo desde a marca anterior. A primeira iteração
+    medida é sorteada, então lotes curtos (menores que ``every``) também
+    contribuem sem medir sempre a primeira iteração, a mais fria. Os perfis dos
+    workers voltam com o resultado e se somam com ``merge``.
+
+    Nos motores que embaralham o baralho inteiro, o embaralhamento já distribui
+    os oponentes: lá ``deal_opponents`` fica zerado e o custo aparece em ``deal_board``.
+    """
+
+    __slots__ = ("every", "countdown", "seconds", "sampled", "initial_rate", "workers", "_last")
+
+    def __init__(self, every: int = PROFILE_SAMPLE_EVERY) -> None:
+        self.every = max(1, every)
+        self.countdown = _PROFILE_OFFSETS.randint(1, self.every)
+        self.seconds = [0.0] * len(PROFILE_PHASES)
+        self.sampled = 0
+        self.initial_rate = 0.0
+        self.workers: Optional[int] = None
+        self._last = 0.0
+
+    def sample(self) -> bool:
+        self.countdown -= 1
+        if self.countdown:
+            return False
+        self.countdown = self.every
+        self.sampled += 1
+        self._last = time.perf_counter()
+        return True
+
+    def mark(self, phase: int) -> None:
+        now = time.perf_counter()
+        self.seconds[phase] += now - self._last
+        self._last = now
+
+    def note_initial_rate(self, iterations: int, elapsed: float) -> None:
+        """Taxa no primeiro lote (inclui aquecimento de caches e workers); só a primeira conta."""
+        if not self.initial_rate and elapsed > 0:
+            self.initial_rate = iterations / elapsed
+
+    def merge(self, other: Optional["PhaseProfile"]) -> None:
+        if other is None:
+            return
+        for idx, seconds in enumerate(other.seconds):
+            self.seconds[idx] += seconds
+        self.sampled += other.sampled
+
+    def summary(self, iterations: int, **extra: object) -> Dict[str, object]:
+        """Segundos por fase no cálculo inteiro, extrapolados das iterações medidas.
+
+        Com workers paralelos é tempo somado dos workers, não tempo de parede.
+        """
+        scale = iterations / self.sampled if self.sampled else 0.0
+        profile: Dict[str, object] = {name: self.seconds[idx] * scale for idx, name in enumerate(PROFILE_PHASES)}
+        profile["iter_per_sec_initial"] = self.initial_rate
+        profile["sampled_iterations"] = self.sampled
+        profile["sample_every"] = self.every
+        if self.workers:
+            profile["parallel_workers"] = self.workers
+        profile.update(extra)
+        return profile
+
+
+def profile_breakdown(profile: Dict[str, object], iterations: int) -> List[Dict[str, object]]:
+    """Linhas do painel de perfil: fase, fração do tempo medido e microssegundos por iteração."""
+    phases = [(name, float(profile.get(name, 0.0) or 0.0)) for name in PROFILE_PHASES]  # type: ignore[arg-type]
+    measured = sum(seconds for _, seconds in phases)
+    return [
+        {
+            "phase": name,
+            "share": seconds / measured if measured else 0.0,
+            "us_per_iteration": seconds * 1e6 / iterations if iterations else 0.0,
+        }
+        for name, seconds in phases
+    ]
+
+
+def capture_cprofile(function: Callable, *args: object, limit: int = 25, **kwargs: object) -> Tuple[object, str]:
+    """Roda ``function`` sob o cProfile e devolve (retorno, relatório por tempo acumulado).
+
+    Só a thread chamadora é medida: para ver o laço quente, rode o cálculo sem workers paralelos.
+    """
+    profiler = cProfile.Profile()
+    value = profiler.runcall(function, *args, **kwargs)
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return value, stream.getvalue()
 
 
 def _mc_worker_fast(
@@ -675,8 +1396,9 @@ def _mc_worker_fast(
     deck_remaining: Sequence[Card],
     iterations: int,
     seed: int,
-) -> Tuple[int, int, int]:
-    """Processa um lote de iterações Monte Carlo retornando apenas win/tie/loss."""
+    stacks: Optional[Tuple[int, ...]] = None,
+) -> Tuple[int, int, int, "TableEquityAccumulator", Optional["SidePotAccumulator"], PhaseProfile]:
+    """Processa um lote de iterações Monte Carlo retornando win/tie/loss, a equity da mesa, os potes e o perfil."""
     rng = random.Random(seed)
     hero = list(hero_cards)
     board_base = list(board_cards)
@@ -688,15 +1410,23 @@ def _mc_worker_fast(
     if random_opponents < 0:
         raise ValueError("Worker recebeu mais oponentes conhecidos que o total configurado.")
     deck_buffer = list(deck_remaining)
+    table = TableEquityAccumulator(num_opponents, len(known))
+    side_pots = SidePotAccumulator(stacks, lower_is_better=False) if stacks else None
+    profile = PhaseProfile()
     wins = ties = losses = 0
     for _ in range(iterations):
+        sampled = profile.sample()
         rng.shuffle(deck_buffer)
         for idx in range(missing_board):
             board_buffer[base_len + idx] = deck_buffer[idx]
+        if sampled:
+            profile.mark(PHASE_DEAL_BOARD)
         hero_rank = best_hand_rank_7(hero, board_buffer)
+        ranks = [hero_rank]
         best_opponent_rank: Tuple[int, int] = (-1, 0)
         for opp_cards in known:
             rank = best_hand_rank_7(opp_cards, board_buffer)
+            ranks.append(rank)
             if rank > best_opponent_rank:
                 best_opponent_rank = rank
         offset = missing_board
@@ -705,19 +1435,108 @@ def _mc_worker_fast(
             card_b = deck_buffer[offset + 1]
             offset += 2
             rank = best_hand_rank_7((card_a, card_b), board_buffer)
+            ranks.append(rank)
             if rank > best_opponent_rank:
                 best_opponent_rank = rank
+        if sampled:
+            profile.mark(PHASE_EVALUATE)
+        if side_pots is not None:
+            side_pots.record(ranks)
         if hero_rank > best_opponent_rank:
             wins += 1
+            table.record_wins(0, 1)
         elif hero_rank == best_opponent_rank:
             ties += 1
+            table.record(ranks, hero_rank)
         else:
             losses += 1
-    return wins, ties, losses
+            table.record(ranks, best_opponent_rank)
+        if sampled:
+            profile.mark(PHASE_COMPARE)
+    return wins, ties, losses, table, side_pots, profile
+
+
+# Cenários sorteados e avaliados por vez no kernel numpy (arrays de poucos MB).
+NUMPY_KERNEL_BLOCK = 4096
+
+
+def _mc_worker_numpy(
+    hero_cards: Sequence[Card],
+    board_cards: Sequence[Card],
+    num_opponents: int,
+    known_opponents: Sequence[Sequence[Card]],
+    deck_remaining: Sequence[Card],
+    iterations: int,
+    seed: int,
+    stacks: Optional[Tuple[int, ...]] = None,
+) -> Tuple[int, int, int, "TableEquityAccumulator", Optional["SidePotAccumulator"], PhaseProfile]:
+    """O lote de ``_mc_worker_fast`` com sorteio, avaliação e comparação vetorizados em numpy.
+
+    Vem da comparação de todas contra todas de ``build_preflop_matrix.py``: cada
+    bloco sorteia ``NUMPY_KERNEL_BLOCK`` cenários de uma vez (ordem aleatória do
+    baralho por ``argsort``), avalia os 7 cartas de todos os jogadores com
+    ``numpy_rank_values`` e acumula vencedores e frações do pote por coluna. As
+    operações de array soltam o GIL, e é isso que faz o backend de threads
+    escalar. Só os potes laterais, quando há stacks, voltam a um laço por cenário.
+    O perfil mede cada fase no bloco inteiro, sem amostrar iterações.
+    """
+    known = [tuple(cards) for cards in known_opponents]
+    random_opponents = num_opponents - len(known)
+    if random_opponents < 0:
+        raise ValueError("Worker recebeu mais oponentes conhecidos que o total configurado.")
+    rng = np.random.default_rng(seed)
+    deck = np.array(deck_remaining, dtype=np.int64)
+    board = np.array(board_cards, dtype=np.int64)
+    missing_board = max(0, 5 - len(board_cards))
+    needed = missing_board + 2 * random_opponents
+    fixed_hands = np.array([tuple(hero_cards)] + known, dtype=np.int64)
+    players = num_opponents + 1
+    table = TableEquityAccumulator(num_opponents, len(known))
+    side_pots = SidePotAccumulator(stacks) if stacks else None
+    profile = PhaseProfile()
+    player_wins = np.zeros(players, dtype=np.int64)
+    player_shares = np.zeros(players, dtype=np.int64)
+    wins = ties = 0
+    done = 0
+    while done < iterations:
+        size = min(NUMPY_KERNEL_BLOCK, iterations - done)
+        started = time.perf_counter()
+        dealt = deck[np.argsort(rng.random((size, len(deck))), axis=1)[:, :needed]]
+        boards = np.concatenate((np.broadcast_to(board, (size, len(board))), dealt[:, :missing_board]), axis=1)
+        hands = np.concatenate(
+            (
+                np.broadcast_to(fixed_hands, (size,) + fixed_hands.shape),
+                dealt[:, missing_board:].reshape(size, random_opponents, 2),
+            ),
+            axis=1,
+        )
+        seven = np.concatenate((hands, np.broadcast_to(boards[:, None, :], (size, players, 5))), axis=2)
+        dealt_at = time.perf_counter()
+        values = numpy_rank_values(seven)
+        evaluated_at = time.perf_counter()
+        winners = values == values.min(axis=1, keepdims=True)
+        counts = winners.sum(axis=1)
+        sole = counts == 1
+        wins += int(np.count_nonzero(winners[:, 0] & sole))
+        ties += int(np.count_nonzero(winners[:, 0] & ~sole))
+        player_wins += (winners & sole[:, None]).sum(axis=0)
+        player_shares += (winners * (SHARE_UNITS // counts)[:, None]).sum(axis=0)
+        if side_pots is not None:
+            for row in values.tolist():
+                side_pots.record(row)
+        compared_at = time.perf_counter()
+        profile.seconds[PHASE_DEAL_BOARD] += dealt_at - started
+        profile.seconds[PHASE_EVALUATE] += evaluated_at - dealt_at
+        profile.seconds[PHASE_COMPARE] += compared_at - evaluated_at
+        profile.sampled += size
+        done += size
+    table.wins = player_wins.tolist()
+    table.shares = player_shares.tolist()
+    return wins, ties, iterations - wins - ties, table, side_pots, profile
 
 
 def _run_parallel_fast(
-    pool: ProcessPoolExecutor,
+    pool: Executor,
     hero_cards: Tuple[Card, ...],
     board_cards: Tuple[Card, ...],
     num_opponents: int,
@@ -725,16 +1544,19 @@ def _run_parallel_fast(
     deck_remaining: Tuple[Card, ...],
     max_seconds: float,
     chunk_iterations: int,
-) -> Tuple[int, int, int, float, Dict[str, object]]:
+    stacks: Optional[Tuple[int, ...]] = None,
+) -> Tuple[int, int, int, "TableEquityAccumulator", Optional["SidePotAccumulator"], float, Dict[str, object]]:
     """Executa Monte Carlo rápido em paralelo agregando contadores."""
     start = time.perf_counter()
     rng = random.Random()
     chunk_iterations = max(200, chunk_iterations)
+    backend = pool_backend(pool)
+    worker = _mc_worker_numpy if backend == "thread" and np is not None else _mc_worker_fast
 
     def submit_one() -> Future:
         seed = rng.randrange(1, 1_000_000_000)
         return pool.submit(
-            _mc_worker_fast,
+            worker,
             hero_cards,
             board_cards,
             num_opponents,
@@ -742,6 +1564,7 @@ def _run_parallel_fast(
             deck_remaining,
             chunk_iterations,
             seed,
+            stacks,
         )
 
     max_workers = getattr(pool, "_max_workers", os.cpu_count() or 1)
@@ -750,6 +1573,10 @@ def _run_parallel_fast(
         active.append(submit_one())
 
     wins = ties = losses = 0
+    table = TableEquityAccumulator(num_opponents, len(known_opponents))
+    side_pots = SidePotAccumulator(stacks, lower_is_better=False) if stacks else None
+    phases = PhaseProfile()
+    phases.workers = max_workers
     chunks = 0
     while active:
         future = next(as_completed(active))
@@ -758,29 +1585,460 @@ def _run_parallel_fast(
         wins += worker_result[0]
         ties += worker_result[1]
         losses += worker_result[2]
+        table.merge(worker_result[3])
+        if side_pots is not None:
+            side_pots.merge(worker_result[4])
+        phases.merge(worker_result[5])
+        phases.note_initial_rate(wins + ties + losses, time.perf_counter() - start)
         chunks += 1
         if time.perf_counter() - start < max_seconds:
             active.append(submit_one())
     elapsed = time.perf_counter() - start
-    profile = {
-        "parallel_workers": getattr(pool, "_max_workers", None),
-        "chunks": chunks,
-        "deal_board": 0.0,
-        "deal_opponents": 0.0,
-        "evaluate": 0.0,
-        "compare": 0.0,
-        "iter_per_sec_initial": 0.0,
-    }
-    return wins, ties, losses, elapsed, profile
+    profile = phases.summary(
+        wins + ties + losses,
+        parallel_backend=backend,
+        parallel_kernel="numpy" if worker is _mc_worker_numpy else "python",
+        chunks=chunks,
+    )
+    return wins, ties, losses, table, side_pots, elapsed, profile
+
+
+NUM_CATEGORIES = len(CATEGORY_NAMES)
+
+
+def pack_hand(card_a: Card, card_b: Card) -> int:
+    """Empacota duas cartas em um único inteiro (independe da ordem)."""
+    if card_a < card_b:
+        card_a, card_b = card_b, card_a
+    return (card_a << 32) | card_b
+
+
+def unpack_hand(key: int) -> Tuple[Card, Card]:
+    return key & 0xFFFFFFFF, key >> 32
+
+
+class BreakdownAccumulator:
+    """Contadores de breakdown em listas de tamanho fixo, indexadas por categoria/oponente.
+
+    Nada aqui gera strings: rótulos e mãos formatadas só aparecem em
+    ``_build_result_dict``/``build_loss_breakdown``.
+    """
+
+    __slots__ = (
+        "num_opponents",
+        "hero_category",
+        "hero_win_category",
+        "loss_category",
+        "tie_category",
+        "tie_size",
+        "loss_winner",
+        "losing_examples",
+        "board_only_ties",
+    )
+
+    def __init__(self, num_opponents: int) -> None:
+        self.num_opponents = max(1, num_opponents)
+        self.hero_category = [0] * NUM_CATEGORIES
+        self.hero_win_category = [0] * NUM_CATEGORIES
+        self.loss_category = [0] * NUM_CATEGORIES
+        self.tie_category = [0] * NUM_CATEGORIES
+        # Índice = número de jogadores empatados (Hero incluso).
+        self.tie_size = [0] * (self.num_opponents + 2)
+        # Índice = categoria * num_opponents + índice do oponente vencedor.
+        self.loss_winner = [0] * (NUM_CATEGORIES * self.num_opponents)
+        self.losing_examples: List[Dict[int, int]] = [{} for _ in range(NUM_CATEGORIES)]
+        self.board_only_ties = 0
+
+    def record_loss(self, category: int, opponent_idx: int, hand_key: int, count: int = 1) -> None:
+        self.loss_category[category] += count
+        self.loss_winner[category * self.num_opponents + opponent_idx] += count
+        examples = self.losing_examples[category]
+        examples[hand_key] = examples.get(hand_key, 0) + count
+
+    def merge(self, other: "BreakdownAccumulator") -> None:
+        """Soma os contadores de outro acumulador (ex.: resultado de um worker)."""
+        for mine, theirs in (
+            (self.hero_category, other.hero_category),
+            (self.hero_win_category, other.hero_win_category),
+            (self.loss_category, other.loss_category),
+            (self.tie_category, other.tie_category),
+            (self.tie_size, other.tie_size),
+            (self.loss_winner, other.loss_winner),
+        ):
+            for idx, count in enumerate(theirs):
+                mine[idx] += count
+        for mine_examples, their_examples in zip(self.losing_examples, other.losing_examples):
+            for hand_key, count in their_examples.items():
+                mine_examples[hand_key] = mine_examples.get(hand_key, 0) + count
+        self.board_only_ties += other.board_only_ties
+
+    def trim_examples(self, keep: int = 3) -> None:
+        """Descarta exemplos de mãos além dos ``keep`` mais frequentes de cada categoria."""
+        for category_value, examples in enumerate(self.losing_examples):
+            if len(examples) > keep:
+                top_hands = sorted(examples.items(), key=lambda item: item[1], reverse=True)[:keep]
+                self.losing_examples[category_value] = dict(top_hands)
+
+
+# Frações de pote em unidades inteiras: mmc(1..10) divide o pote entre qualquer
+# número de empatados numa mesa de até 10 jogadores sem resto.
+SHARE_UNITS = 2520
+
+
+class TableEquityAccumulator:
+    """Vitórias e frações de pote de todos os jogadores, no mesmo passe do Hero.
+
+    Índice 0 = Hero, 1..n = oponentes na ordem dos rótulos (conhecidos primeiro).
+    """
+
+    __slots__ = ("known_count", "wins", "shares")
+
+    def __init__(self, num_opponents: int, known_count: int = 0) -> None:
+        self.known_count = known_count
+        self.wins = [0] * (num_opponents + 1)
+        self.shares = [0] * (num_opponents + 1)
+
+    def record(self, values: Sequence[object], best: object, weight: int = 1) -> None:
+        """Divide o pote entre os jogadores cujo valor é ``best`` (vencedor do showdown)."""
+        winners = [idx for idx, value in enumerate(values) if value == best]
+        if len(winners) == 1:
+            self.wins[winners[0]] += weight
+            self.shares[winners[0]] += SHARE_UNITS * weight
+            return
+        share = SHARE_UNITS // len(winners) * weight
+        for idx in winners:
+            self.shares[idx] += share
+
+    def record_wins(self, player: int, count: int) -> None:
+        self.wins[player] += count
+        self.shares[player] += SHARE_UNITS * count
+
+    def merge(self, other: "TableEquityAccumulator") -> None:
+        for idx, count in enumerate(other.wins):
+            self.wins[idx] += count
+        for idx, count in enumerate(other.shares):
+            self.shares[idx] += count
+
+    @classmethod
+    def heads_up(cls, wins: int, ties: int, losses: int, known_count: int = 0) -> "TableEquityAccumulator":
+        """Mesa de dois jogadores a partir dos contadores do Hero."""
+        table = cls(1, known_count)
+        table.record_wins(0, wins)
+        table.record_wins(1, losses)
+        table.shares[0] += SHARE_UNITS // 2 * ties
+        table.shares[1] += SHARE_UNITS // 2 * ties
+        return table
+
+
+def build_table_equity(
+    table: TableEquityAccumulator, opponent_labels: Sequence[str], total: int
+) -> List[Dict[str, object]]:
+    """Linhas de equity da mesa: Hero, cada oponente conhecido e os aleatórios agregados."""
+    if total <= 0:
+        return []
+    pot = SHARE_UNITS * total
+
+    def row(label: str, players: Sequence[int]) -> Dict[str, object]:
+        return {
+            "player": label,
+            "players": len(players),
+            "win_pct": sum(table.wins[idx] for idx in players) / total * 100,
+            "equity_pct": sum(table.shares[idx] for idx in players) / pot * 100,
+        }
+
+    rows = [row("Hero", [0])]
+    for idx in range(1, table.known_count + 1):
+        label = opponent_labels[idx - 1] if idx - 1 < len(opponent_labels) else f"Oponente {idx}"
+        rows.append(row(label, [idx]))
+    random_players = list(range(table.known_count + 1, len(table.wins)))
+    if random_players:
+        rows.append(row(f"Oponentes aleatórios ({len(random_players)})", random_players))
+    return rows
+
+
+def normalize_stacks(stacks: Optional[Sequence[int]], num_opponents: int) -> Optional[Tuple[int, ...]]:
+    """Valida os stacks do all-in (Hero primeiro, depois os oponentes na ordem da mesa)."""
+    if not stacks:
+        return None
+    if len(stacks) != num_opponents + 1 or any(stack <= 0 for stack in stacks):
+        raise ValueError("Informe um stack positivo para o Hero e para cada oponente.")
+    return tuple(int(stack) for stack in stacks)
+
+
+def build_side_pots(stacks: Sequence[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+    """Pote principal e laterais de um all-in: (fichas, jogadores elegíveis), do principal ao último.
+
+    Um último pote com um só elegível é o excedente que ninguém pagou (volta ao dono).
+    """
+    pots: List[Tuple[int, Tuple[int, ...]]] = []
+    previous = 0
+    for level in sorted({stack for stack in stacks if stack > 0}):
+        eligible = tuple(idx for idx, stack in enumerate(stacks) if stack >= level)
+        pots.append(((level - previous) * len(eligible), eligible))
+        previous = level
+    return pots
+
+
+class SidePotAccumulator:
+    """Fichas esperadas de cada jogador em cada pote, em unidades de 1/SHARE_UNITS por cenário.
+
+    Recebe um valor de mão por jogador na ordem da mesa: a mesma avaliação do
+    runout serve a todos os potes. O avaliador por tabela usa menor = melhor; os
+    rankings ``(categoria, valor)`` do Monte Carlo usam ``lower_is_better=False``.
+
+    ``outcomes`` conta cada desfecho distinto (vencedores de cada pote disputado):
+    o ICM não é linear nas fichas, então o $EV precisa da distribuição dos stacks
+    finais, não só das fichas esperadas.
+    """
+
+    __slots__ = ("stacks", "pots", "chips", "lower_is_better", "outcomes")
+
+    def __init__(self, stacks: Sequence[int], lower_is_better: bool = True) -> None:
+        self.stacks = tuple(stacks)
+        self.pots = build_side_pots(self.stacks)
+        self.chips = [[0] * len(self.stacks) for _ in self.pots]
+        self.lower_is_better = lower_is_better
+        self.outcomes: Dict[Tuple[Tuple[int, ...], ...], int] = {}
+
+    def record(self, values: Sequence[object], weight: int = 1) -> None:
+        pick = min if self.lower_is_better else max
+        outcome = []
+        for pot_chips, (amount, eligible) in zip(self.chips, self.pots):
+            if len(eligible) == 1:
+                pot_chips[eligible[0]] += amount * SHARE_UNITS * weight
+                continue
+            best = pick(values[idx] for idx in eligible)
+            winners = tuple([idx for idx in eligible if values[idx] == best])
+            outcome.append(winners)
+            share = amount * (SHARE_UNITS // len(winners)) * weight
+            for idx in winners:
+                pot_chips[idx] += share
+        key = tuple(outcome)
+        self.outcomes[key] = self.outcomes.get(key, 0) + weight
+
+    def merge(self, other: "SidePotAccumulator") -> None:
+        for mine, theirs in zip(self.chips, other.chips):
+            for idx, count in enumerate(theirs):
+                mine[idx] += count
+        for key, count in other.outcomes.items():
+            self.outcomes[key] = self.outcomes.get(key, 0) + count
+
+    def final_stacks(self, outcome: Sequence[Tuple[int, ...]]) -> Tuple[float, ...]:
+        """Fichas de cada jogador depois do desfecho (potes divididos em partes iguais)."""
+        stacks = [0.0] * len(self.stacks)
+        winners = iter(outcome)
+        for amount, eligible in self.pots:
+            pot_winners = eligible if len(eligible) == 1 else next(winners)
+            for idx in pot_winners:
+                stacks[idx] += amount / len(pot_winners)
+        return tuple(stacks)
+
+    @classmethod
+    def from_table(cls, stacks: Sequence[int], table: TableEquityAccumulator) -> Optional["SidePotAccumulator"]:
+        """Deriva os potes da equity da mesa quando todo pote disputado envolve todos os jogadores.
+
+        Vale no heads-up (o excedente do stack maior é devolvido); com potes
+        laterais de verdade é preciso a avaliação por cenário (None).
+        """
+        if len(stacks) != len(table.shares):
+            return None
+        side_pots = cls(stacks)
+        total = sum(table.shares) // SHARE_UNITS
+        for pot_chips, (amount, eligible) in zip(side_pots.chips, side_pots.pots):
+            if len(eligible) == 1:
+                pot_chips[eligible[0]] = amount * SHARE_UNITS * total
+            elif len(eligible) == len(stacks):
+                for idx, share in enumerate(table.shares):
+                    pot_chips[idx] = amount * share
+            else:
+                return None
+        if len(stacks) == 2:
+            # Heads-up: vitórias de cada lado e o resto empatado bastam para a distribuição do ICM.
+            counts = {((0,),): table.wins[0], ((1,),): table.wins[1], ((0, 1),): total - sum(table.wins)}
+            side_pots.outcomes = {key: count for key, count in counts.items() if count}
+        return side_pots
+
+
+def build_side_pot_summary(
+    side_pots: SidePotAccumulator, opponent_labels: Sequence[str], total: int
+) -> Dict[str, List[Dict[str, object]]]:
+    """Potes (valor, elegíveis, fichas esperadas de cada um) e EV em fichas de cada jogador."""
+    labels = ["Hero"] + [
+        opponent_labels[idx] if idx < len(opponent_labels) else f"Oponente {idx + 1}"
+        for idx in range(len(side_pots.stacks) - 1)
+    ]
+    scale = SHARE_UNITS * total
+    pots = []
+    side_number = 0
+    for pot_idx, (pot_chips, (amount, eligible)) in enumerate(zip(side_pots.chips, side_pots.pots)):
+        if len(eligible) == 1:
+            name = "Excedente devolvido"
+        elif pot_idx == 0:
+            name = "Pote principal"
+        else:
+            side_number += 1
+            name = f"Pote lateral {side_number}"
+        pots.append(
+            {
+                "name": name,
+                "amount": amount,
+                "players": [
+                    {
+                        "player": labels[idx],
+                        "expected": pot_chips[idx] / scale,
+                        "share_pct": pot_chips[idx] / scale / amount * 100,
+                    }
+                    for idx in eligible
+                ],
+            }
+        )
+    players = []
+    for idx, stack in enumerate(side_pots.stacks):
+        expected = sum(pot_chips[idx] for pot_chips in side_pots.chips) / scale
+        players.append({"player": labels[idx], "stack": stack, "expected": expected, "ev": expected - stack})
+    return {"pots": pots, "players": players}
+
+
+MAX_ICM_PLAYERS = 16
+
+
+def parse_amounts(text: str) -> Tuple[float, ...]:
+    """Valores separados por vírgula ou espaço (prêmios do ICM, stacks fora da mão)."""
+    try:
+        amounts = tuple(float(token) for token in text.replace(",", " ").split())
+    except ValueError:
+        raise ValueError(f"Valores inválidos: '{text}'. Use números separados por vírgula.") from None
+    if any(amount < 0 for amount in amounts):
+        raise ValueError("Prêmios e stacks não podem ser negativos.")
+    return amounts
+
+
+def icm_equities(stacks: Sequence[float], payouts: Sequence[float]) -> Tuple[float, ...]:
+    """Equity em prêmios de cada stack pelo modelo de Malmuth–Harville.
+
+    Stacks zerados ficam com 0 (já eliminados). O resultado é memorizado por
+    (stacks, prêmios): os desfechos de um all-in repetem os mesmos stacks finais.
+    """
+    return _icm_equities(tuple(float(stack) for stack in stacks), tuple(float(prize) for prize in payouts))
+
+
+@lru_cache(maxsize=4096)
+def _icm_equities(stacks: Tuple[float, ...], payouts: Tuple[float, ...]) -> Tuple[float, ...]:
+    """DP por subconjuntos: ``reach[mask]`` é a chance de os jogadores de ``mask`` ocuparem os primeiros lugares.
+
+    A recursão de Harville visita o mesmo subconjunto em todas as ordens (n!);
+    aqui cada um dos 2^n estados é visitado uma vez, O(2^n · n). Como um estado
+    só leva a estados com mais bits, a ordem numérica das máscaras já respeita
+    as dependências.
+    """
+    players = [idx for idx, stack in enumerate(stacks) if stack > 0]
+    if len(players) > MAX_ICM_PLAYERS:
+        raise ValueError(f"ICM suporta até {MAX_ICM_PLAYERS} jogadores com fichas.")
+    chips = [stacks[idx] for idx in players]
+    places = min(len(payouts), len(players))
+    equity = [0.0] * len(stacks)
+    size = 1 << len(players)
+    reach = [0.0] * size
+    used = [0.0] * size
+    reach[0] = 1.0
+    total = sum(chips)
+    for mask in range(size):
+        probability = reach[mask]
+        if not probability:
+            continue
+        place = bin(mask).count("1")
+        if place >= places:
+            continue
+        prize = payouts[place]
+        remaining = total - used[mask]
+        for bit, stack in enumerate(chips):
+            flag = 1 << bit
+            if mask & flag:
+                continue
+            finish = probability * stack / remaining
+            equity[players[bit]] += finish * prize
+            reach[mask | flag] += finish
+            used[mask | flag] = used[mask] + stack
+    return tuple(equity)
+
+
+def _icm_after_hand(before: Tuple[float, ...], after: Tuple[float, ...], payouts: Tuple[float, ...]) -> List[float]:
+    """ICM dos stacks finais; quem foi eliminado na mão fica com os próximos lugares.
+
+    Entre eliminados na mesma mão, o stack inicial maior termina à frente; stacks
+    iniciais iguais dividem os prêmios dos lugares que disputam.
+    """
+    equity = list(icm_equities(after, payouts))
+    place = sum(1 for stack in after if stack > 0)
+    busted = sorted((idx for idx, stack in enumerate(after) if stack <= 0 < before[idx]), key=lambda idx: -before[idx])
+    start = 0
+    while start < len(busted):
+        end = start
+        while end < len(busted) and before[busted[end]] == before[busted[start]]:
+            end += 1
+        prizes = [payouts[spot] if spot < len(payouts) else 0.0 for spot in range(place + start, place + end)]
+        for idx in busted[start:end]:
+            equity[idx] = sum(prizes) / len(prizes)
+        start = end
+    return equity
+
+
+def build_icm_summary(
+    side_pots: SidePotAccumulator,
+    opponent_labels: Sequence[str],
+    other_stacks: Sequence[float],
+    payouts: Sequence[float],
+) -> Optional[List[Dict[str, object]]]:
+    """$EV (ICM) de cada jogador: prêmios antes da mão e a média sobre os desfechos do all-in.
+
+    Os stacks do all-in são os stacks inteiros dos jogadores da mão; ``other_stacks``
+    são os demais jogadores do torneio, que não mudam de fichas mas mudam de $EV.
+    """
+    scenarios = sum(side_pots.outcomes.values())
+    if not scenarios or not payouts:
+        return None
+    others = tuple(float(stack) for stack in other_stacks if stack > 0)
+    before = tuple(float(stack) for stack in side_pots.stacks) + others
+    prizes = tuple(float(prize) for prize in payouts)
+    current = icm_equities(before, prizes)
+    expected = [0.0] * len(before)
+    for outcome, count in side_pots.outcomes.items():
+        after = side_pots.final_stacks(outcome) + others
+        for idx, value in enumerate(_icm_after_hand(before, after, prizes)):
+            expected[idx] += value * count
+    labels = ["Hero"] + [
+        opponent_labels[idx] if idx < len(opponent_labels) else f"Oponente {idx + 1}"
+        for idx in range(len(side_pots.stacks) - 1)
+    ]
+    labels += [f"Fora da mão {idx + 1}" for idx in range(len(others))]
+    return [
+        {
+            "player": labels[idx],
+            "stack": before[idx],
+            "in_hand": idx < len(side_pots.stacks),
+            "before": current[idx],
+            "ev": expected[idx] / scenarios,
+            "delta": expected[idx] / scenarios - current[idx],
+        }
+        for idx in range(len(before))
+    ]
+
+
+def _most_common_index(counts: Sequence[int]) -> Optional[int]:
+    best_idx: Optional[int] = None
+    best_count = 0
+    for idx, count in enumerate(counts):
+        if count > best_count:
+            best_idx, best_count = idx, count
+    return best_idx
 
 
 def _build_result_dict(
     wins: int,
     ties: int,
     losses: int,
-    category_counter: Counter,
-    loss_category_counter: Counter,
-    losing_examples_data: Dict[int, Counter],
+    breakdown: BreakdownAccumulator,
+    opponent_labels: Sequence[str],
 ) -> Dict[str, object]:
     """Normaliza contadores em um dicionário de resultado padrão."""
     total = wins + ties + losses
@@ -789,31 +2047,42 @@ def _build_result_dict(
     win_pct = wins / total * 100
     tie_pct = ties / total * 100
     loss_pct = max(0.0, 100.0 - (win_pct + tie_pct))
-    most_common_category = category_counter.most_common(1)
+    most_common_category = _most_common_index(breakdown.hero_category)
+    most_common_win_category = _most_common_index(breakdown.hero_win_category)
     sorted_loss_categories = [
-        CATEGORY_NAMES.get(category_value)
-        for category_value, _ in sorted(loss_category_counter.items(), key=lambda item: item[0], reverse=True)
-        if CATEGORY_NAMES.get(category_value)
+        CATEGORY_NAMES[category_value]
+        for category_value in range(NUM_CATEGORIES - 1, -1, -1)
+        if breakdown.loss_category[category_value]
     ]
     losing_category_examples = []
-    for category_value, hands_counter in sorted(
-        losing_examples_data.items(), key=lambda item: item[0], reverse=True
-    ):
-        name = CATEGORY_NAMES.get(category_value)
-        if not name:
+    for category_value in range(NUM_CATEGORIES - 1, -1, -1):
+        hands_counter = breakdown.losing_examples[category_value]
+        if not hands_counter:
             continue
+        top_hands = sorted(hands_counter.items(), key=lambda item: item[1], reverse=True)[:3]
         losing_category_examples.append(
-            {"name": name, "hands": [hand for hand, _ in hands_counter.most_common(3)]}
+            {
+                "name": CATEGORY_NAMES[category_value],
+                "hands": [format_hand(unpack_hand(hand_key)) for hand_key, _ in top_hands],
+            }
         )
     return {
         "win_pct": win_pct,
         "tie_pct": tie_pct,
         "loss_pct": loss_pct,
-        "most_likely_category": CATEGORY_NAMES.get(most_common_category[0][0]) if most_common_category else None,
+        "most_likely_category": category_label(most_common_category) if most_common_category is not None else None,
         "losing_categories": sorted_loss_categories,
         "losing_examples": losing_category_examples,
         "total_scenarios": total,
         "counts": {"win": wins, "tie": ties, "loss": losses},
+        "hero_most_common_category": (
+            category_label(most_common_category) if most_common_category is not None else None
+        ),
+        "hero_most_common_category_wins": (
+            category_label(most_common_win_category) if most_common_win_category is not None else None
+        ),
+        "loss_breakdown": build_loss_breakdown(breakdown, opponent_labels),
+        "tie_breakdown": build_tie_breakdown(breakdown),
     }
 
 
@@ -840,18 +2109,50 @@ def build_fast_mode_result(wins: int, ties: int, losses: int) -> Dict[str, objec
     }
 
 
-def _compute_confidence_intervals(wins: int, ties: int, losses: int, total: int) -> Dict[str, Dict[str, float]]:
-    """Retorna IC95% (em %) para Win/Tie/Loss."""
+def _compute_confidence_intervals(
+    wins: int,
+    ties: int,
+    losses: int,
+    total: int,
+    population: Optional[int] = None,
+    standard_errors: Optional[Dict[str, float]] = None,
+) -> Dict[str, Dict[str, float]]:
+    """Retorna IC95% (em %) para Win/Tie/Loss.
+
+    Contagens binomiais usam o intervalo de Wilson, que continua útil para
+    proporções pequenas (empates bem abaixo de 1%) onde a aproximação normal
+    colapsa em [0, p + margem]. Com ``population`` (amostragem sem reposição de um
+    espaço finito) aplica a correção de população finita; o intervalo colapsa
+    quando a amostra cobre tudo. ``standard_errors`` substitui o erro padrão
+    binomial (ex.: estimador estratificado ou por importância) com intervalo normal.
+    """
     if total <= 0:
         return {}
+    fpc = 1.0
+    if population and population > 1:
+        fpc = max(0.0, (population - total) / (population - 1))
+    z = 1.96
+    # Proporções vêm dos próprios contadores (que podem ser somas de pesos); ``total`` é o n amostral.
+    counted = wins + ties + losses or total
     intervals: Dict[str, Dict[str, float]] = {}
     for label, count in (("win", wins), ("tie", ties), ("loss", losses)):
-        p = count / total
-        se = math.sqrt(p * (1 - p) / total)
-        margin = 1.96 * se
-        low = max(0.0, p - margin) * 100
-        high = min(1.0, p + margin) * 100
-        intervals[label] = {"low": low, "high": high, "se": se}
+        p = count / counted
+        if standard_errors and label in standard_errors:
+            se = standard_errors[label]
+            low = max(0.0, p - z * se)
+            high = min(1.0, p + z * se)
+        else:
+            se = math.sqrt(p * (1 - p) / total * fpc)
+            if fpc <= 0.0:
+                low = high = p
+            else:
+                # Wilson com o tamanho efetivo da amostra (n / fpc).
+                n_eff = total / fpc
+                center = (p + z * z / (2 * n_eff)) / (1 + z * z / n_eff)
+                margin = z / (1 + z * z / n_eff) * math.sqrt(p * (1 - p) / n_eff + z * z / (4 * n_eff * n_eff))
+                low = max(0.0, center - margin)
+                high = min(1.0, center + margin)
+        intervals[label] = {"low": low * 100, "high": high * 100, "se": se}
     return intervals
 
 
@@ -862,11 +2163,13 @@ def compute_ci95(
     ties: int,
     losses: int,
     n_samples: int,
+    population: Optional[int] = None,
+    standard_errors: Optional[Dict[str, float]] = None,
 ) -> Optional[Dict[str, Dict[str, float]]]:
     """Calcula IC95% apenas quando o método é Monte Carlo."""
     if method != "monte_carlo" or n_samples <= 0:
         return None
-    return _compute_confidence_intervals(wins, ties, losses, n_samples)
+    return _compute_confidence_intervals(wins, ties, losses, n_samples, population, standard_errors)
 
 
 # UI: EXACT vs MC
@@ -894,7 +2197,9 @@ def build_display_result(
             elapsed_s = float(meta.get("elapsed", 0.0))
             it_per_s = (n_samples / elapsed_s) if elapsed_s and elapsed_s > 0 else None
 
-    ci = compute_ci95(method, wins, ties, losses, n_samples)
+    population = int(meta["scenario_space"]) if meta and meta.get("scenario_space") else None
+    standard_errors = meta.get("standard_errors") if meta else None
+    ci = compute_ci95(method, wins, ties, losses, n_samples, population, standard_errors)
 
     return {
         "method": method,
@@ -905,6 +2210,8 @@ def build_display_result(
         "tie_count": ties,
         "lose_count": losses,
         "n_samples": n_samples,
+        # Amostragem por importância: contadores são somas de pesos; a precisão vale o tamanho efetivo.
+        "effective_samples": float(meta["effective_samples"]) if meta and meta.get("weighted_counts") else None,
         "elapsed_s": elapsed_s,
         "it_per_s": it_per_s,
         "ci95_win": None if not ci else {"low": ci["win"]["low"], "high": ci["win"]["high"]},
@@ -914,75 +2221,751 @@ def build_display_result(
 
 
 def build_loss_breakdown(
-    loss_category_counter: Counter,
-    loss_winner_counter: Counter,
+    breakdown: BreakdownAccumulator,
+    opponent_labels: Sequence[str],
 ) -> Dict[str, List[Dict[str, object]]]:
     categories = [
         {"category": category_label(category_value), "count": count}
-        for category_value, count in loss_category_counter.most_common()
-    ]
-    winners = [
-        {"category": category_label(category_value), "opponent": opponent_label, "count": count}
-        for (category_value, opponent_label), count in loss_winner_counter.most_common()
+        for category_value, count in sorted(
+            enumerate(breakdown.loss_category), key=lambda item: item[1], reverse=True
+        )
+        if count
     ]
+    winners = []
+    stride = breakdown.num_opponents
+    for slot, count in sorted(enumerate(breakdown.loss_winner), key=lambda item: item[1], reverse=True):
+        if not count:
+            break
+        category_value, opponent_idx = divmod(slot, stride)
+        opponent_label = (
+            opponent_labels[opponent_idx] if opponent_idx < len(opponent_labels) else "Oponente desconhecido"
+        )
+        winners.append({"category": category_label(category_value), "opponent": opponent_label, "count": count})
     return {"categories": categories, "winners": winners}
 
 
-def build_tie_breakdown(
-    tie_category_counter: Counter,
-    tie_size_counter: Counter,
-    board_only_ties: int,
-) -> Dict[str, object]:
+def build_tie_breakdown(breakdown: BreakdownAccumulator) -> Dict[str, object]:
     categories = [
         {"category": category_label(category_value), "count": count}
-        for category_value, count in tie_category_counter.most_common()
+        for category_value, count in sorted(
+            enumerate(breakdown.tie_category), key=lambda item: item[1], reverse=True
+        )
+        if count
     ]
-    sizes = [{"players": size, "count": count} for size, count in tie_size_counter.most_common()]
-    return {"categories": categories, "players": sizes, "board_only_ties": board_only_ties}
+    sizes = [
+        {"players": size, "count": count}
+        for size, count in sorted(enumerate(breakdown.tie_size), key=lambda item: item[1], reverse=True)
+        if count
+    ]
+    return {"categories": categories, "players": sizes, "board_only_ties": breakdown.board_only_ties}
 
 
-def render_slot_group(title: str, cards: Sequence[Card], max_cards: int, slot_type: str) -> None:
-    """Exibe visualmente um grupo de slots (Hero ou Board)."""
-    cols = st.columns(max_cards)
-    for idx in range(max_cards):
-        filled = idx < len(cards)
-        label = get_board_slot_label(idx) if slot_type == "board" else f"{title} {idx + 1}"
-        value = format_card(cards[idx]) if filled else "Selecione"
-        classes = ["slot-card", slot_type]
-        if filled:
-            classes.append("filled")
-        html = (
-            f"<div class='{' '.join(classes)}'>"
-            f"<div class='slot-label'>{label}</div>"
-            f"<div class='slot-value'>{value}</div>"
-            "</div>"
-        )
-        cols[idx].markdown(html, unsafe_allow_html=True)
+def _approx_size(obj: object) -> int:
+    """Estimativa recursiva (bytes) de listas/dicts/tuplas e objetos com __slots__."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_approx_size(key) + _approx_size(value) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_approx_size(item) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(_approx_size(getattr(obj, name, None)) for name in obj.__slots__)
+    return size
 
 
-def normalize_known_opponents_entries(
-    known_entries: Optional[Sequence[Sequence[Card]]],
-) -> Tuple[List[List[Card]], List[str]]:
-    """Normaliza entradas dos oponentes conhecidos em (cartas, rótulos)."""
-    cards: List[List[Card]] = []
-    labels: List[str] = []
-    if not known_entries:
-        return cards, labels
-    for idx, entry in enumerate(known_entries):
-        opp_id = idx + 1
-        cards_seq = entry
-        if isinstance(entry, tuple) and len(entry) == 2 and isinstance(entry[0], int):
-            opp_id = entry[0]
-            cards_seq = entry[1]
-        cards_list = list(cards_seq)
-        cards.append(cards_list)
-        labels.append(f"Oponente {opp_id}")
-    return cards, labels
+class EquityResult:
+    """Resultado compacto guardado no cache e no session_state.
 
+    Mantém apenas contadores, o ``BreakdownAccumulator``, o
+    ``TableEquityAccumulator`` e os potes laterais; o dicionário exibido pela UI
+    é montado sob demanda em ``to_dict``.
+    """
 
-def render_opponent_sections(state: SelectionState, opponent_count: int) -> None:
-    """Renderiza slots dos oponentes conhecidos."""
-    if opponent_count <= 0:
+    __slots__ = (
+        "wins",
+        "ties",
+        "losses",
+        "breakdown",
+        "opponent_labels",
+        "sampled",
+        "mc_meta",
+        "table",
+        "side_pots",
+    )
+
+    def __init__(
+        self,
+        wins: int,
+        ties: int,
+        losses: int,
+        breakdown: Optional[BreakdownAccumulator] = None,
+        opponent_labels: Sequence[str] = (),
+        sampled: bool = False,
+        mc_meta: Optional[Dict[str, object]] = None,
+        table: Optional[TableEquityAccumulator] = None,
+        side_pots: Optional[SidePotAccumulator] = None,
+    ) -> None:
+        if wins + ties + losses <= 0:
+            raise ValueError("Nenhum cenário válido calculado.")
+        self.wins = wins
+        self.ties = ties
+        self.losses = losses
+        self.breakdown = breakdown
+        self.opponent_labels = tuple(opponent_labels)
+        self.sampled = sampled
+        self.mc_meta = mc_meta
+        self.table = table
+        self.side_pots = side_pots
+        if breakdown is not None:
+            breakdown.trim_examples()
+
+    @property
+    def total(self) -> int:
+        return self.wins + self.ties + self.losses
+
+    def to_dict(self) -> Dict[str, object]:
+        if self.breakdown is None:
+            result = build_fast_mode_result(self.wins, self.ties, self.losses)
+        else:
+            result = _build_result_dict(self.wins, self.ties, self.losses, self.breakdown, self.opponent_labels)
+        # Stats: CI only for MC
+        meta = self.mc_meta or {}
+        result["confidence"] = (
+            _compute_confidence_intervals(
+                self.wins,
+                self.ties,
+                self.losses,
+                self.total,
+                meta.get("scenario_space"),
+                meta.get("standard_errors"),
+            )
+            if self.sampled
+            else None
+        )
+        if self.mc_meta is not None:
+            result["mc_meta"] = self.mc_meta
+        result["table_equity"] = (
+            build_table_equity(self.table, self.opponent_labels, self.total) if self.table is not None else None
+        )
+        result["side_pots"] = (
+            build_side_pot_summary(self.side_pots, self.opponent_labels, self.total)
+            if self.side_pots is not None
+            else None
+        )
+        return result
+
+    def approx_bytes(self) -> int:
+        return _approx_size(self)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class BoundedResultCache:
+    """Cache LRU limitado por número de entradas e por bytes estimados."""
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self._entries: "OrderedDict[Tuple, Tuple[EquityResult, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple) -> Optional[EquityResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Tuple, value: EquityResult) -> None:
+        size = value.approx_bytes()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def metric_samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        stats = self.stats()
+        return [
+            ("poker_exact_cache_events_total", {"event": "hit"}, stats["hits"]),
+            ("poker_exact_cache_events_total", {"event": "miss"}, stats["misses"]),
+            ("poker_exact_cache_events_total", {"event": "eviction"}, stats["evictions"]),
+            ("poker_exact_cache_entries", {}, stats["entries"]),
+            ("poker_exact_cache_bytes", {}, stats["bytes"]),
+        ]
+
+
+@metered_cache(st.cache_resource(show_spinner=False), "get_exact_result_cache")
+def get_exact_result_cache() -> BoundedResultCache:
+    """Cache de resultados exatos compartilhado entre sessões (limites via variáveis de ambiente)."""
+    cache = BoundedResultCache(
+        max_entries=_env_int("POKER_EXACT_CACHE_MAX_ENTRIES", 256),
+        max_bytes=_env_int("POKER_EXACT_CACHE_MAX_BYTES", 32 * 1024 * 1024),
+    )
+    METRICS.add_collector(cache.metric_samples)
+    return cache
+
+
+def memory_usage_snapshot() -> Dict[str, int]:
+    """Bytes estimados do estado desta sessão e do cache de resultados exatos."""
+    session_bytes = 0
+    for key in ("last_result", "last_meta", "last_params", "opponent_curve", "hand_grid"):
+        if key in st.session_state:
+            session_bytes += _approx_size(st.session_state[key])
+    speculation = st.session_state.get("speculation")
+    if speculation is not None:
+        for future in speculation.futures.values():
+            if future.done() and not future.cancelled() and future.exception() is None:
+                session_bytes += _approx_size(future.result())
+    cache_stats = get_exact_result_cache().stats()
+    return {
+        "session_bytes": session_bytes,
+        "exact_cache_bytes": cache_stats["bytes"],
+        "exact_cache_entries": cache_stats["entries"],
+        "exact_cache_hits": cache_stats["hits"],
+        "exact_cache_misses": cache_stats["misses"],
+        "exact_cache_evictions": cache_stats["evictions"],
+    }
+
+
+def executor_load(pool: Optional[Executor]) -> Optional[Dict[str, int]]:
+    """Workers e tarefas pendentes de um pool (None sem pool).
+
+    Nos pools instrumentados e em processos, pendentes = em execução + na fila;
+    em threads e sub-interpretadores sem instrumentação só a fila é visível.
+    """
+    if pool is None:
+        return None
+    workers = int(getattr(pool, "_max_workers", 0) or 0)
+    pending_items = getattr(pool, "_pending_work_items", None)
+    if isinstance(pool, InstrumentedExecutor):
+        pending = pool.pending
+    elif pending_items is not None:
+        pending = len(pending_items)
+    else:
+        work_queue = getattr(pool, "_work_queue", None)
+        pending = work_queue.qsize() if work_queue is not None else 0
+    return {"workers": workers, "pending": pending}
+
+
+def encode_params_signature(params_signature: Dict[str, object]) -> Dict[str, object]:
+    """``params_signature`` em JSON: cartas como texto (``"AsKd"``), tuplas como listas."""
+
+    def cards_text(cards: Sequence[Card]) -> str:
+        return "".join(TreysCard.int_to_str(card) for card in cards)
+
+    encoded = dict(params_signature)
+    encoded["hero"] = cards_text(params_signature.get("hero") or ())  # type: ignore[arg-type]
+    encoded["board"] = cards_text(params_signature.get("board") or ())  # type: ignore[arg-type]
+    encoded["known"] = [
+        [opp_id, cards_text(cards)] for opp_id, cards in params_signature.get("known") or ()  # type: ignore[union-attr]
+    ]
+    stacks = params_signature.get("stacks")
+    encoded["stacks"] = list(stacks) if stacks else None  # type: ignore[arg-type]
+    return encoded
+
+
+def decode_params_signature(encoded: Dict[str, object]) -> Dict[str, object]:
+    """Inverso de ``encode_params_signature``."""
+
+    def parse_cards(text: str) -> Tuple[Card, ...]:
+        return tuple(parse_card(text[idx : idx + 2]) for idx in range(0, len(text), 2))
+
+    params = dict(encoded)
+    params["hero"] = parse_cards(str(encoded.get("hero", "")))
+    params["board"] = parse_cards(str(encoded.get("board", "")))
+    params["known"] = tuple(
+        (int(opp_id), parse_cards(cards)) for opp_id, cards in encoded.get("known") or ()  # type: ignore[union-attr]
+    )
+    stacks = encoded.get("stacks")
+    params["stacks"] = tuple(stacks) if stacks else None  # type: ignore[arg-type]
+    return params
+
+
+class WorkloadRecorder:
+    """Grava cada cálculo da UI numa linha JSON compacta (opt-in via ``POKER_WORKLOAD_LOG``).
+
+    Cada linha traz o instante, a origem (``ui``, ``curve`` ou ``speculative``), o
+    ``params_signature``, o método executado, as iterações entregues e a latência;
+    ``replay_workload.py`` reproduz esse mix como teste de carga.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self.records = 0
+
+    def record(
+        self,
+        params_signature: Dict[str, object],
+        method: str,
+        result: Optional[EquityResult],
+        meta: Optional[Dict[str, object]],
+        latency: float,
+        source: str = "ui",
+    ) -> None:
+        iterations = (meta or {}).get("iterations") or (result.total if result is not None else 0)
+        entry = {
+            "t": round(time.time(), 3),
+            "src": source,
+            "p": encode_params_signature(params_signature),
+            "m": method,
+            "it": int(iterations),  # type: ignore[arg-type]
+            "ms": round(latency * 1000, 2),
+        }
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as handle:
+                    handle.write(line + "\n")
+                self.records += 1
+            except OSError:
+                # O log é opcional: falha de disco não derruba o cálculo.
+                pass
+
+
+@metered_cache(st.cache_resource(show_spinner=False), "get_workload_recorder")
+def get_workload_recorder() -> Optional[WorkloadRecorder]:
+    path = os.environ.get("POKER_WORKLOAD_LOG", "").strip()
+    return WorkloadRecorder(path) if path else None
+
+
+# Base de equities de flop pré-calculada (gerada offline por build_flop_db.py).
+FLOP_DB_MAGIC = b"PKFLOPDB"
+FLOP_DB_VERSION = 3
+# magic, versão, classes de flop, combos do Hero por flop, máx. oponentes, reservado, amostras por runout
+# e, para 1 a 3 oponentes, o maior erro padrão (proporção) entre os registros gravados.
+FLOP_DB_HEADER = struct.Struct("<8sHHHBBI3f")
+# Por classe de flop: índices das 3 cartas no baralho + bits dos números de oponentes já gravados.
+FLOP_DB_INDEX_ENTRY = struct.Struct("<BBBB")
+# Por combo do Hero: (vitórias, empates, soma das frações do pote nos empates em unidades de SHARE_UNITS).
+FLOP_DB_RECORD = struct.Struct("<III")
+FLOP_DB_MAX_OPPONENTS = 3
+FLOP_DB_HERO_COMBOS = math.comb(49, 2)
+# Runouts (turn, river) de um flop: cada combo do Hero vê todos os que não usam suas cartas.
+FLOP_DB_RUNOUTS = math.comb(47, 2)
+FLOP_DB_PATH = os.environ.get(
+    "POKER_FLOP_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "flop_equity.db")
+)
+
+
+@lru_cache(maxsize=None)
+def _deck_positions() -> Dict[Card, int]:
+    return {card: idx for idx, card in enumerate(build_deck())}
+
+
+@lru_cache(maxsize=None)
+def _all_suit_symmetries() -> Tuple[Dict[Card, Card], ...]:
+    return tuple(suit_symmetries([]))
+
+
+@lru_cache(maxsize=None)
+def canonical_flops() -> Tuple[Tuple[int, int, int], ...]:
+    """As 1.755 classes de flop por isomorfismo de naipes (índices do baralho, menor forma)."""
+    deck = build_deck()
+    position = _deck_positions()
+    classes = set()
+    for flop in combos(range(len(deck)), 3):
+        classes.add(
+            min(tuple(sorted(position[card_map[deck[idx]]] for idx in flop)) for card_map in _all_suit_symmetries())
+        )
+    return tuple(sorted(classes))
+
+
+@lru_cache(maxsize=None)
+def _canonical_flop_index() -> Dict[Tuple[int, int, int], int]:
+    return {flop: idx for idx, flop in enumerate(canonical_flops())}
+
+
+def canonicalize_flop(flop_cards: Sequence[Card]) -> Tuple[int, Dict[Card, Card]]:
+    """Retorna (classe do flop, permutação de naipes que leva o flop à forma canônica)."""
+    position = _deck_positions()
+    best: Optional[Tuple[Tuple[int, ...], Dict[Card, Card]]] = None
+    for card_map in _all_suit_symmetries():
+        image = tuple(sorted(position[card_map[card]] for card in flop_cards))
+        if best is None or image < best[0]:
+            best = (image, card_map)
+    return _canonical_flop_index()[best[0]], best[1]
+
+
+def flop_hero_combo_index(flop_positions: Sequence[int], hero_positions: Sequence[int]) -> int:
+    """Índice colex da mão do Hero entre as 49 cartas fora do flop."""
+    low, high = sorted(
+        position - sum(1 for flop_position in flop_positions if flop_position < position)
+        for position in hero_positions
+    )
+    return high * (high - 1) // 2 + low
+
+
+def flop_db_totals(num_opponents: int, samples_per_runout: int) -> int:
+    """Cenários por registro: enumeração completa (1 oponente) ou amostras estratificadas."""
+    if num_opponents == 1:
+        return FLOP_DB_RUNOUTS * math.comb(45, 2)
+    return FLOP_DB_RUNOUTS * samples_per_runout
+
+
+class FlopEquityDB:
+    """Leitura O(1) da base de flops via mmap, sem carregar o arquivo na memória."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, flops, hero_combos, max_opponents, _, samples, *errors = FLOP_DB_HEADER.unpack_from(
+            self._mmap, 0
+        )
+        if (magic, version, flops, hero_combos) != (
+            FLOP_DB_MAGIC,
+            FLOP_DB_VERSION,
+            len(canonical_flops()),
+            FLOP_DB_HERO_COMBOS,
+        ):
+            self._mmap.close()
+            raise ValueError(f"Arquivo {path} não é uma base de flops compatível.")
+        self.max_opponents = max_opponents
+        self.samples_per_runout = samples
+        self.max_standard_errors = tuple(errors)
+        self._index_start = FLOP_DB_HEADER.size
+        self._data_start = self._index_start + flops * FLOP_DB_INDEX_ENTRY.size
+
+    def has(self, flop_class: int, num_opponents: int) -> bool:
+        if not 1 <= num_opponents <= self.max_opponents:
+            return False
+        entry = FLOP_DB_INDEX_ENTRY.unpack_from(self._mmap, self._index_start + flop_class * FLOP_DB_INDEX_ENTRY.size)
+        return bool(entry[3] & (1 << (num_opponents - 1)))
+
+    def lookup(
+        self, hero_cards: Sequence[Card], flop_cards: Sequence[Card], num_opponents: int
+    ) -> Optional[Tuple[int, int, int, int]]:
+        """(vitórias, empates, frações do pote nos empates, total) do Hero contra oponentes aleatórios.
+
+        None se o flop não está na base. As frações vêm em unidades de SHARE_UNITS.
+        """
+        flop_class, card_map = canonicalize_flop(flop_cards)
+        if not self.has(flop_class, num_opponents):
+            return None
+        position = _deck_positions()
+        combo = flop_hero_combo_index(
+            canonical_flops()[flop_class], [position[card_map[card]] for card in hero_cards]
+        )
+        record = (flop_class * self.max_opponents + num_opponents - 1) * FLOP_DB_HERO_COMBOS + combo
+        wins, ties, tie_shares = FLOP_DB_RECORD.unpack_from(
+            self._mmap, self._data_start + record * FLOP_DB_RECORD.size
+        )
+        return wins, ties, tie_shares, flop_db_totals(num_opponents, self.samples_per_runout)
+
+    def standard_errors(self, wins: int, ties: int, total: int, num_opponents: int) -> Dict[str, float]:
+        """Erro padrão de cada proporção de um registro amostrado (2+ oponentes).
+
+        O estratificado por runout nunca passa do binomial do próprio registro nem
+        do maior erro medido na geração (cabeçalho); vale o menor dos dois.
+        """
+        stored = self.max_standard_errors[num_opponents - 1]
+        errors = {}
+        for label, count in (("win", wins), ("tie", ties), ("loss", total - wins - ties)):
+            p = count / total
+            binomial = math.sqrt(p * (1 - p) / total)
+            errors[label] = min(binomial, stored) if stored > 0 else binomial
+        return errors
+
+    def beats_live(self, num_opponents: int, live_samples: float) -> bool:
+        """A base vence o cálculo ao vivo se tem ao menos as amostras por runout que ele teria."""
+        return num_opponents == 1 or self.samples_per_runout * FLOP_DB_RUNOUTS >= live_samples
+
+
+@metered_cache(st.cache_resource(show_spinner=False), "get_flop_equity_db")
+def get_flop_equity_db() -> Optional[FlopEquityDB]:
+    """Abre a base de flops (POKER_FLOP_DB) se existir; ausente ou inválida = None."""
+    if not os.path.exists(FLOP_DB_PATH):
+        return None
+    try:
+        return FlopEquityDB(FLOP_DB_PATH)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def lookup_flop_equity(
+    hero_cards: Sequence[Card], board_cards: Sequence[Card], num_opponents: int
+) -> Optional[Tuple[EquityResult, Dict[str, object]]]:
+    """Resultado da base de flops para Hero vs oponentes aleatórios (None se indisponível)."""
+    if len(board_cards) != 3 or len(hero_cards) != 2:
+        return None
+    database = get_flop_equity_db()
+    if database is None:
+        return None
+    start = time.perf_counter()
+    found = database.lookup(hero_cards, board_cards, num_opponents)
+    if found is None:
+        return None
+    wins, ties, _, total = found
+    exact = num_opponents == 1
+    meta = {
+        "elapsed": time.perf_counter() - start,
+        "iterations": total,
+        "source": "flop_db",
+        "exact": exact,
+    }
+    if not exact:
+        meta["standard_errors"] = database.standard_errors(wins, ties, total, num_opponents)
+        meta["samples_per_runout"] = database.samples_per_runout
+    labels = [f"Oponente {idx + 1}" for idx in range(num_opponents)]
+    result = EquityResult(
+        wins,
+        ties,
+        total - wins - ties,
+        BreakdownAccumulator(num_opponents),
+        labels,
+        sampled=not exact,
+        mc_meta=None if exact else meta,
+        table=TableEquityAccumulator.heads_up(wins, ties, total - wins - ties) if exact else None,
+    )
+    return result, meta
+
+
+# Matriz de confrontos heads-up pré-flop (gerada offline por build_preflop_matrix.py).
+PREFLOP_MATRIX_MAGIC = b"PKPREMAT"
+PREFLOP_MATRIX_VERSION = 1
+# magic, versão, confrontos canônicos, boards por confronto.
+PREFLOP_MATRIX_HEADER = struct.Struct("<8sHII")
+PREFLOP_HAND_COUNT = math.comb(52, 2)
+PREFLOP_MATRIX_PATH = os.environ.get(
+    "POKER_PREFLOP_MATRIX", os.path.join(os.path.dirname(os.path.abspath(__file__)), "preflop_matrix.bin")
+)
+
+
+@lru_cache(maxsize=None)
+def preflop_hands() -> Tuple[Tuple[int, int], ...]:
+    """As 1.326 mãos iniciais como pares de índices do baralho (i < j)."""
+    return tuple(combos(range(52), 2))
+
+
+@lru_cache(maxsize=None)
+def _preflop_hand_index() -> Dict[Tuple[int, int], int]:
+    return {hand: idx for idx, hand in enumerate(preflop_hands())}
+
+
+@lru_cache(maxsize=None)
+def preflop_hand_permutations() -> Tuple[Tuple[int, ...], ...]:
+    """Para cada permutação de naipes, o índice da imagem de cada uma das 1.326 mãos."""
+    deck = build_deck()
+    position = _deck_positions()
+    hand_index = _preflop_hand_index()
+    permutations_by_suit = []
+    for card_map in _all_suit_symmetries():
+        image = [position[card_map[card]] for card in deck]
+        permutations_by_suit.append(
+            tuple(hand_index[tuple(sorted((image[a], image[b])))] for a, b in preflop_hands())
+        )
+    return tuple(permutations_by_suit)
+
+
+def canonical_matchup_key(hero_index: int, villain_index: int) -> int:
+    """Menor chave ``hero * 1326 + vilão`` entre as permutações de naipes do confronto."""
+    return min(
+        permutation[hero_index] * PREFLOP_HAND_COUNT + permutation[villain_index]
+        for permutation in preflop_hand_permutations()
+    )
+
+
+def preflop_class_index(first_position: int, second_position: int) -> int:
+    """Célula da grade 13x13: pares na diagonal, suited em [alta][baixa], offsuit em [baixa][alta]."""
+    high, low = sorted((first_position // 4, second_position // 4), reverse=True)
+    if first_position % 4 == second_position % 4:
+        return high * 13 + low
+    return low * 13 + high
+
+
+def _read_uint32_array(payload: bytes, offset: int, count: int) -> Tuple[array, int]:
+    values = array("I")
+    values.frombytes(payload[offset : offset + 4 * count])
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values, offset + 4 * count
+
+
+class PreflopMatrix:
+    """Confrontos heads-up pré-flop exatos (forma canônica por naipes) e médias 169x169."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as handle:
+            payload = handle.read()
+        magic, version, matchups, boards = PREFLOP_MATRIX_HEADER.unpack_from(payload, 0)
+        if (magic, version) != (PREFLOP_MATRIX_MAGIC, PREFLOP_MATRIX_VERSION):
+            raise ValueError(f"Arquivo {path} não é uma matriz pré-flop compatível.")
+        offset = PREFLOP_MATRIX_HEADER.size
+        self.boards = boards
+        self.keys, offset = _read_uint32_array(payload, offset, matchups)
+        self.wins, offset = _read_uint32_array(payload, offset, matchups)
+        self.ties, offset = _read_uint32_array(payload, offset, matchups)
+        # Médias por classe (169x169): % de vitória e de empate, float32.
+        self.class_win = array("f")
+        self.class_win.frombytes(payload[offset : offset + 4 * 169 * 169])
+        offset += 4 * 169 * 169
+        self.class_tie = array("f")
+        self.class_tie.frombytes(payload[offset : offset + 4 * 169 * 169])
+        if sys.byteorder != "little":
+            self.class_win.byteswap()
+            self.class_tie.byteswap()
+        self._random_opponent: Dict[int, Optional[Tuple[int, int, int]]] = {}
+
+    def lookup(self, hero_cards: Sequence[Card], villain_cards: Sequence[Card]) -> Optional[Tuple[int, int, int]]:
+        """(vitórias, empates, boards) do Hero contra a mão conhecida; None se houver carta repetida."""
+        if len(set(hero_cards) | set(villain_cards)) != 4:
+            return None
+        position = _deck_positions()
+        hand_index = _preflop_hand_index()
+        hero_index = hand_index[tuple(sorted(position[card] for card in hero_cards))]
+        villain_index = hand_index[tuple(sorted(position[card] for card in villain_cards))]
+        key = canonical_matchup_key(hero_index, villain_index)
+        slot = bisect_left(self.keys, key)
+        if slot == len(self.keys) or self.keys[slot] != key:
+            return None
+        return self.wins[slot], self.ties[slot], self.boards
+
+    def lookup_random(self, hero_cards: Sequence[Card]) -> Optional[Tuple[int, int, int]]:
+        """(vitórias, empates, cenários) exatos do Hero contra uma mão aleatória.
+
+        Soma os confrontos com as 1.225 mãos que não usam cartas do Hero: todas
+        têm os mesmos boards, então a soma é a enumeração completa. Cacheado por mão.
+        """
+        position = _deck_positions()
+        hero_index = _preflop_hand_index()[tuple(sorted(position[card] for card in hero_cards))]
+        if hero_index not in self._random_opponent:
+            deck = build_deck()
+            wins = ties = total = 0
+            found: Optional[Tuple[int, int, int]] = None
+            for a, b in preflop_hands():
+                villain = (deck[a], deck[b])
+                if villain[0] in hero_cards or villain[1] in hero_cards:
+                    continue
+                matchup = self.lookup(hero_cards, villain)
+                if matchup is None:
+                    break
+                wins += matchup[0]
+                ties += matchup[1]
+                total += matchup[2]
+            else:
+                found = (wins, ties, total)
+            self._random_opponent[hero_index] = found
+        return self._random_opponent[hero_index]
+
+    def class_equity(self, hero_class: int, villain_class: int) -> Tuple[float, float]:
+        """(% vitória, % empate) médios entre duas classes da grade 13x13."""
+        cell = hero_class * 169 + villain_class
+        return self.class_win[cell], self.class_tie[cell]
+
+
+@metered_cache(st.cache_resource(show_spinner=False), "get_preflop_matrix")
+def get_preflop_matrix() -> Optional[PreflopMatrix]:
+    """Carrega a matriz pré-flop (POKER_PREFLOP_MATRIX) se existir; ausente ou inválida = None."""
+    if not os.path.exists(PREFLOP_MATRIX_PATH):
+        return None
+    try:
+        return PreflopMatrix(PREFLOP_MATRIX_PATH)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def lookup_preflop_matchup(
+    hero_cards: Sequence[Card], known_opponents: Optional[Sequence[Sequence[Card]]], num_opponents: int = 1
+) -> Optional[Tuple[EquityResult, Dict[str, object]]]:
+    """Resultado exato da matriz para Hero vs uma mão no pré-flop heads-up (None se indisponível).
+
+    A mão do oponente é a conhecida ou, sem conhecidas, qualquer uma (soma da matriz).
+    """
+    known_cards, known_labels = normalize_known_opponents_entries(known_opponents)
+    if num_opponents != 1 or len(known_cards) > 1 or len(hero_cards) != 2:
+        return None
+    if known_cards and len(known_cards[0]) != 2:
+        return None
+    matrix = get_preflop_matrix()
+    if matrix is None:
+        return None
+    start = time.perf_counter()
+    found = matrix.lookup(hero_cards, known_cards[0]) if known_cards else matrix.lookup_random(hero_cards)
+    if found is None:
+        return None
+    wins, ties, total = found
+    meta = {"elapsed": time.perf_counter() - start, "iterations": total, "source": "preflop_matrix", "exact": True}
+    losses = total - wins - ties
+    labels = known_labels or ["Oponente 1"]
+    table = TableEquityAccumulator.heads_up(wins, ties, losses, known_count=len(known_cards))
+    result = EquityResult(wins, ties, losses, BreakdownAccumulator(1), labels, table=table)
+    return result, meta
+
+
+def render_slot_group(title: str, cards: Sequence[Card], max_cards: int, slot_type: str) -> None:
+    """Exibe visualmente um grupo de slots (Hero ou Board)."""
+    cols = st.columns(max_cards)
+    for idx in range(max_cards):
+        filled = idx < len(cards)
+        label = get_board_slot_label(idx) if slot_type == "board" else f"{title} {idx + 1}"
+        value = format_card(cards[idx]) if filled else "Selecione"
+        classes = ["slot-card", slot_type]
+        if filled:
+            classes.append("filled")
+        html = (
+            f"<div class='{' '.join(classes)}'>"
+            f"<div class='slot-label'>{label}</div>"
+            f"<div class='slot-value'>{value}</div>"
+            "</div>"
+        )
+        cols[idx].markdown(html, unsafe_allow_html=True)
+
+
+def normalize_known_opponents_entries(
+    known_entries: Optional[Sequence[Sequence[Card]]],
+) -> Tuple[List[List[Card]], List[str]]:
+    """Normaliza entradas dos oponentes conhecidos em (cartas, rótulos)."""
+    cards: List[List[Card]] = []
+    labels: List[str] = []
+    if not known_entries:
+        return cards, labels
+    for idx, entry in enumerate(known_entries):
+        opp_id = idx + 1
+        cards_seq = entry
+        if isinstance(entry, tuple) and len(entry) == 2 and isinstance(entry[0], int):
+            opp_id = entry[0]
+            cards_seq = entry[1]
+        cards_list = list(cards_seq)
+        cards.append(cards_list)
+        labels.append(f"Oponente {opp_id}")
+    return cards, labels
+
+
+def render_opponent_sections(state: SelectionState, opponent_count: int) -> None:
+    """Renderiza slots dos oponentes conhecidos."""
+    if opponent_count <= 0:
         return
     st.markdown("**Oponentes conhecidos**")
     for start in range(1, opponent_count + 1, 2):
@@ -994,6 +2977,29 @@ def render_opponent_sections(state: SelectionState, opponent_count: int) -> None
                 render_slot_group(f"OPP {opp_id}", state.opponents.get(opp_id, []) or [], 2, "opponent")
 
 
+def render_hand_grid_html(cells: Sequence[Sequence[Optional[float]]]) -> str:
+    """Tabela HTML da grade 13x13, do vermelho (equity baixa) ao verde (alta)."""
+    rows = []
+    for row, values in enumerate(cells):
+        tds = []
+        for col, value in enumerate(values):
+            label = hand_grid_label(row, col)
+            if value is None:
+                tds.append(f"<td style='background:#333;color:#777'>{label}<br>—</td>")
+                continue
+            hue = int(max(0.0, min(100.0, value)) * 1.2)
+            tds.append(f"<td style='background:hsl({hue},65%,35%)'>{label}<br>{value:.0f}%</td>")
+        rows.append("<tr>" + "".join(tds) + "</tr>")
+    return (
+        "<table style='border-collapse:collapse;font-size:0.75rem;text-align:center;color:#fff'>"
+        + "".join(rows)
+        + "</table>"
+    )
+
+
+EquityMethod = Literal["PRECOMPUTED", "EXACT", "ANYTIME", "STRATIFIED", "MONTE_CARLO"]
+
+
 def choose_equity_method(board_cards: Sequence[Card]) -> Literal["EXACT", "MONTE_CARLO"]:
     """Define o método (EXACT ou MONTE_CARLO) com base nas cartas comunitárias conhecidas."""
     missing = 5 - len(board_cards)
@@ -1012,17 +3018,426 @@ def estimate_exact_scenarios(deck_size: int, missing_board: int, random_opponent
     remaining = deck_size - missing_board
     if cards_for_opponents > remaining:
         return 0
-    return math.comb(deck_size, missing_board) * math.comb(remaining, cards_for_opponents)
+    return (
+        math.comb(deck_size, missing_board)
+        * math.comb(remaining, cards_for_opponents)
+        * pairing_count(cards_for_opponents)
+    )
+
+
+def pairing_count(size: int) -> int:
+    """Número de formas de dividir ``size`` cartas em mãos de 2 ((size - 1)!!)."""
+    count = 1
+    for factor in range(size - 1, 0, -2):
+        count *= factor
+    return count
+
+
+@lru_cache(maxsize=None)
+def _perfect_matchings(size: int) -> Tuple[Tuple[Tuple[int, int], ...], ...]:
+    """Todas as divisões das posições 0..size-1 em pares (i < j), sem ordem entre os pares."""
+    if size == 0:
+        return ((),)
+    matchings = []
+    for partner in range(1, size):
+        rest = [pos for pos in range(1, size) if pos != partner]
+        for sub in _perfect_matchings(size - 2):
+            matchings.append(((0, partner),) + tuple((rest[a], rest[b]) for a, b in sub))
+    return tuple(matchings)
+
+
+def _unrank_matching(size: int, rank: int) -> Tuple[Tuple[int, int], ...]:
+    """Divisão em pares de número ``rank`` (0 <= rank < pairing_count(size)) sem tabela."""
+    positions = list(range(size))
+    pairs = []
+    while positions:
+        first = positions.pop(0)
+        rank, choice = divmod(rank, len(positions))
+        pairs.append((first, positions.pop(choice)))
+    return tuple(pairs)
+
+
+BINOMIAL_TABLE = [[math.comb(n, k) for k in range(53)] for n in range(53)]
+
+
+def _unrank_combination(n: int, k: int, rank: int) -> List[int]:
+    """Combinação de ``k`` índices de ``range(n)`` com número ``rank`` (ordem colexicográfica)."""
+    indices = [0] * k
+    candidate = n
+    for slot in range(k, 0, -1):
+        candidate -= 1
+        while BINOMIAL_TABLE[candidate][slot] > rank:
+            candidate -= 1
+        rank -= BINOMIAL_TABLE[candidate][slot]
+        indices[slot - 1] = candidate
+    return indices
+
+
+class ScenarioPermutation:
+    """Permutação pseudoaleatória de ``range(size)`` (rede de Feistel com cycle walking).
+
+    Permite que cada worker calcule a posição ``p`` da ordem aleatória sem
+    materializar a permutação inteira.
+    """
+
+    __slots__ = ("size", "half_bits", "half_mask", "keys")
+
+    def __init__(self, size: int, seed: int) -> None:
+        bits = max(2, (size - 1).bit_length())
+        bits += bits % 2
+        if bits > 128:
+            raise ValueError("Espaço de cenários grande demais para a enumeração progressiva.")
+        self.size = size
+        self.half_bits = bits // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        rng = random.Random(seed)
+        self.keys = tuple(rng.getrandbits(64) for _ in range(4))
+
+    def _round(self, value: int, key: int) -> int:
+        mixed = ((value ^ key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        mixed ^= mixed >> 32
+        mixed = (mixed * 0xD6E8FEB86659FD93) & 0xFFFFFFFFFFFFFFFF
+        return mixed >> (64 - self.half_bits)
+
+    def __getitem__(self, position: int) -> int:
+        value = position
+        while True:
+            left, right = value >> self.half_bits, value & self.half_mask
+            for key in self.keys:
+                left, right = right, left ^ self._round(right, key)
+            value = (left << self.half_bits) | right
+            if value < self.size:
+                return value
+
+
+MAX_EXACT_SCENARIOS = 2_000_000
+# Fração do espaço que o exato progressivo precisa cobrir no orçamento; abaixo disso
+# os runouts exatos do estratificado reduzem mais a variância.
+MIN_ANYTIME_COVERAGE = 0.25
+# Vazão dos motores por cenário relativa ao microbenchmark do avaliador (permutação, sorteios).
+ENGINE_EVALUATOR_EFFICIENCY = 0.4
+MIN_TIME_BUDGET = 0.01
+MAX_TIME_BUDGET = 10.0
+
+
+def clamp_time_budget(time_budget: float) -> float:
+    """Limita o orçamento (s) dos motores com tempo a ``[MIN_TIME_BUDGET, MAX_TIME_BUDGET]``.
+
+    O piso é baixo de propósito: a interface nunca pede menos de 0,5 s (slider),
+    e o serviço HTTP repassa só o que resta do prazo do cliente.
+    """
+    return max(MIN_TIME_BUDGET, min(time_budget, MAX_TIME_BUDGET))
+
+
+class EngineThroughput:
+    """Mãos avaliadas por segundo, por worker, nos motores por cenário deste processo.
+
+    Começa pela taxa do microbenchmark do avaliador e passa a seguir a média
+    móvel das execuções reais (``simulate_exact_anytime`` e
+    ``simulate_stratified_runouts`` chamam ``observe``).
+    """
+
+    __slots__ = ("hands_per_sec", "runs")
+
+    def __init__(self) -> None:
+        self.hands_per_sec = 0.0
+        self.runs = 0
+
+    def rate(self) -> float:
+        if not self.hands_per_sec:
+            benchmark = float(get_evaluator_backend().meta()["hands_per_sec"])  # type: ignore[arg-type]
+            self.hands_per_sec = benchmark * ENGINE_EVALUATOR_EFFICIENCY
+        return self.hands_per_sec
+
+    def observe(self, hands: int, elapsed: float, workers: int) -> None:
+        if hands <= 0 or elapsed < 0.05:
+            return
+        measured = hands / elapsed / max(1, workers)
+        self.hands_per_sec = measured if not self.runs else 0.7 * self.hands_per_sec + 0.3 * measured
+        self.runs += 1
+
+    def scenarios(self, players: int, time_budget: float, workers: int) -> float:
+        """Cenários (uma mão por jogador) que cabem no orçamento."""
+        return self.rate() * max(1, workers) * clamp_time_budget(time_budget) / max(1, players)
+
+    def coverage(self, scenarios: int, players: int, time_budget: float, workers: int) -> float:
+        """Fração de ``scenarios`` que o exato progressivo deve percorrer no orçamento."""
+        if scenarios <= 0:
+            return 1.0
+        return min(1.0, self.scenarios(players, time_budget, workers) / scenarios)
+
+
+ENGINE_THROUGHPUT = EngineThroughput()
+
+
+def plan_equity_method(
+    hero_cards: Sequence[Card],
+    board_cards: Sequence[Card],
+    num_opponents: int,
+    known_opponents: Optional[Sequence[Sequence[Card]]] = None,
+    analysis_mode: bool = False,
+    time_budget: float = 1.0,
+    use_parallel: bool = False,
+) -> Tuple[EquityMethod, Optional[str]]:
+    """Retorna (método, observação) aplicando o limite de cenários da enumeração completa.
+
+    Flops contra oponentes aleatórios presentes na base pré-calculada (contra 2+
+    oponentes, só se a base tem ao menos as amostras que o orçamento daria ao
+    vivo) e o heads-up pré-flop contra mão conhecida ou aleatória (matriz de
+    confrontos) usam ``PRECOMPUTED`` (sem breakdown, então não no modo de
+    análise). Acima do limite
+    a enumeração continua exata, mas progressiva (``ANYTIME``), se a vazão medida
+    do exato progressivo cobrir ``MIN_ANYTIME_COVERAGE`` dos cenários em
+    ``time_budget`` (com os workers do pool, se ``use_parallel``). Caso contrário
+    usa ``STRATIFIED``: todos os runouts do board exatos e só as mãos dos
+    oponentes amostradas.
+    """
+    known_cards, _ = normalize_known_opponents_entries(known_opponents)
+    random_opponents = max(0, num_opponents - len(known_cards))
+    pool = get_monte_carlo_pool() if use_parallel else None
+    workers = pure_python_workers(pool)
+    if not known_cards and not analysis_mode and len(board_cards) == 3 and len(hero_cards) == 2:
+        database = get_flop_equity_db()
+        if database is not None and database.has(canonicalize_flop(board_cards)[0], num_opponents):
+            live_samples = ENGINE_THROUGHPUT.scenarios(num_opponents + 1, time_budget, workers)
+            if database.beats_live(num_opponents, live_samples):
+                return "PRECOMPUTED", None
+    if num_opponents == 1 and len(known_cards) <= 1 and not board_cards and not analysis_mode:
+        if get_preflop_matrix() is not None:
+            return "PRECOMPUTED", None
+    # Com todos os oponentes conhecidos só o board é enumerado (no máximo C(48, 5) runouts).
+    equity_method = choose_equity_method(board_cards)
+    if equity_method != "EXACT" and random_opponents:
+        return equity_method, None
+    # Enumeração completa explode combinatoriamente com múltiplos oponentes e pode travar a UI.
+    combined_cards = set(hero_cards) | set(board_cards)
+    for opp_cards in known_cards:
+        combined_cards.update(opp_cards)
+    missing_board = max(0, 5 - len(board_cards))
+    deck_size = 52 - len(combined_cards)
+    estimated = estimate_exact_scenarios(deck_size, missing_board, random_opponents)
+    if estimated <= MAX_EXACT_SCENARIOS:
+        return "EXACT", None
+    coverage = ENGINE_THROUGHPUT.coverage(estimated, num_opponents + 1, time_budget, workers)
+    if coverage < MIN_ANYTIME_COVERAGE:
+        if missing_board:
+            strata = f"todos os {math.comb(deck_size, missing_board):,} runouts do board são enumerados"
+        else:
+            strata = "mesa completa"
+        note = (
+            f"Enumeração completa estimada em {estimated:,} cenários (cerca de {coverage:.1%} "
+            f"percorríveis no tempo): {strata} e apenas as mãos dos oponentes aleatórios são amostradas."
+        )
+        return "STRATIFIED", note
+    note = (
+        f"Enumeração completa estimada em {estimated:,} cenários (acima de {MAX_EXACT_SCENARIOS:,}): "
+        f"percorrida em ordem aleatória até o limite de tempo (cerca de {coverage:.0%} no orçamento)."
+    )
+    return "ANYTIME", note
 
 
-@st.cache_data(show_spinner=False)
 def simulate_exact(
     hero_cards: Sequence[Card],
     board_cards: Sequence[Card],
     num_opponents: int,
     known_opponents: Optional[Sequence[Sequence[Card]]] = None,
-) -> Dict[str, float]:
-    """Enumera exaustivamente as cartas faltantes do board para um resultado determinístico."""
+    use_parallel: bool = False,
+    stacks: Optional[Sequence[int]] = None,
+) -> EquityResult:
+    """Enumeração exata com cache LRU limitado compartilhado entre sessões.
+
+    Com ``stacks`` (Hero primeiro, depois os oponentes) também reparte cada
+    pote principal/lateral do all-in no mesmo passe.
+    """
+    known_cards, known_labels = normalize_known_opponents_entries(known_opponents)
+    cache_key = (
+        tuple(hero_cards),
+        tuple(board_cards),
+        num_opponents,
+        tuple(tuple(cards) for cards in known_cards),
+        tuple(known_labels),
+        tuple(stacks) if stacks else None,
+    )
+    cache = get_exact_result_cache()
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+    pool = get_monte_carlo_pool() if use_parallel else None
+    result = _enumerate_exact(hero_cards, board_cards, num_opponents, known_opponents, pool, stacks)
+    cache.put(cache_key, result)
+    return result
+
+
+def _exact_runouts_worker(
+    hero_cards: Tuple[Card, ...],
+    board_cards: Tuple[Card, ...],
+    num_opponents: int,
+    known_cards: Tuple[Tuple[Card, ...], ...],
+    lead_positions: Sequence[int],
+    stacks: Optional[Tuple[int, ...]] = None,
+) -> Tuple[int, int, int, BreakdownAccumulator, TableEquityAccumulator, Optional[SidePotAccumulator]]:
+    """Enumera os runouts cuja primeira carta está em ``lead_positions`` (índices do baralho).
+
+    Com oponentes aleatórios, runouts equivalentes por permutação de naipes que
+    preserva Hero, mesa e mãos conhecidas têm o mesmo resultado: só o
+    representativo é avaliado, com peso igual ao tamanho da órbita.
+    """
+    unsuited, flushes, categories = _seven_card_tables()
+    board = list(board_cards)
+    flattened_known = [card for cards in known_cards for card in cards]
+    deck = remove_known_cards(build_deck(), list(hero_cards) + board + flattened_known)
+    missing_board = 5 - len(board)
+    known_count = len(known_cards)
+    random_opponents = num_opponents - known_count
+    opponent_cards = 2 * random_opponents
+    matchings = _perfect_matchings(opponent_cards)
+    known_keys = [pack_hand(cards[0], cards[1]) for cards in known_cards]
+    # Contra mãos conhecidas cada runout custa poucas consultas, menos que o teste de órbita.
+    if random_opponents:
+        symmetries = suit_symmetries([hero_cards, board_cards, *known_cards])
+    else:
+        symmetries = [{card: card for card in deck}]
+    # Perfil do runout: máscara de ranks de cada naipe em 16 bits; identifica o conjunto
+    # de cartas, então perfis distintos = runouts distintos na órbita.
+    profiles = [
+        {
+            card: ((card_map[card] >> 16) & 0x1FFF) << (16 * SUIT_BITS.index((card_map[card] >> 12) & 0xF))
+            for card in deck
+        }
+        for card_map in symmetries
+    ]
+    breakdown = BreakdownAccumulator(num_opponents)
+    table = TableEquityAccumulator(num_opponents, known_count)
+    side_pots = SidePotAccumulator(stacks) if stacks else None
+    wins = ties = losses = 0
+
+    def runouts():
+        if missing_board == 0:
+            yield (), [symmetries[0]]
+            return
+        for position in lead_positions:
+            for rest in combos(deck[position + 1 :], missing_board - 1):
+                runout = (deck[position],) + rest
+                if len(symmetries) == 1:
+                    yield runout, symmetries
+                    continue
+                seen: Dict[int, Dict[Card, Card]] = {}
+                for card_map, profile in zip(symmetries, profiles):
+                    key = sum(profile[card] for card in runout)
+                    seen.setdefault(key, card_map)
+                # Representativo = maior perfil da órbita.
+                if max(seen) == sum(profiles[0][card] for card in runout):
+                    yield runout, list(seen.values())
+
+    def hand_value(card_a: Card, card_b: Card, product: int, suit_counts: int, cards: List[Card]) -> int:
+        suit_counts += SUIT_NIBBLE[(card_a >> 12) & 0xF] + SUIT_NIBBLE[(card_b >> 12) & 0xF]
+        value = unsuited[product * (card_a & 0xFF) * (card_b & 0xFF)]
+        if (suit_counts + FLUSH_CARRY) & FLUSH_MASK:
+            value = min(value, _flush_value(cards + [card_a, card_b], suit_counts, flushes))
+        return value
+
+    board_lookup = EVALUATOR.table.unsuited_lookup
+    scenarios_per_runout = math.comb(len(deck) - missing_board, opponent_cards) * len(matchings)
+    hero_category_counts = breakdown.hero_category
+    tie_size = breakdown.tie_size
+    # Derrotas para mãos conhecidas: (categoria, oponente) -> contagem, registradas no fim.
+    known_losses: Dict[Tuple[int, int], int] = {}
+    for runout, orbit in runouts():
+        weight = len(orbit)
+        full_board = board + list(runout)
+        product = 1
+        suit_counts = 0
+        for card in full_board:
+            product *= card & 0xFF
+            suit_counts += SUIT_NIBBLE[(card >> 12) & 0xF]
+        if (suit_counts + FLUSH_CARRY) & FLUSH_MASK:
+            board_value = flushes[product]
+        else:
+            board_value = board_lookup[product]
+        hero_value = hand_value(hero_cards[0], hero_cards[1], product, suit_counts, full_board)
+        hero_category = categories[hero_value]
+        known_values = [hand_value(cards[0], cards[1], product, suit_counts, full_board) for cards in known_cards]
+        runout_wins = runout_ties = 0
+        if not random_opponents:
+            if side_pots is not None:
+                side_pots.record([hero_value] + known_values, weight)
+            best_opponent_value = min(known_values)
+            if hero_value < best_opponent_value:
+                runout_wins = 1
+            elif hero_value == best_opponent_value:
+                runout_ties = 1
+                tie_size[1 + known_values.count(hero_value)] += weight
+                table.record([hero_value] + known_values, hero_value, weight)
+            else:
+                table.record([hero_value] + known_values, best_opponent_value, weight)
+                loss_key = (categories[best_opponent_value], known_values.index(best_opponent_value))
+                known_losses[loss_key] = known_losses.get(loss_key, 0) + weight
+        else:
+            remaining_deck = [card for card in deck if card not in runout]
+            # Cada mão de 2 cartas é avaliada uma única vez por board; o resto é consulta.
+            pair_values: List[List[int]] = []
+            for idx_a, card_a in enumerate(remaining_deck):
+                row = [0] * (idx_a + 1)
+                for card_b in remaining_deck[idx_a + 1 :]:
+                    row.append(hand_value(card_a, card_b, product, suit_counts, full_board))
+                pair_values.append(row)
+            for opp_combo in combos(range(len(remaining_deck)), opponent_cards):
+                for matching in matchings:
+                    opponent_values = list(known_values)
+                    for pos_a, pos_b in matching:
+                        opponent_values.append(pair_values[opp_combo[pos_a]][opp_combo[pos_b]])
+                    if side_pots is not None:
+                        side_pots.record([hero_value] + opponent_values, weight)
+                    best_opponent_value = min(opponent_values)
+                    if hero_value < best_opponent_value:
+                        runout_wins += 1
+                    elif hero_value == best_opponent_value:
+                        runout_ties += 1
+                        tie_size[1 + opponent_values.count(hero_value)] += weight
+                        table.record([hero_value] + opponent_values, hero_value, weight)
+                    else:
+                        table.record([hero_value] + opponent_values, best_opponent_value, weight)
+                        category = categories[best_opponent_value]
+                        best_opponent_idx = opponent_values.index(best_opponent_value)
+                        if best_opponent_idx < known_count:
+                            loss_key = (category, best_opponent_idx)
+                            known_losses[loss_key] = known_losses.get(loss_key, 0) + weight
+                            continue
+                        pos_a, pos_b = matching[best_opponent_idx - known_count]
+                        card_a = remaining_deck[opp_combo[pos_a]]
+                        card_b = remaining_deck[opp_combo[pos_b]]
+                        # Um exemplo por runout da órbita, como na enumeração completa.
+                        for card_map in orbit:
+                            breakdown.record_loss(
+                                category, best_opponent_idx, pack_hand(card_map[card_a], card_map[card_b])
+                            )
+        # Contadores por categoria do Hero são constantes dentro do runout.
+        hero_category_counts[hero_category] += weight * scenarios_per_runout
+        breakdown.hero_win_category[hero_category] += weight * runout_wins
+        breakdown.tie_category[hero_category] += weight * runout_ties
+        if board_value == hero_value:
+            breakdown.board_only_ties += weight * runout_ties
+        table.record_wins(0, weight * runout_wins)
+        wins += weight * runout_wins
+        ties += weight * runout_ties
+        losses += weight * (scenarios_per_runout - runout_wins - runout_ties)
+    for (category, opponent_idx), count in known_losses.items():
+        breakdown.record_loss(category, opponent_idx, known_keys[opponent_idx], count)
+    return wins, ties, losses, breakdown, table, side_pots
+
+
+def _enumerate_exact(
+    hero_cards: Sequence[Card],
+    board_cards: Sequence[Card],
+    num_opponents: int,
+    known_opponents: Optional[Sequence[Sequence[Card]]] = None,
+    pool: Optional[Executor] = None,
+    stacks: Optional[Sequence[int]] = None,
+) -> EquityResult:
+    """Enumera exaustivamente as cartas faltantes do board para um resultado determinístico.
+
+    Com ``pool`` cada primeira carta do runout vira uma tarefa separada.
+    """
     hero_cards = list(hero_cards)
     board_cards = list(board_cards)
     known_cards, known_labels = normalize_known_opponents_entries(known_opponents)
@@ -1034,8 +3449,6 @@ def simulate_exact(
     missing_board = 5 - len(board_cards)
     if missing_board < 0:
         raise ValueError("A mesa não pode conter mais de 5 cartas.")
-    if missing_board > 2:
-        raise ValueError("Enumeração exata só suporta até 2 cartas faltando.")
     _log(
         "debug-session",
         "run1",
@@ -1053,89 +3466,47 @@ def simulate_exact(
     random_opponents = num_opponents - len(known_cards)
     if random_opponents < 0:
         raise ValueError("Número de oponentes conhecidos maior que o total configurado.")
+    if missing_board > 2 and random_opponents:
+        raise ValueError("Com mais de 2 cartas faltando, a enumeração exata exige oponentes conhecidos.")
     cards_needed = missing_board + 2 * random_opponents
     if cards_needed > len(deck):
         raise ValueError("Cartas insuficientes para completar o cálculo.")
+    known_count = len(known_cards)
+    opponent_labels = known_labels + [f"Oponente {known_count + idx + 1}" for idx in range(random_opponents)]
+    stacks = normalize_stacks(stacks, num_opponents)
+
+    worker_args = (tuple(hero_cards), tuple(board_cards), num_opponents, tuple(tuple(cards) for cards in known_cards))
+    lead_positions = list(range(len(deck) - missing_board + 1)) if missing_board else [0]
+    if pool and len(lead_positions) > 1:
+        futures = [
+            pool.submit(_exact_runouts_worker, *worker_args, [position], stacks) for position in lead_positions
+        ]
+        outcomes = [future.result() for future in futures]
+    else:
+        outcomes = [_exact_runouts_worker(*worker_args, lead_positions, stacks)]
     wins = ties = losses = 0
-    hero_category_counter: Counter = Counter()
-    hero_win_category_counter: Counter = Counter()
-    loss_category_counter: Counter = Counter()
-    loss_winner_counter: Counter = Counter()
-    losing_examples_data: Dict[int, Counter] = defaultdict(Counter)
-    tie_category_counter: Counter = Counter()
-    tie_size_counter: Counter = Counter()
-    board_only_ties = 0
-    random_labels = [f"Oponente {len(known_labels) + idx + 1}" for idx in range(random_opponents)]
-
-    for board_draw in combos(deck, missing_board):
-        simulated_board = list(board_cards) + list(board_draw)
-        remaining_deck = [card for card in deck if card not in board_draw]
-        hero_rank = best_hand_rank_7(hero_cards, simulated_board)
-        board_rank = board_only_rank_value(simulated_board)
-
-        base_known_hands: List[Tuple[Tuple[int, int], List[Card], str]] = []
-        for idx, opp_cards in enumerate(known_cards):
-            rank = best_hand_rank_7(opp_cards, simulated_board)
-            label = known_labels[idx]
-            base_known_hands.append((rank, list(opp_cards), label))
-
-        for opp_combo in combos(remaining_deck, 2 * random_opponents):
-            opponent_cards_iter = iter(opp_combo)
-            temp_opponent_hands = list(base_known_hands)
-            for rand_idx in range(random_opponents):
-                pair = [next(opponent_cards_iter), next(opponent_cards_iter)]
-                rank = best_hand_rank_7(pair, simulated_board)
-                label = random_labels[rand_idx]
-                temp_opponent_hands.append((rank, pair, label))
-
-            best_opponent_rank, best_opponent_cards, best_label = (
-                max(temp_opponent_hands, key=lambda item: item[0]) if temp_opponent_hands else ((-1, 0), [], "")
-            )
-            hero_category_counter[hero_rank[0]] += 1
-            if hero_rank > best_opponent_rank:
-                wins += 1
-                hero_win_category_counter[hero_rank[0]] += 1
-            elif hero_rank == best_opponent_rank:
-                ties += 1
-                tie_category_counter[hero_rank[0]] += 1
-                tied_players = 1 + sum(1 for entry in temp_opponent_hands if entry[0] == hero_rank)
-                tie_size_counter[tied_players] += 1
-                if board_rank and board_rank == hero_rank:
-                    board_only_ties += 1
-            else:
-                losses += 1
-                loss_category_value = best_opponent_rank[0]
-                loss_category_counter[loss_category_value] += 1
-                loss_winner_counter[(loss_category_value, best_label or "Oponente desconhecido")] += 1
-                if best_opponent_cards:
-                    formatted = format_hand(best_opponent_cards)
-                    losing_examples_data[loss_category_value][formatted] += 1
-
-    if wins != sum(hero_win_category_counter.values()):
+    breakdown = BreakdownAccumulator(num_opponents)
+    table = TableEquityAccumulator(num_opponents, known_count)
+    side_pots = SidePotAccumulator(stacks) if stacks else None
+    for chunk_wins, chunk_ties, chunk_losses, chunk_breakdown, chunk_table, chunk_side_pots in outcomes:
+        wins += chunk_wins
+        ties += chunk_ties
+        losses += chunk_losses
+        breakdown.merge(chunk_breakdown)
+        table.merge(chunk_table)
+        if side_pots is not None:
+            side_pots.merge(chunk_side_pots)
+
+    if wins != sum(breakdown.hero_win_category):
         raise ValueError("Inconsistência ao contabilizar vitórias do Hero.")
-    if losses != sum(loss_category_counter.values()):
+    if losses != sum(breakdown.loss_category):
         raise ValueError("Inconsistência ao contabilizar derrotas do Hero.")
-    if ties != sum(tie_category_counter.values()):
+    if ties != sum(breakdown.tie_category):
         raise ValueError("Inconsistência ao contabilizar empates do Hero.")
+    if sum(table.shares) != SHARE_UNITS * (wins + ties + losses):
+        raise ValueError("Inconsistência ao dividir o pote entre os jogadores.")
 
-    result = _build_result_dict(
-        wins,
-        ties,
-        losses,
-        hero_category_counter,
-        loss_category_counter,
-        losing_examples_data,
-    )
-    result["hero_most_common_category"] = (
-        category_label(hero_category_counter.most_common(1)[0][0]) if hero_category_counter else None
-    )
-    result["hero_most_common_category_wins"] = (
-        category_label(hero_win_category_counter.most_common(1)[0][0]) if hero_win_category_counter else None
-    )
-    result["loss_breakdown"] = build_loss_breakdown(loss_category_counter, loss_winner_counter)
-    result["tie_breakdown"] = build_tie_breakdown(tie_category_counter, tie_size_counter, board_only_ties)
-    # Stats: CI only for MC
-    result["confidence"] = None
+    result = EquityResult(wins, ties, losses, breakdown, opponent_labels, table=table, side_pots=side_pots)
     _log(
         "debug-session",
         "run1",
@@ -1143,26 +3514,481 @@ def simulate_exact(
         "app.py:570",
         "simulate_exact saída",
         {
-            "result": result,
             "wins": wins,
             "ties": ties,
             "losses": losses,
-            "total": result.get("total_scenarios"),
+            "total": result.total,
         },
     )
     return result
 
 
-def simulate_monte_carlo(
-    hero_cards: Sequence[Card],
-    board_cards: Sequence[Card],
+def _anytime_exact_worker(
+    hero_cards: Tuple[Card, ...],
+    board_cards: Tuple[Card, ...],
     num_opponents: int,
-    time_budget: float,
-    known_opponents: Optional[Sequence[Sequence[Card]]] = None,
-    batch_size: int = 2000,
-    collect_breakdown: bool = False,
+    known_cards: Tuple[Tuple[Card, ...], ...],
+    permutation_seed: int,
+    start: int,
+    stop: int,
+    deadline: Optional[float] = None,
+) -> Tuple[int, int, int, BreakdownAccumulator, TableEquityAccumulator, PhaseProfile]:
+    """Avalia as posições [start, stop) da ordem aleatória do espaço de cenários exato.
+
+    Com ``deadline`` (``time.perf_counter``) para antes, sempre num prefixo do intervalo.
+    """
+    hero = list(hero_cards)
+    flattened_known = [card for cards in known_cards for card in cards]
+    deck = remove_known_cards(build_deck(), list(hero_cards) + list(board_cards) + flattened_known)
+    missing_board = 5 - len(board_cards)
+    known_count = len(known_cards)
+    random_opponents = num_opponents - known_count
+    opponent_cards = 2 * random_opponents
+    remaining_size = len(deck) - missing_board
+    match_space = pairing_count(opponent_cards)
+    opp_space = math.comb(remaining_size, opponent_cards) * match_space
+    board_space = math.comb(len(deck), missing_board)
+    permutation = ScenarioPermutation(board_space * opp_space, permutation_seed)
+    known_keys = [pack_hand(cards[0], cards[1]) for cards in known_cards]
+    # Boards já vistos guardam rankings do Hero/oponentes conhecidos; no turn/river
+    # (poucos boards) também as mãos aleatórias já avaliadas.
+    cache_pairs = board_space <= 64
+    board_cache: Dict[int, Tuple] = {}
+    breakdown = BreakdownAccumulator(num_opponents)
+    table = TableEquityAccumulator(num_opponents, known_count)
+    profile = PhaseProfile()
+    wins = ties = losses = 0
+    for position in range(start, stop):
+        if deadline is not None and position % 64 == 0 and time.perf_counter() >= deadline:
+            break
+        sampled = profile.sample()
+        board_index, rest = divmod(permutation[position], opp_space)
+        combo_index, matching_index = divmod(rest, match_space)
+        entry = board_cache.get(board_index)
+        if entry is None:
+            if len(board_cache) >= 4096:
+                board_cache.clear()
+            board_draw = [deck[idx] for idx in _unrank_combination(len(deck), missing_board, board_index)]
+            simulated_board = list(board_cards) + board_draw
+            remaining_deck = [card for card in deck if card not in board_draw]
+            if sampled:
+                profile.mark(PHASE_DEAL_BOARD)
+            hero_rank = best_hand_rank_7(hero, simulated_board)
+            entry = (
+                simulated_board,
+                remaining_deck,
+                hero_rank,
+                board_only_rank_value(simulated_board),
+                [best_hand_rank_7(cards, simulated_board) for cards in known_cards],
+                {},
+            )
+            board_cache[board_index] = entry
+            if sampled:
+                profile.mark(PHASE_EVALUATE)
+        simulated_board, remaining_deck, hero_rank, board_rank, known_ranks, pair_cache = entry
+        if sampled:
+            profile.mark(PHASE_DEAL_BOARD)
+        combo = _unrank_combination(remaining_size, opponent_cards, combo_index)
+        matching = _unrank_matching(opponent_cards, matching_index)
+        if sampled:
+            profile.mark(PHASE_DEAL_OPPONENTS)
+        opponent_ranks = list(known_ranks)
+        for pos_a, pos_b in matching:
+            pair_key = (combo[pos_a], combo[pos_b])
+            rank = pair_cache.get(pair_key)
+            if rank is None:
+                rank = best_hand_rank_7([remaining_deck[pair_key[0]], remaining_deck[pair_key[1]]], simulated_board)
+                if cache_pairs:
+                    pair_cache[pair_key] = rank
+            opponent_ranks.append(rank)
+        if sampled:
+            profile.mark(PHASE_EVALUATE)
+        best_opponent_idx = -1
+        best_opponent_rank: Tuple[int, int] = (-1, 0)
+        for idx, rank in enumerate(opponent_ranks):
+            if rank > best_opponent_rank:
+                best_opponent_idx, best_opponent_rank = idx, rank
+        hero_category = hero_rank[0]
+        breakdown.hero_category[hero_category] += 1
+        if hero_rank > best_opponent_rank:
+            wins += 1
+            breakdown.hero_win_category[hero_category] += 1
+            table.record_wins(0, 1)
+        elif hero_rank == best_opponent_rank:
+            ties += 1
+            breakdown.tie_category[hero_category] += 1
+            breakdown.tie_size[1 + opponent_ranks.count(hero_rank)] += 1
+            table.record([hero_rank] + opponent_ranks, hero_rank)
+            if board_rank and board_rank == hero_rank:
+                breakdown.board_only_ties += 1
+        else:
+            losses += 1
+            table.record([hero_rank] + opponent_ranks, best_opponent_rank)
+            if best_opponent_idx < known_count:
+                hand_key = known_keys[best_opponent_idx]
+            else:
+                pos_a, pos_b = matching[best_opponent_idx - known_count]
+                hand_key = pack_hand(remaining_deck[combo[pos_a]], remaining_deck[combo[pos_b]])
+            breakdown.record_loss(best_opponent_rank[0], best_opponent_idx, hand_key)
+        if sampled:
+            profile.mark(PHASE_COMPARE)
+    return wins, ties, losses, breakdown, table, profile
+
+
+def simulate_exact_anytime(
+    hero_cards: Sequence[Card],
+    board_cards: Sequence[Card],
+    num_opponents: int,
+    time_budget: float,
+    known_opponents: Optional[Sequence[Sequence[Card]]] = None,
+    use_parallel: bool = False,
+    chunk_size: int = 2000,
+) -> Tuple[EquityResult, Dict[str, object]]:
+    """Enumeração exata em ordem pseudoaleatória, interrompível a qualquer momento.
+
+    Qualquer prefixo da ordem é uma amostra sem reposição do espaço de cenários,
+    então o resultado parcial é uma estimativa não viesada (IC com correção de
+    população finita). Com tempo suficiente a cobertura chega a 100% e o
+    resultado é o mesmo da enumeração completa.
+    """
+    hero_tuple = tuple(hero_cards)
+    board_tuple = tuple(board_cards)
+    known_cards, known_labels = normalize_known_opponents_entries(known_opponents)
+    flattened_known: List[Card] = []
+    for opp_cards in known_cards:
+        if len(opp_cards) != 2:
+            raise ValueError("Cada oponente conhecido deve possuir exatamente 2 cartas.")
+        flattened_known.extend(opp_cards)
+    missing_board = 5 - len(board_tuple)
+    if missing_board < 0:
+        raise ValueError("A mesa não pode conter mais de 5 cartas.")
+    random_opponents = num_opponents - len(known_cards)
+    if random_opponents < 0:
+        raise ValueError("Número de oponentes conhecidos maior que o total configurado.")
+    deck = remove_known_cards(build_deck(), hero_tuple + board_tuple + tuple(flattened_known))
+    if missing_board + 2 * random_opponents > len(deck):
+        raise ValueError("Cartas insuficientes para completar o cálculo.")
+    scenario_space = estimate_exact_scenarios(len(deck), missing_board, random_opponents)
+    known_tuple = tuple(tuple(cards) for cards in known_cards)
+    permutation_seed = random.randrange(1, 2**63)
+    max_seconds = clamp_time_budget(time_budget)
+    breakdown = BreakdownAccumulator(num_opponents)
+    table = TableEquityAccumulator(num_opponents, len(known_cards))
+    profile = PhaseProfile()
+    wins = ties = losses = 0
+    covered = 0
+    start = time.perf_counter()
+    pool = get_monte_carlo_pool() if use_parallel else None
+    if pool:
+        profile.workers = getattr(pool, "_max_workers", None)
+        chunk_size = max(200, chunk_size)
+        next_position = 0
+        active: List[Future] = []
+
+        def submit_one() -> Future:
+            nonlocal next_position
+            stop = min(scenario_space, next_position + chunk_size)
+            future = pool.submit(
+                _anytime_exact_worker,
+                hero_tuple,
+                board_tuple,
+                num_opponents,
+                known_tuple,
+                permutation_seed,
+                next_position,
+                stop,
+            )
+            next_position = stop
+            return future
+
+        for _ in range(getattr(pool, "_max_workers", os.cpu_count() or 1)):
+            if next_position < scenario_space:
+                active.append(submit_one())
+        while active:
+            future = next(as_completed(active))
+            active.remove(future)
+            chunk_wins, chunk_ties, chunk_losses, chunk_breakdown, chunk_table, chunk_profile = future.result()
+            wins += chunk_wins
+            ties += chunk_ties
+            losses += chunk_losses
+            covered += chunk_wins + chunk_ties + chunk_losses
+            breakdown.merge(chunk_breakdown)
+            table.merge(chunk_table)
+            profile.merge(chunk_profile)
+            profile.note_initial_rate(covered, time.perf_counter() - start)
+            if next_position < scenario_space and time.perf_counter() - start < max_seconds:
+                active.append(submit_one())
+    else:
+        wins, ties, losses, breakdown, table, profile = _anytime_exact_worker(
+            hero_tuple,
+            board_tuple,
+            num_opponents,
+            known_tuple,
+            permutation_seed,
+            0,
+            scenario_space,
+            deadline=start + max_seconds,
+        )
+        covered = wins + ties + losses
+    elapsed = time.perf_counter() - start
+    ENGINE_THROUGHPUT.observe(covered * (num_opponents + 1), elapsed, profile.workers or 1)
+    opponent_labels = known_labels + [
+        f"Oponente {len(known_cards) + idx + 1}" for idx in range(random_opponents)
+    ]
+    meta = {
+        "iterations": covered,
+        "elapsed": elapsed,
+        "iter_per_sec": covered / elapsed if elapsed > 0 else 0.0,
+        "time_budget": max_seconds,
+        "analysis_mode": False,
+        "profile": profile.summary(covered),
+        "coverage": covered / scenario_space if scenario_space else 1.0,
+        "scenario_space": scenario_space,
+    }
+    result = EquityResult(
+        wins,
+        ties,
+        losses,
+        breakdown,
+        opponent_labels,
+        sampled=covered < scenario_space,
+        mc_meta=meta,
+        table=table,
+    )
+    return result, meta
+
+
+def _stratified_runout_worker(
+    hero_cards: Tuple[Card, ...],
+    board_cards: Tuple[Card, ...],
+    num_opponents: int,
+    known_cards: Tuple[Tuple[Card, ...], ...],
+    runouts: Sequence[Tuple[Card, ...]],
+    samples_per_runout: int,
+    seed: int,
+) -> Tuple[List[int], List[int], BreakdownAccumulator, TableEquityAccumulator, PhaseProfile]:
+    """Para cada runout (estrato), sorteia apenas as mãos dos oponentes aleatórios.
+
+    No perfil, a preparação de cada runout (board, Hero e conhecidos) entra em ``deal_board``.
+    """
+    rng = random.Random(seed)
+    hero = list(hero_cards)
+    flattened_known = [card for cards in known_cards for card in cards]
+    deck = remove_known_cards(build_deck(), list(hero_cards) + list(board_cards) + flattened_known)
+    known_count = len(known_cards)
+    random_opponents = num_opponents - known_count
+    opponent_cards = 2 * random_opponents
+    known_keys = [pack_hand(cards[0], cards[1]) for cards in known_cards]
+    breakdown = BreakdownAccumulator(num_opponents)
+    table = TableEquityAccumulator(num_opponents, known_count)
+    runout_wins: List[int] = []
+    runout_ties: List[int] = []
+    profile = PhaseProfile()
+    for runout in runouts:
+        runout_start = time.perf_counter()
+        simulated_board = list(board_cards) + list(runout)
+        remaining_deck = [card for card in deck if card not in runout]
+        hero_rank = best_hand_rank_7(hero, simulated_board)
+        hero_category = hero_rank[0]
+        board_rank = board_only_rank_value(simulated_board)
+        known_ranks = [best_hand_rank_7(cards, simulated_board) for cards in known_cards]
+        pair_cache: Dict[int, Tuple[int, int]] = {}
+        # Preparo único do runout, medido sempre; dividido por ``every`` para a extrapolação do resumo.
+        profile.seconds[PHASE_DEAL_BOARD] += (time.perf_counter() - runout_start) / profile.every
+        wins = ties = 0
+        for _ in range(samples_per_runout):
+            sampled = profile.sample()
+            dealt = rng.sample(remaining_deck, opponent_cards)
+            if sampled:
+                profile.mark(PHASE_DEAL_OPPONENTS)
+            opponent_ranks = list(known_ranks)
+            for offset in range(0, opponent_cards, 2):
+                hand_key = pack_hand(dealt[offset], dealt[offset + 1])
+                rank = pair_cache.get(hand_key)
+                if rank is None:
+                    rank = best_hand_rank_7(dealt[offset : offset + 2], simulated_board)
+                    pair_cache[hand_key] = rank
+                opponent_ranks.append(rank)
+            if sampled:
+                profile.mark(PHASE_EVALUATE)
+            best_opponent_idx = -1
+            best_opponent_rank: Tuple[int, int] = (-1, 0)
+            for idx, rank in enumerate(opponent_ranks):
+                if rank > best_opponent_rank:
+                    best_opponent_idx, best_opponent_rank = idx, rank
+            breakdown.hero_category[hero_category] += 1
+            if hero_rank > best_opponent_rank:
+                wins += 1
+                breakdown.hero_win_category[hero_category] += 1
+                table.record_wins(0, 1)
+            elif hero_rank == best_opponent_rank:
+                ties += 1
+                breakdown.tie_category[hero_category] += 1
+                breakdown.tie_size[1 + opponent_ranks.count(hero_rank)] += 1
+                table.record([hero_rank] + opponent_ranks, hero_rank)
+                if board_rank and board_rank == hero_rank:
+                    breakdown.board_only_ties += 1
+            else:
+                table.record([hero_rank] + opponent_ranks, best_opponent_rank)
+                if best_opponent_idx < known_count:
+                    hand_key = known_keys[best_opponent_idx]
+                else:
+                    offset = 2 * (best_opponent_idx - known_count)
+                    hand_key = pack_hand(dealt[offset], dealt[offset + 1])
+                breakdown.record_loss(best_opponent_rank[0], best_opponent_idx, hand_key)
+            if sampled:
+                profile.mark(PHASE_COMPARE)
+        runout_wins.append(wins)
+        runout_ties.append(ties)
+    return runout_wins, runout_ties, breakdown, table, profile
+
+
+def simulate_stratified_runouts(
+    hero_cards: Sequence[Card],
+    board_cards: Sequence[Card],
+    num_opponents: int,
+    time_budget: float,
+    known_opponents: Optional[Sequence[Sequence[Card]]] = None,
+    use_parallel: bool = False,
+) -> Tuple[EquityResult, Dict[str, object]]:
+    """Estimador híbrido: todos os runouts do board enumerados, oponentes amostrados.
+
+    Cada runout é um estrato de mesmo peso e recebe o mesmo número de amostras
+    por rodada, então as contagens somadas já são a média ponderada; o erro
+    padrão é o estratificado, sem a variância do board.
+    """
+    hero_tuple = tuple(hero_cards)
+    board_tuple = tuple(board_cards)
+    known_cards, known_labels = normalize_known_opponents_entries(known_opponents)
+    flattened_known: List[Card] = []
+    for opp_cards in known_cards:
+        if len(opp_cards) != 2:
+            raise ValueError("Cada oponente conhecido deve possuir exatamente 2 cartas.")
+        flattened_known.extend(opp_cards)
+    missing_board = 5 - len(board_tuple)
+    if missing_board < 0:
+        raise ValueError("A mesa não pode conter mais de 5 cartas.")
+    random_opponents = num_opponents - len(known_cards)
+    if random_opponents < 0:
+        raise ValueError("Número de oponentes conhecidos maior que o total configurado.")
+    deck = remove_known_cards(build_deck(), hero_tuple + board_tuple + tuple(flattened_known))
+    if missing_board + 2 * random_opponents > len(deck):
+        raise ValueError("Cartas insuficientes para completar o cálculo.")
+    known_tuple = tuple(tuple(cards) for cards in known_cards)
+    runouts = list(combos(deck, missing_board))
+    num_runouts = len(runouts)
+    max_seconds = clamp_time_budget(time_budget)
+    rng = random.Random()
+    pool = get_monte_carlo_pool() if use_parallel else None
+    workers = getattr(pool, "_max_workers", 1) if pool else 1
+    runout_wins = [0] * num_runouts
+    runout_ties = [0] * num_runouts
+    breakdown = BreakdownAccumulator(num_opponents)
+    table = TableEquityAccumulator(num_opponents, len(known_cards))
+    profile = PhaseProfile()
+    profile.workers = workers if pool else None
+    samples_per_runout = 0
+    # Amostras por runout em cada rodada: cresce até cada rodada durar uma fração do orçamento.
+    round_samples = 2
+    start = time.perf_counter()
+    while samples_per_runout < 2 or time.perf_counter() - start < max_seconds:
+        round_start = time.perf_counter()
+        if pool:
+            slice_size = math.ceil(num_runouts / workers)
+            futures = [
+                (
+                    offset,
+                    pool.submit(
+                        _stratified_runout_worker,
+                        hero_tuple,
+                        board_tuple,
+                        num_opponents,
+                        known_tuple,
+                        runouts[offset : offset + slice_size],
+                        round_samples,
+                        rng.randrange(1, 2**63),
+                    ),
+                )
+                for offset in range(0, num_runouts, slice_size)
+            ]
+            outcomes = [(offset, future.result()) for offset, future in futures]
+        else:
+            outcomes = [
+                (
+                    0,
+                    _stratified_runout_worker(
+                        hero_tuple,
+                        board_tuple,
+                        num_opponents,
+                        known_tuple,
+                        runouts,
+                        round_samples,
+                        rng.randrange(1, 2**63),
+                    ),
+                )
+            ]
+        for offset, (chunk_wins, chunk_ties, chunk_breakdown, chunk_table, chunk_profile) in outcomes:
+            for idx, count in enumerate(chunk_wins):
+                runout_wins[offset + idx] += count
+            for idx, count in enumerate(chunk_ties):
+                runout_ties[offset + idx] += count
+            breakdown.merge(chunk_breakdown)
+            table.merge(chunk_table)
+            profile.merge(chunk_profile)
+        samples_per_runout += round_samples
+        profile.note_initial_rate(num_runouts * samples_per_runout, time.perf_counter() - start)
+        round_elapsed = time.perf_counter() - round_start
+        if round_elapsed < max_seconds / 20:
+            round_samples *= 2
+    elapsed = time.perf_counter() - start
+    wins = sum(runout_wins)
+    ties = sum(runout_ties)
+    total = num_runouts * samples_per_runout
+    losses = total - wins - ties
+    ENGINE_THROUGHPUT.observe(total * (num_opponents + 1), elapsed, workers)
+    # Var(p̂) = (1/B²) Σ_b s_b² / n, com s_b² = n/(n-1) p_b (1 - p_b).
+    standard_errors: Dict[str, float] = {}
+    for label, counts in (
+        ("win", runout_wins),
+        ("tie", runout_ties),
+        ("loss", [samples_per_runout - w - t for w, t in zip(runout_wins, runout_ties)]),
+    ):
+        variance = 0.0
+        for count in counts:
+            p_runout = count / samples_per_runout
+            variance += p_runout * (1 - p_runout) / (samples_per_runout - 1)
+        standard_errors[label] = math.sqrt(variance) / num_runouts
+    opponent_labels = known_labels + [
+        f"Oponente {len(known_cards) + idx + 1}" for idx in range(random_opponents)
+    ]
+    meta = {
+        "iterations": total,
+        "elapsed": elapsed,
+        "iter_per_sec": total / elapsed if elapsed > 0 else 0.0,
+        "time_budget": max_seconds,
+        "analysis_mode": False,
+        "profile": profile.summary(total),
+        "runouts": num_runouts,
+        "samples_per_runout": samples_per_runout,
+        "standard_errors": standard_errors,
+    }
+    result = EquityResult(
+        wins, ties, losses, breakdown, opponent_labels, sampled=True, mc_meta=meta, table=table
+    )
+    return result, meta
+
+
+def simulate_monte_carlo(
+    hero_cards: Sequence[Card],
+    board_cards: Sequence[Card],
+    num_opponents: int,
+    time_budget: float,
+    known_opponents: Optional[Sequence[Sequence[Card]]] = None,
+    batch_size: int = 2000,
+    collect_breakdown: bool = False,
     use_parallel: bool = False,
-) -> Tuple[Dict[str, float], Dict[str, float]]:
+    stacks: Optional[Sequence[int]] = None,
+) -> Tuple[EquityResult, Dict[str, object]]:
     """Delegador que escolhe o modo rápido ou o modo análise."""
     if collect_breakdown:
         return simulate_monte_carlo_analysis(
@@ -1172,243 +3998,1539 @@ def simulate_monte_carlo(
             time_budget,
             known_opponents,
             batch_size,
+            stacks,
         )
     return simulate_monte_carlo_fast(
         hero_cards,
         board_cards,
         num_opponents,
-        time_budget,
+        time_budget,
+        known_opponents,
+        batch_size,
+        use_parallel,
+        stacks,
+    )
+
+
+def simulate_monte_carlo_fast(
+    hero_cards: Sequence[Card],
+    board_cards: Sequence[Card],
+    num_opponents: int,
+    time_budget: float,
+    known_opponents: Optional[Sequence[Sequence[Card]]] = None,
+    batch_size: int = 2000,
+    use_parallel: bool = False,
+    stacks: Optional[Sequence[int]] = None,
+) -> Tuple[EquityResult, Dict[str, object]]:
+    """Modo rápido: win/tie/lose, equity da mesa e potes laterais, sem Counters no hot loop."""
+    hero_tuple = tuple(hero_cards)
+    board_tuple = tuple(board_cards)
+    known_cards, known_labels = normalize_known_opponents_entries(known_opponents)
+    flattened_known: List[Card] = []
+    for opp_cards in known_cards:
+        if len(opp_cards) != 2:
+            raise ValueError("Cada oponente conhecido deve possuir exatamente 2 cartas.")
+        flattened_known.extend(opp_cards)
+    deck = remove_known_cards(build_deck(), hero_tuple + board_tuple + tuple(flattened_known))
+    missing_board = 5 - len(board_tuple)
+    random_opponents = num_opponents - len(known_cards)
+    if random_opponents < 0:
+        raise ValueError("Número de oponentes conhecidos maior que o total configurado.")
+    cards_needed = missing_board + 2 * random_opponents
+    if cards_needed > len(deck):
+        raise ValueError("Cartas insuficientes para completar a simulação.")
+    stacks = normalize_stacks(stacks, num_opponents)
+    max_seconds = clamp_time_budget(time_budget)
+    batch_size = max(200, batch_size)
+    if use_parallel:
+        pool = get_monte_carlo_pool()
+        if pool:
+            wins, ties, losses, table, side_pots, elapsed_parallel, profile = _run_parallel_fast(
+                pool,
+                hero_tuple,
+                board_tuple,
+                num_opponents,
+                tuple(tuple(cards) for cards in known_cards),
+                tuple(deck),
+                max_seconds,
+                batch_size,
+                stacks,
+            )
+            meta = {
+                "iterations": wins + ties + losses,
+                "elapsed": elapsed_parallel,
+                "iter_per_sec": (wins + ties + losses) / elapsed_parallel if elapsed_parallel > 0 else 0.0,
+                "time_budget": max_seconds,
+                "analysis_mode": False,
+                "profile": profile,
+            }
+            result = EquityResult(
+                wins,
+                ties,
+                losses,
+                opponent_labels=known_labels,
+                sampled=True,
+                mc_meta=meta,
+                table=table,
+                side_pots=side_pots,
+            )
+            return result, meta
+    # Single-process hot loop.
+    hero_list = list(hero_tuple)
+    board_base = list(board_tuple)
+    board_extra = [0] * missing_board
+    board_buffer = board_base + board_extra
+    base_len = len(board_base)
+    deck_buffer = list(deck)
+    table = TableEquityAccumulator(num_opponents, len(known_cards))
+    side_pots = SidePotAccumulator(stacks, lower_is_better=False) if stacks else None
+    profile = PhaseProfile()
+    start = time.perf_counter()
+    wins = ties = losses = 0
+    iterations = 0
+    while time.perf_counter() - start < max_seconds:
+        for _ in range(batch_size):
+            if time.perf_counter() - start >= max_seconds:
+                break
+            sampled = profile.sample()
+            random.shuffle(deck_buffer)
+            for idx in range(missing_board):
+                board_buffer[base_len + idx] = deck_buffer[idx]
+            if sampled:
+                profile.mark(PHASE_DEAL_BOARD)
+            hero_rank = best_hand_rank_7(hero_list, board_buffer)
+            ranks = [hero_rank]
+            best_opponent_rank: Tuple[int, int] = (-1, 0)
+            for opp_cards in known_cards:
+                rank = best_hand_rank_7(opp_cards, board_buffer)
+                ranks.append(rank)
+                if rank > best_opponent_rank:
+                    best_opponent_rank = rank
+            offset = missing_board
+            for _ in range(random_opponents):
+                card_a = deck_buffer[offset]
+                card_b = deck_buffer[offset + 1]
+                offset += 2
+                rank = best_hand_rank_7((card_a, card_b), board_buffer)
+                ranks.append(rank)
+                if rank > best_opponent_rank:
+                    best_opponent_rank = rank
+            if sampled:
+                profile.mark(PHASE_EVALUATE)
+            if side_pots is not None:
+                side_pots.record(ranks)
+            if hero_rank > best_opponent_rank:
+                wins += 1
+                table.record_wins(0, 1)
+            elif hero_rank == best_opponent_rank:
+                ties += 1
+                table.record(ranks, hero_rank)
+            else:
+                losses += 1
+                table.record(ranks, best_opponent_rank)
+            if sampled:
+                profile.mark(PHASE_COMPARE)
+            iterations += 1
+        profile.note_initial_rate(iterations, time.perf_counter() - start)
+    elapsed = time.perf_counter() - start
+    meta = {
+        "iterations": iterations,
+        "elapsed": elapsed,
+        "iter_per_sec": iterations / elapsed if elapsed > 0 else 0.0,
+        "time_budget": max_seconds,
+        "analysis_mode": False,
+        "profile": profile.summary(iterations),
+    }
+    result = EquityResult(
+        wins,
+        ties,
+        losses,
+        opponent_labels=known_labels,
+        sampled=True,
+        mc_meta=meta,
+        table=table,
+        side_pots=side_pots,
+    )
+    return result, meta
+
+
+def simulate_monte_carlo_analysis(
+    hero_cards: Sequence[Card],
+    board_cards: Sequence[Card],
+    num_opponents: int,
+    time_budget: float,
+    known_opponents: Optional[Sequence[Sequence[Card]]] = None,
+    batch_size: int = 2000,
+    stacks: Optional[Sequence[int]] = None,
+) -> Tuple[EquityResult, Dict[str, object]]:
+    """Modo análise: coleta completa de breakdowns."""
+    hero_cards = list(hero_cards)
+    board_cards = list(board_cards)
+    known_cards, known_labels = normalize_known_opponents_entries(known_opponents)
+    flattened_known: List[Card] = []
+    for opp_cards in known_cards:
+        if len(opp_cards) != 2:
+            raise ValueError("Cada oponente conhecido deve possuir exatamente 2 cartas.")
+        flattened_known.extend(opp_cards)
+    deck = remove_known_cards(build_deck(), hero_cards + board_cards + flattened_known)
+    missing_board = 5 - len(board_cards)
+    random_opponents = num_opponents - len(known_cards)
+    if random_opponents < 0:
+        raise ValueError("Número de oponentes conhecidos maior que o total configurado.")
+    cards_needed = missing_board + 2 * random_opponents
+    if cards_needed > len(deck):
+        raise ValueError("Cartas insuficientes para completar a simulação.")
+    stacks = normalize_stacks(stacks, num_opponents)
+    max_seconds = max(0.2, min(time_budget, 2.0))
+    batch_size = max(200, batch_size)
+    known_count = len(known_cards)
+    known_keys = [pack_hand(opp_cards[0], opp_cards[1]) for opp_cards in known_cards]
+    opponent_labels = known_labels + [f"Oponente {known_count + idx + 1}" for idx in range(random_opponents)]
+    draw_buffer = list(deck)
+    breakdown = BreakdownAccumulator(num_opponents)
+    table = TableEquityAccumulator(num_opponents, known_count)
+    side_pots = SidePotAccumulator(stacks, lower_is_better=False) if stacks else None
+    hero_category_counts = breakdown.hero_category
+    profile = PhaseProfile()
+    wins = ties = losses = 0
+    start = time.perf_counter()
+    iterations = 0
+    while time.perf_counter() - start < max_seconds:
+        for _ in range(batch_size):
+            if time.perf_counter() - start >= max_seconds:
+                break
+            sampled = profile.sample()
+            random.shuffle(draw_buffer)
+            board_draw = draw_buffer[:missing_board] if missing_board else []
+            simulated_board = board_cards + board_draw
+            if sampled:
+                profile.mark(PHASE_DEAL_BOARD)
+            hero_rank = best_hand_rank_7(hero_cards, simulated_board)
+            hero_category = hero_rank[0]
+            hero_category_counts[hero_category] += 1
+            opponent_ranks = [best_hand_rank_7(opp_cards, simulated_board) for opp_cards in known_cards]
+            offset = missing_board
+            for _ in range(random_opponents):
+                opponent_ranks.append(
+                    best_hand_rank_7((draw_buffer[offset], draw_buffer[offset + 1]), simulated_board)
+                )
+                offset += 2
+            if sampled:
+                profile.mark(PHASE_EVALUATE)
+            best_opponent_idx = -1
+            best_opponent_rank: Tuple[int, int] = (-1, 0)
+            for idx, rank in enumerate(opponent_ranks):
+                if rank > best_opponent_rank:
+                    best_opponent_idx, best_opponent_rank = idx, rank
+            if side_pots is not None:
+                side_pots.record([hero_rank] + opponent_ranks)
+            if hero_rank > best_opponent_rank:
+                wins += 1
+                breakdown.hero_win_category[hero_category] += 1
+                table.record_wins(0, 1)
+            elif hero_rank == best_opponent_rank:
+                ties += 1
+                breakdown.tie_category[hero_category] += 1
+                breakdown.tie_size[1 + opponent_ranks.count(hero_rank)] += 1
+                table.record([hero_rank] + opponent_ranks, hero_rank)
+                # O ranking só do board é caro; só interessa quando há empate.
+                if board_only_rank_value(simulated_board) == hero_rank:
+                    breakdown.board_only_ties += 1
+            else:
+                losses += 1
+                table.record([hero_rank] + opponent_ranks, best_opponent_rank)
+                if best_opponent_idx < known_count:
+                    hand_key = known_keys[best_opponent_idx]
+                else:
+                    offset = missing_board + 2 * (best_opponent_idx - known_count)
+                    hand_key = pack_hand(draw_buffer[offset], draw_buffer[offset + 1])
+                breakdown.record_loss(best_opponent_rank[0], best_opponent_idx, hand_key)
+            if sampled:
+                profile.mark(PHASE_COMPARE)
+            iterations += 1
+        profile.note_initial_rate(iterations, time.perf_counter() - start)
+    if wins != sum(breakdown.hero_win_category):
+        raise ValueError("Inconsistência ao contabilizar vitórias do Hero (MC).")
+    if losses != sum(breakdown.loss_category):
+        raise ValueError("Inconsistência ao contabilizar derrotas do Hero (MC).")
+    if ties != sum(breakdown.tie_category):
+        raise ValueError("Inconsistência ao contabilizar empates do Hero (MC).")
+    elapsed = time.perf_counter() - start
+    meta = {
+        "iterations": iterations,
+        "elapsed": elapsed,
+        "iter_per_sec": iterations / elapsed if elapsed > 0 else 0.0,
+        "time_budget": max_seconds,
+        "analysis_mode": True,
+        "profile": profile.summary(iterations),
+    }
+    result = EquityResult(
+        wins,
+        ties,
+        losses,
+        breakdown,
+        opponent_labels,
+        sampled=True,
+        mc_meta=meta,
+        table=table,
+        side_pots=side_pots,
+    )
+    return result, meta
+
+
+# Amostragem por importância (entropia cruzada): uma fase piloto uniforme mede, para
+# cada carta, a frequência do desfecho mais raro quando ela sai no runout; a proposta
+# mistura essa frequência com a uniforme (mistura defensiva limita a razão L).
+IS_PILOT_FRACTION = 0.25
+IS_DEFENSIVE_MIX = 0.5
+IS_RARE_THRESHOLD = 0.2
+# Cada amostra carrega L em unidades inteiras de 1/IS_WEIGHT_UNITS nos contadores.
+IS_WEIGHT_UNITS = 1 << 12
+
+
+def cross_entropy_card_weights(
+    deck: Sequence[Card], card_samples: Dict[Card, int], card_hits: Dict[Card, int], mix: float = IS_DEFENSIVE_MIX
+) -> Dict[Card, float]:
+    """Pesos de proposta: (1 - mix) + mix · taxa do evento raro com a carta / taxa média."""
+    rates = {card: card_hits.get(card, 0) / card_samples[card] for card in deck if card_samples.get(card)}
+    mean_rate = sum(rates.values()) / len(rates) if rates else 0.0
+    if mean_rate <= 0:
+        return {card: 1.0 for card in deck}
+    return {card: (1 - mix) + mix * rates.get(card, mean_rate) / mean_rate for card in deck}
+
+
+class ImportanceAccumulator:
+    """Somas do estimador por importância: L, L² e, por desfecho (vitória, empate, derrota), L e L².
+
+    ``counts`` são as somas de pesos inteiros (L em 1/IS_WEIGHT_UNITS) que viram
+    os contadores do ``EquityResult``; ``card_samples``/``card_hits`` (por posição
+    no baralho) alimentam a proposta depois da fase piloto.
+    """
+
+    __slots__ = (
+        "iterations",
+        "counts",
+        "weight_sum",
+        "weight_sq_sum",
+        "outcome_sums",
+        "outcome_sq_sums",
+        "card_samples",
+        "card_hits",
+    )
+
+    def __init__(self, deck_size: int) -> None:
+        self.iterations = 0
+        self.counts = [0, 0, 0]
+        self.weight_sum = 0.0
+        self.weight_sq_sum = 0.0
+        self.outcome_sums = [0.0, 0.0, 0.0]
+        self.outcome_sq_sums = [0.0, 0.0, 0.0]
+        self.card_samples = [0] * deck_size
+        self.card_hits = [[0] * deck_size for _ in range(3)]
+
+    def merge(self, other: "ImportanceAccumulator") -> None:
+        self.iterations += other.iterations
+        self.weight_sum += other.weight_sum
+        self.weight_sq_sum += other.weight_sq_sum
+        for outcome in range(3):
+            self.counts[outcome] += other.counts[outcome]
+            self.outcome_sums[outcome] += other.outcome_sums[outcome]
+            self.outcome_sq_sums[outcome] += other.outcome_sq_sums[outcome]
+            mine, theirs = self.card_hits[outcome], other.card_hits[outcome]
+            for idx, hits in enumerate(theirs):
+                mine[idx] += hits
+        for idx, samples in enumerate(other.card_samples):
+            self.card_samples[idx] += samples
+
+    def standard_errors(self) -> Dict[str, float]:
+        """Erro padrão do estimador autonormalizado pelo método delta."""
+        errors: Dict[str, float] = {}
+        for label, outcome_sum, outcome_sq_sum in zip(("win", "tie", "loss"), self.outcome_sums, self.outcome_sq_sums):
+            p = outcome_sum / self.weight_sum
+            variance = (outcome_sq_sum * (1 - 2 * p) + p * p * self.weight_sq_sum) / (self.weight_sum * self.weight_sum)
+            errors[label] = math.sqrt(max(0.0, variance))
+        return errors
+
+    def effective_samples(self) -> float:
+        """Tamanho efetivo de Kish, (ΣL)² / ΣL²: quantas amostras uniformes a estimativa vale."""
+        return self.weight_sum * self.weight_sum / self.weight_sq_sum if self.weight_sq_sum else 0.0
+
+
+def _importance_worker(
+    hero_cards: Tuple[Card, ...],
+    board_cards: Tuple[Card, ...],
+    num_opponents: int,
+    known_cards: Tuple[Tuple[Card, ...], ...],
+    deck: Tuple[Card, ...],
+    card_weights: Tuple[float, ...],
+    iterations: int,
+    seed: int,
+    track_cards: bool,
+    stacks: Optional[Tuple[int, ...]] = None,
+    deadline: Optional[float] = None,
+) -> Tuple[ImportanceAccumulator, "TableEquityAccumulator", Optional["SidePotAccumulator"], PhaseProfile]:
+    """Lote da amostragem por importância: board sorteado de ``card_weights`` (alinhados a ``deck``).
+
+    ``track_cards`` (fase piloto) conta, por carta do runout, as amostras e os
+    desfechos. ``deadline`` encerra o lote antes (caminho serial).
+    """
+    rng = random.Random(seed)
+    hero = list(hero_cards)
+    board_base = list(board_cards)
+    missing_board = 5 - len(board_base)
+    random_opponents = num_opponents - len(known_cards)
+    weight_of = dict(zip(deck, card_weights))
+    position = {card: idx for idx, card in enumerate(deck)}
+    total_weight = sum(card_weights)
+    sums = ImportanceAccumulator(len(deck))
+    table = TableEquityAccumulator(num_opponents, len(known_cards))
+    side_pots = SidePotAccumulator(stacks, lower_is_better=False) if stacks else None
+    profile = PhaseProfile()
+    for _ in range(iterations):
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        sampled = profile.sample()
+        remaining = list(deck)
+        remaining_weight = total_weight
+        likelihood = 1.0
+        board = list(board_base)
+        for _ in range(missing_board):
+            target = rng.random() * remaining_weight
+            for idx, card in enumerate(remaining):
+                target -= weight_of[card]
+                if target <= 0:
+                    break
+            card = remaining.pop(idx)
+            card_weight = weight_of[card]
+            # P_uniforme = 1 / n; P_proposta = w / W.
+            likelihood *= remaining_weight / ((len(remaining) + 1) * card_weight)
+            remaining_weight -= card_weight
+            board.append(card)
+        if sampled:
+            profile.mark(PHASE_DEAL_BOARD)
+        dealt = rng.sample(remaining, 2 * random_opponents)
+        if sampled:
+            profile.mark(PHASE_DEAL_OPPONENTS)
+        hero_rank = best_hand_rank_7(hero, board)
+        ranks = [hero_rank]
+        best_opponent_rank: Tuple[int, int] = (-1, 0)
+        for opp_cards in known_cards:
+            rank = best_hand_rank_7(opp_cards, board)
+            ranks.append(rank)
+            if rank > best_opponent_rank:
+                best_opponent_rank = rank
+        for idx in range(0, len(dealt), 2):
+            rank = best_hand_rank_7((dealt[idx], dealt[idx + 1]), board)
+            ranks.append(rank)
+            if rank > best_opponent_rank:
+                best_opponent_rank = rank
+        if sampled:
+            profile.mark(PHASE_EVALUATE)
+        weight = max(1, round(likelihood * IS_WEIGHT_UNITS))
+        if hero_rank > best_opponent_rank:
+            outcome = 0
+            table.record_wins(0, weight)
+        elif hero_rank == best_opponent_rank:
+            outcome = 1
+            table.record(ranks, hero_rank, weight)
+        else:
+            outcome = 2
+            table.record(ranks, best_opponent_rank, weight)
+        if side_pots is not None:
+            side_pots.record(ranks, weight)
+        sums.counts[outcome] += weight
+        if track_cards:
+            hits = sums.card_hits[outcome]
+            for card in board[len(board_base) :]:
+                sums.card_samples[position[card]] += 1
+                hits[position[card]] += 1
+        sums.weight_sum += likelihood
+        sums.weight_sq_sum += likelihood * likelihood
+        sums.outcome_sums[outcome] += likelihood
+        sums.outcome_sq_sums[outcome] += likelihood * likelihood
+        if sampled:
+            profile.mark(PHASE_COMPARE)
+        sums.iterations += 1
+    return sums, table, side_pots, profile
+
+
+def simulate_monte_carlo_importance(
+    hero_cards: Sequence[Card],
+    board_cards: Sequence[Card],
+    num_opponents: int,
+    time_budget: float,
+    known_opponents: Optional[Sequence[Sequence[Card]]] = None,
+    batch_size: int = 2000,
+    use_parallel: bool = False,
+    stacks: Optional[Sequence[int]] = None,
+) -> Tuple[EquityResult, Dict[str, object]]:
+    """Monte Carlo com amostragem por importância do runout, voltada ao desfecho mais raro.
+
+    Depois da fase piloto uniforme, se algum desfecho (em geral empate ou derrota
+    runner-runner) tem probabilidade abaixo de ``IS_RARE_THRESHOLD``, as cartas do
+    board passam a ser sorteadas sem reposição de ``cross_entropy_card_weights``;
+    as mãos dos oponentes continuam uniformes. Cada amostra pesa
+    L = P_uniforme / P_proposta, e as proporções são o estimador autonormalizado
+    sum(L·X) / sum(L), com erro padrão pelo método delta (IC correto para a razão
+    de verossimilhança). Os contadores do ``EquityResult`` (e os potes de
+    ``stacks``) são somas de pesos inteiros, não amostras: o tamanho que vale para
+    a precisão é ``effective_samples``. Com ``use_parallel`` os lotes das duas
+    fases rodam no pool compartilhado, como no Monte Carlo rápido.
+    """
+    hero_tuple = tuple(hero_cards)
+    board_tuple = tuple(board_cards)
+    known_cards, known_labels = normalize_known_opponents_entries(known_opponents)
+    flattened_known: List[Card] = []
+    for opp_cards in known_cards:
+        if len(opp_cards) != 2:
+            raise ValueError("Cada oponente conhecido deve possuir exatamente 2 cartas.")
+        flattened_known.extend(opp_cards)
+    deck = tuple(remove_known_cards(build_deck(), hero_tuple + board_tuple + tuple(flattened_known)))
+    missing_board = 5 - len(board_tuple)
+    random_opponents = num_opponents - len(known_cards)
+    if random_opponents < 0:
+        raise ValueError("Número de oponentes conhecidos maior que o total configurado.")
+    if missing_board + 2 * random_opponents > len(deck):
+        raise ValueError("Cartas insuficientes para completar a simulação.")
+    stacks = normalize_stacks(stacks, num_opponents)
+    known_tuple = tuple(tuple(cards) for cards in known_cards)
+    max_seconds = clamp_time_budget(time_budget)
+    batch_size = max(200, batch_size)
+    pool = get_monte_carlo_pool() if use_parallel else None
+    workers = getattr(pool, "_max_workers", 1) if pool else 1
+    rng = random.Random()
+    sums = ImportanceAccumulator(len(deck))
+    table = TableEquityAccumulator(num_opponents, len(known_cards))
+    side_pots = SidePotAccumulator(stacks, lower_is_better=False) if stacks else None
+    profile = PhaseProfile()
+    profile.workers = workers if pool else None
+    chunks = 0
+    start = time.perf_counter()
+
+    def run_phase(card_weights: Tuple[float, ...], track_cards: bool, phase_end: float) -> ImportanceAccumulator:
+        phase = ImportanceAccumulator(len(deck))
+
+        def collect(outcome: Tuple) -> None:
+            nonlocal chunks
+            chunk_sums, chunk_table, chunk_side_pots, chunk_profile = outcome
+            phase.merge(chunk_sums)
+            table.merge(chunk_table)
+            if side_pots is not None and chunk_side_pots is not None:
+                side_pots.merge(chunk_side_pots)
+            profile.merge(chunk_profile)
+            chunks += 1
+
+        arguments = (hero_tuple, board_tuple, num_opponents, known_tuple, deck, card_weights)
+        if pool:
+
+            def submit_one() -> Future:
+                return pool.submit(
+                    _importance_worker, *arguments, batch_size, rng.randrange(1, 1_000_000_000), track_cards, stacks
+                )
+
+            active = [submit_one() for _ in range(workers)]
+            while active:
+                future = next(as_completed(active))
+                active.remove(future)
+                collect(future.result())
+                if time.perf_counter() < phase_end:
+                    active.append(submit_one())
+        else:
+            while time.perf_counter() < phase_end:
+                collect(
+                    _importance_worker(
+                        *arguments, batch_size, rng.randrange(1, 1_000_000_000), track_cards, stacks, phase_end
+                    )
+                )
+        profile.note_initial_rate(sums.iterations + phase.iterations, time.perf_counter() - start)
+        return phase
+
+    uniform = (1.0,) * len(deck)
+    target_outcome: Optional[int] = None
+    if missing_board > 0:
+        pilot = run_phase(uniform, True, start + max_seconds * IS_PILOT_FRACTION)
+        sums.merge(pilot)
+        counts = pilot.counts
+        rarest = min(range(3), key=lambda outcome: counts[outcome] or float("inf"))
+        card_weights = uniform
+        if counts[rarest] and counts[rarest] < IS_RARE_THRESHOLD * sum(counts):
+            target_outcome = rarest
+            card_samples = dict(zip(deck, pilot.card_samples))
+            card_hits = dict(zip(deck, pilot.card_hits[rarest]))
+            proposal = cross_entropy_card_weights(deck, card_samples, card_hits)
+            card_weights = tuple(proposal[card] for card in deck)
+        sums.merge(run_phase(card_weights, False, start + max_seconds))
+    else:
+        sums.merge(run_phase(uniform, False, start + max_seconds))
+    elapsed = time.perf_counter() - start
+    iterations = sums.iterations
+    effective_samples = sums.effective_samples()
+    if pool:
+        profile_summary = profile.summary(iterations, parallel_backend=choose_parallel_backend(), chunks=chunks)
+    else:
+        profile_summary = profile.summary(iterations)
+    meta = {
+        "iterations": iterations,
+        "elapsed": elapsed,
+        "iter_per_sec": iterations / elapsed if elapsed > 0 else 0.0,
+        "time_budget": max_seconds,
+        "analysis_mode": False,
+        "profile": profile_summary,
+        "importance_sampling": True,
+        "importance_target": None if target_outcome is None else ("win", "tie", "loss")[target_outcome],
+        "effective_samples": effective_samples,
+        "weighted_counts": True,
+        "standard_errors": sums.standard_errors(),
+    }
+    result = EquityResult(
+        sums.counts[0],
+        sums.counts[1],
+        sums.counts[2],
+        opponent_labels=known_labels,
+        sampled=True,
+        mc_meta=meta,
+        table=table,
+        side_pots=side_pots,
+    )
+    return result, meta
+
+
+def _mc_curve_worker(
+    hero_cards: Tuple[Card, ...],
+    board_cards: Tuple[Card, ...],
+    max_opponents: int,
+    deck_remaining: Tuple[Card, ...],
+    iterations: int,
+    seed: int,
+) -> Tuple[List[int], List[int], List[int], PhaseProfile]:
+    """Lote da curva: vitórias, empates e fração de pote (SHARE_UNITS) do Hero contra os k primeiros oponentes.
+
+    No perfil, cada oponente soma a própria avaliação em ``evaluate`` (a do Hero
+    entra junto com a do primeiro) e a comparação em ``compare``. Como a
+    iteração para quando o Hero perde, só os oponentes avaliados são medidos.
+    """
+    rng = random.Random(seed)
+    hero = list(hero_cards)
+    board_base = list(board_cards)
+    missing_board = 5 - len(board_base)
+    board_buffer = board_base + [0] * missing_board
+    base_len = len(board_base)
+    deck_buffer = list(deck_remaining)
+    wins = [0] * max_opponents
+    ties = [0] * max_opponents
+    tie_shares = [0] * max_opponents
+    profile = PhaseProfile()
+    for _ in range(iterations):
+        sampled = profile.sample()
+        rng.shuffle(deck_buffer)
+        for idx in range(missing_board):
+            board_buffer[base_len + idx] = deck_buffer[idx]
+        if sampled:
+            profile.mark(PHASE_DEAL_BOARD)
+        hero_rank = best_hand_rank_7(hero, board_buffer)
+        tied = 0
+        offset = missing_board
+        for opponents in range(max_opponents):
+            rank = best_hand_rank_7((deck_buffer[offset], deck_buffer[offset + 1]), board_buffer)
+            offset += 2
+            if sampled:
+                profile.mark(PHASE_EVALUATE)
+            if rank > hero_rank:
+                # Perdeu para os k primeiros: perde também com qualquer oponente a mais.
+                break
+            if rank == hero_rank:
+                tied += 1
+            if tied:
+                ties[opponents] += 1
+                tie_shares[opponents] += SHARE_UNITS // (tied + 1)
+            else:
+                wins[opponents] += 1
+            if sampled:
+                profile.mark(PHASE_COMPARE)
+        if sampled:
+            profile.mark(PHASE_COMPARE)
+    return wins, ties, tie_shares, profile
+
+
+def simulate_opponent_curve(
+    hero_cards: Sequence[Card],
+    board_cards: Sequence[Card],
+    max_opponents: int,
+    time_budget: float,
+    batch_size: int = 2000,
+    use_parallel: bool = False,
+) -> Tuple["OpponentCurve", Dict[str, object]]:
+    """Equity contra 1..N oponentes aleatórios numa única simulação.
+
+    Cada iteração distribui N mãos uma vez; o resultado com k oponentes usa as
+    k primeiras (prefixos aninhados), então a curva inteira custa no máximo o
+    mesmo que a simulação com N (menos, pois a iteração para quando o Hero perde).
+    """
+    hero_tuple = tuple(hero_cards)
+    board_tuple = tuple(board_cards)
+    if max_opponents < 1:
+        raise ValueError("A curva precisa de pelo menos 1 oponente.")
+    deck = tuple(remove_known_cards(build_deck(), hero_tuple + board_tuple))
+    if 5 - len(board_tuple) + 2 * max_opponents > len(deck):
+        raise ValueError("Cartas insuficientes para completar a simulação.")
+    max_seconds = clamp_time_budget(time_budget)
+    batch_size = max(200, batch_size)
+    wins = [0] * max_opponents
+    ties = [0] * max_opponents
+    tie_shares = [0] * max_opponents
+    profile = PhaseProfile()
+    iterations = 0
+    start = time.perf_counter()
+    pool = get_monte_carlo_pool() if use_parallel else None
+    if pool:
+        profile.workers = getattr(pool, "_max_workers", None)
+        rng = random.Random()
+
+        def submit_one() -> Future:
+            seed = rng.randrange(1, 1_000_000_000)
+            return pool.submit(_mc_curve_worker, hero_tuple, board_tuple, max_opponents, deck, batch_size, seed)
+
+        active = [submit_one() for _ in range(getattr(pool, "_max_workers", os.cpu_count() or 1))]
+        while active:
+            future = next(as_completed(active))
+            active.remove(future)
+            chunk_wins, chunk_ties, chunk_shares, chunk_profile = future.result()
+            for idx in range(max_opponents):
+                wins[idx] += chunk_wins[idx]
+                ties[idx] += chunk_ties[idx]
+                tie_shares[idx] += chunk_shares[idx]
+            profile.merge(chunk_profile)
+            iterations += batch_size
+            profile.note_initial_rate(iterations, time.perf_counter() - start)
+            if time.perf_counter() - start < max_seconds:
+                active.append(submit_one())
+    else:
+        # Lotes pequenos no processo atual para respeitar o orçamento de tempo.
+        batch_size = 200
+        seed = random.randrange(1, 1_000_000_000)
+        while time.perf_counter() - start < max_seconds:
+            chunk_wins, chunk_ties, chunk_shares, chunk_profile = _mc_curve_worker(
+                hero_tuple, board_tuple, max_opponents, deck, batch_size, seed
+            )
+            seed += 1
+            for idx in range(max_opponents):
+                wins[idx] += chunk_wins[idx]
+                ties[idx] += chunk_ties[idx]
+                tie_shares[idx] += chunk_shares[idx]
+            profile.merge(chunk_profile)
+            iterations += batch_size
+            profile.note_initial_rate(iterations, time.perf_counter() - start)
+    elapsed = time.perf_counter() - start
+    meta = {
+        "iterations": iterations,
+        "elapsed": elapsed,
+        "iter_per_sec": iterations / elapsed if elapsed > 0 else 0.0,
+        "time_budget": max_seconds,
+        "analysis_mode": False,
+        "profile": profile.summary(iterations),
+        "opponent_curve": max_opponents,
+    }
+    curve = OpponentCurve(
+        [
+            EquityResult(wins[idx], ties[idx], iterations - wins[idx] - ties[idx], sampled=True, mc_meta=meta)
+            for idx in range(max_opponents)
+        ],
+        tie_shares,
+        meta,
+    )
+    return curve, meta
+
+
+class OpponentCurve:
+    """Resultados da curva de equity por número de oponentes (índice k-1), guardados na sessão."""
+
+    __slots__ = ("results", "tie_shares", "meta")
+
+    def __init__(self, results: List[EquityResult], tie_shares: List[int], meta: Dict[str, object]) -> None:
+        self.results = results
+        self.tie_shares = tie_shares
+        self.meta = meta
+
+    def rows(self) -> List[Dict[str, object]]:
+        """Linhas da curva (1..N oponentes) com equity de pote e IC95% de vitória."""
+        rows = []
+        for idx, result in enumerate(self.results):
+            total = result.total
+            ci = _compute_confidence_intervals(result.wins, result.ties, result.losses, total)
+            rows.append(
+                {
+                    "opponents": idx + 1,
+                    "win_pct": result.wins / total * 100,
+                    "tie_pct": result.ties / total * 100,
+                    "equity_pct": (result.wins * SHARE_UNITS + self.tie_shares[idx]) / (total * SHARE_UNITS) * 100,
+                    "ci95_win": {"low": ci["win"]["low"], "high": ci["win"]["high"]},
+                }
+            )
+        return rows
+
+
+class HandGridAccumulator:
+    """Contadores por combo do Hero (índice em ``combos(range(52), 2)``) do mapa de mãos.
+
+    ``shares`` guarda vitórias + frações de pote divididas em unidades de SHARE_UNITS.
+    """
+
+    __slots__ = ("wins", "ties", "shares", "samples")
+
+    def __init__(self) -> None:
+        self.wins = [0] * PREFLOP_HAND_COUNT
+        self.ties = [0] * PREFLOP_HAND_COUNT
+        self.shares = [0] * PREFLOP_HAND_COUNT
+        self.samples = [0] * PREFLOP_HAND_COUNT
+
+    def merge(self, other: "HandGridAccumulator") -> None:
+        for mine, theirs in (
+            (self.wins, other.wins),
+            (self.ties, other.ties),
+            (self.shares, other.shares),
+            (self.samples, other.samples),
+        ):
+            for idx, count in enumerate(theirs):
+                mine[idx] += count
+
+
+def _hand_grid_worker(
+    board_cards: Tuple[Card, ...],
+    num_opponents: int,
+    iterations: int,
+    seed: int,
+    hand_indices: Optional[Tuple[int, ...]] = None,
+) -> Tuple[HandGridAccumulator, PhaseProfile]:
+    """Lote do mapa de mãos: cada amostra (runout + mãos dos oponentes) vale para todos os combos do Hero.
+
+    Todas as mãos de 2 cartas são avaliadas uma vez por amostra com o avaliador por
+    tabela; combos que colidem com as cartas sorteadas ficam de fora da amostra
+    (rejeição), o que mantém a distribuição condicional correta para cada combo.
+    ``hand_indices`` restringe os combos avaliados (ex.: lote de pedidos do serviço HTTP).
+    No perfil, a avaliação de cada combo do Hero entra em ``compare`` (mesmo laço da comparação).
+    """
+    unsuited, flushes, _ = _seven_card_tables()
+    rng = random.Random(seed)
+    position = _deck_positions()
+    deck_cards = build_deck()
+    deck = [card for card in deck_cards if card not in board_cards]
+    board = list(board_cards)
+    missing_board = 5 - len(board)
+    dealt = missing_board + 2 * num_opponents
+    grid = HandGridAccumulator()
+    hands = preflop_hands()
+    # Por combo vivo: índice, posições no baralho, cartas, produto dos primos e nibbles de naipe.
+    live_hands = [
+        (
+            hand_idx,
+            a,
+            b,
+            deck_cards[a],
+            deck_cards[b],
+            (deck_cards[a] & 0xFF) * (deck_cards[b] & 0xFF),
+            SUIT_NIBBLE[(deck_cards[a] >> 12) & 0xF] + SUIT_NIBBLE[(deck_cards[b] >> 12) & 0xF],
+        )
+        for hand_idx, (a, b) in enumerate(hands)
+        if deck_cards[a] not in board_cards
+        and deck_cards[b] not in board_cards
+        and (hand_indices is None or hand_idx in hand_indices)
+    ]
+
+    def board_state(full_board: List[Card]) -> Tuple[int, int]:
+        product = 1
+        suit_counts = 0
+        for card in full_board:
+            product *= card & 0xFF
+            suit_counts += SUIT_NIBBLE[(card >> 12) & 0xF]
+        return product, suit_counts
+
+    def hand_value(card_a: Card, card_b: Card, product: int, suit_counts: int, cards: List[Card]) -> int:
+        suit_counts += SUIT_NIBBLE[(card_a >> 12) & 0xF] + SUIT_NIBBLE[(card_b >> 12) & 0xF]
+        value = unsuited[product * (card_a & 0xFF) * (card_b & 0xFF)]
+        if (suit_counts + FLUSH_CARRY) & FLUSH_MASK:
+            value = min(value, _flush_value(cards + [card_a, card_b], suit_counts, flushes))
+        return value
+
+    # No river os valores do Hero não dependem da amostra: calculados uma vez.
+    river_values: Optional[List[int]] = None
+    if not missing_board:
+        product, suit_counts = board_state(board)
+        river_values = [hand_value(hand[3], hand[4], product, suit_counts, board) for hand in live_hands]
+    profile = PhaseProfile()
+    for _ in range(iterations):
+        sampled = profile.sample()
+        rng.shuffle(deck)
+        full_board = board + deck[:missing_board]
+        product, suit_counts = board_state(full_board)
+        if sampled:
+            profile.mark(PHASE_DEAL_BOARD)
+        used = {position[card] for card in deck[:dealt]}
+        if sampled:
+            profile.mark(PHASE_DEAL_OPPONENTS)
+        opponent_values = [
+            hand_value(deck[idx], deck[idx + 1], product, suit_counts, full_board)
+            for idx in range(missing_board, dealt, 2)
+        ]
+        if sampled:
+            profile.mark(PHASE_EVALUATE)
+        best_opponent_value = min(opponent_values)
+        tie_share = SHARE_UNITS // (1 + opponent_values.count(best_opponent_value))
+        for live_idx, (hand_idx, a, b, card_a, card_b, hand_product, hand_suits) in enumerate(live_hands):
+            if a in used or b in used:
+                continue
+            if river_values is not None:
+                hero_value = river_values[live_idx]
+            elif (suit_counts + hand_suits + FLUSH_CARRY) & FLUSH_MASK:
+                hero_value = hand_value(card_a, card_b, product, suit_counts, full_board)
+            else:
+                hero_value = unsuited[product * hand_product]
+            grid.samples[hand_idx] += 1
+            if hero_value < best_opponent_value:
+                grid.wins[hand_idx] += 1
+                grid.shares[hand_idx] += SHARE_UNITS
+            elif hero_value == best_opponent_value:
+                grid.ties[hand_idx] += 1
+                grid.shares[hand_idx] += tie_share
+        if sampled:
+            profile.mark(PHASE_COMPARE)
+    return grid, profile
+
+
+def simulate_hand_grid(
+    board_cards: Sequence[Card],
+    num_opponents: int,
+    time_budget: float,
+    batch_size: int = 200,
+    use_parallel: bool = False,
+) -> Tuple[HandGridAccumulator, Dict[str, object]]:
+    """Equity de todos os combos do Hero num board contra oponentes aleatórios.
+
+    Com a base de flops disponível os valores vêm dela; senão, uma simulação
+    compartilhada entre os combos (runout e oponentes sorteados uma vez por amostra).
+    """
+    board_tuple = tuple(board_cards)
+    if len(board_tuple) not in (3, 4, 5):
+        raise ValueError("O mapa de mãos precisa de um board com 3 a 5 cartas.")
+    if len(set(board_tuple)) != len(board_tuple):
+        raise ValueError("Existem cartas duplicadas na mesa.")
+    if num_opponents < 1 or 5 - len(board_tuple) + 2 * num_opponents > 52 - len(board_tuple) - 2:
+        raise ValueError("Número de oponentes inválido para o mapa de mãos.")
+    start = time.perf_counter()
+    database = get_flop_equity_db() if len(board_tuple) == 3 else None
+    if database is not None and database.has(canonicalize_flop(board_tuple)[0], num_opponents):
+        deck_cards = build_deck()
+        grid = HandGridAccumulator()
+        for hand_idx, (a, b) in enumerate(preflop_hands()):
+            hero = (deck_cards[a], deck_cards[b])
+            if hero[0] in board_tuple or hero[1] in board_tuple:
+                continue
+            wins, ties, tie_shares, total = database.lookup(hero, board_tuple, num_opponents)
+            grid.wins[hand_idx] = wins
+            grid.ties[hand_idx] = ties
+            grid.samples[hand_idx] = total
+            grid.shares[hand_idx] = wins * SHARE_UNITS + tie_shares
+        meta = {"elapsed": time.perf_counter() - start, "source": "flop_db", "iterations": 0}
+        return grid, meta
+
+    max_seconds = clamp_time_budget(time_budget)
+    grid, iterations, profile = _sample_hand_grid(board_tuple, num_opponents, max_seconds, batch_size, use_parallel)
+    elapsed = time.perf_counter() - start
+    meta = {
+        "elapsed": elapsed,
+        "source": "monte_carlo",
+        "iterations": iterations,
+        "iter_per_sec": iterations / elapsed if elapsed > 0 else 0.0,
+        "profile": profile.summary(iterations),
+    }
+    return grid, meta
+
+
+def _sample_hand_grid(
+    board_tuple: Tuple[Card, ...],
+    num_opponents: int,
+    max_seconds: float,
+    batch_size: int,
+    use_parallel: bool,
+    hand_indices: Optional[Tuple[int, ...]] = None,
+) -> Tuple[HandGridAccumulator, int, PhaseProfile]:
+    """Roda lotes de ``_hand_grid_worker`` (no pool, se houver) até ``max_seconds``; retorna (grade, amostras, perfil)."""
+    start = time.perf_counter()
+    grid = HandGridAccumulator()
+    profile = PhaseProfile()
+    iterations = 0
+    pool = get_monte_carlo_pool() if use_parallel else None
+    if pool:
+        profile.workers = getattr(pool, "_max_workers", None)
+        rng = random.Random()
+
+        def submit_one() -> Future:
+            seed = rng.randrange(1, 1_000_000_000)
+            return pool.submit(_hand_grid_worker, board_tuple, num_opponents, batch_size, seed, hand_indices)
+
+        active = [submit_one() for _ in range(getattr(pool, "_max_workers", os.cpu_count() or 1))]
+        while active:
+            future = next(as_completed(active))
+            active.remove(future)
+            chunk_grid, chunk_profile = future.result()
+            grid.merge(chunk_grid)
+            profile.merge(chunk_profile)
+            iterations += batch_size
+            profile.note_initial_rate(iterations, time.perf_counter() - start)
+            if time.perf_counter() - start < max_seconds:
+                active.append(submit_one())
+    else:
+        seed = random.randrange(1, 1_000_000_000)
+        chunk = max(1, batch_size // 4)
+        while time.perf_counter() - start < max_seconds:
+            chunk_grid, chunk_profile = _hand_grid_worker(board_tuple, num_opponents, chunk, seed, hand_indices)
+            grid.merge(chunk_grid)
+            profile.merge(chunk_profile)
+            seed += 1
+            iterations += chunk
+            profile.note_initial_rate(iterations, time.perf_counter() - start)
+    return grid, iterations, profile
+
+
+def simulate_board_batch(
+    board_cards: Sequence[Card],
+    num_opponents: int,
+    hero_hands: Sequence[Sequence[Card]],
+    time_budget: float,
+    batch_size: int = 200,
+    use_parallel: bool = False,
+) -> Tuple[List[EquityResult], Dict[str, object]]:
+    """Monte Carlo de várias mãos do Hero no mesmo board contra oponentes aleatórios, num só passe.
+
+    Runout e mãos dos oponentes são sorteados uma vez por amostra e valem para
+    todas as mãos pedidas (mesmo kernel do mapa de mãos). ``time_budget`` não tem
+    piso aqui: pedidos pequenos do serviço usam frações de segundo.
+    """
+    board_tuple = tuple(board_cards)
+    if len(board_tuple) > 5 or len(set(board_tuple)) != len(board_tuple):
+        raise ValueError("A mesa deve ter de 0 a 5 cartas distintas.")
+    if num_opponents < 1 or 5 - len(board_tuple) + 2 * num_opponents > 50 - len(board_tuple):
+        raise ValueError("Número de oponentes inválido.")
+    hand_index = _preflop_hand_index()
+    position = _deck_positions()
+    indices = []
+    for hero in hero_hands:
+        if len(hero) != 2 or len(set(hero)) != 2 or set(hero) & set(board_tuple):
+            raise ValueError("Cada Hero precisa de 2 cartas distintas fora da mesa.")
+        indices.append(hand_index[tuple(sorted(position[card] for card in hero))])
+    start = time.perf_counter()
+    grid, iterations, profile = _sample_hand_grid(
+        board_tuple, num_opponents, clamp_time_budget(time_budget), batch_size, use_parallel, tuple(set(indices))
+    )
+    elapsed = time.perf_counter() - start
+    summary = profile.summary(iterations)
+    results = []
+    for hand_idx in indices:
+        samples = grid.samples[hand_idx]
+        if samples <= 0:
+            raise ValueError("Tempo insuficiente para amostrar todas as mãos do lote.")
+        meta = {
+            "iterations": samples,
+            "elapsed": elapsed,
+            "iter_per_sec": iterations / elapsed if elapsed > 0 else 0.0,
+            "time_budget": time_budget,
+            "analysis_mode": False,
+            "profile": summary,
+            "batched_heroes": len(set(indices)),
+        }
+        wins, ties = grid.wins[hand_idx], grid.ties[hand_idx]
+        results.append(EquityResult(wins, ties, samples - wins - ties, sampled=True, mc_meta=meta))
+    return results, {"elapsed": elapsed, "iterations": iterations, "heroes": len(set(indices))}
+
+
+def build_hand_grid(grid: HandGridAccumulator) -> List[List[Optional[float]]]:
+    """Grade 13x13 (linha/coluna 0 = A) com a equity média (%) dos combos de cada célula.
+
+    Suited acima da diagonal, offsuit abaixo; células sem combos vivos ficam None.
+    """
+    totals = [0.0] * 169
+    counts = [0] * 169
+    for hand_idx, (a, b) in enumerate(preflop_hands()):
+        samples = grid.samples[hand_idx]
+        if samples <= 0:
+            continue
+        cell = preflop_class_index(a, b)
+        totals[cell] += grid.shares[hand_idx] / (samples * SHARE_UNITS) * 100
+        counts[cell] += 1
+    cells: List[List[Optional[float]]] = []
+    for row in range(12, -1, -1):
+        # preflop_class_index: suited em [alta][baixa], offsuit em [baixa][alta].
+        cells.append(
+            [
+                totals[row * 13 + col] / counts[row * 13 + col] if counts[row * 13 + col] else None
+                for col in range(12, -1, -1)
+            ]
+        )
+    return cells
+
+
+def hand_grid_label(row: int, col: int) -> str:
+    """Rótulo da célula da grade exibida (ex.: AKs acima da diagonal, AKo abaixo)."""
+    high = RANK_SYMBOLS[12 - min(row, col)]
+    low = RANK_SYMBOLS[12 - max(row, col)]
+    if row == col:
+        return high + low
+    return f"{high}{low}{'s' if row < col else 'o'}"
+
+
+@dataclass(frozen=True)
+class HandPotential:
+    """Força da mão e potencial (Billings et al.) do Hero contra uma mão aleatória.
+
+    Frações em [0, 1]: ``hand_strength`` no board atual, ``positive_potential`` =
+    chance de passar à frente estando atrás/empatado, ``negative_potential`` = chance
+    de ficar para trás estando à frente/empatado, até o river.
+    """
+
+    hand_strength: float
+    positive_potential: float
+    negative_potential: float
+    effective_strength: float
+    opponent_hands: int
+    runouts: int
+
+
+@lru_cache(maxsize=256)
+def compute_hand_potential(
+    hero_cards: Tuple[Card, ...], board_cards: Tuple[Card, ...], dead_cards: Tuple[Card, ...] = ()
+) -> HandPotential:
+    """HS, PPot, NPot e EHS exatos no flop ou turn, numa única enumeração.
+
+    Cada mão do oponente é classificada uma vez no board atual (à frente/empate/atrás);
+    depois, para cada runout até o river, o board é preparado uma vez e cada mão
+    viva custa uma consulta de tabela. ``dead_cards`` (ex.: mãos conhecidas) saem do baralho.
+    """
+    if len(hero_cards) != 2 or len(board_cards) not in (3, 4):
+        raise ValueError("HS/PPot/NPot exigem 2 cartas do Hero e flop ou turn na mesa.")
+    unsuited, flushes, _ = _seven_card_tables()
+    used = set(hero_cards) | set(board_cards) | set(dead_cards)
+    deck = [card for card in build_deck() if card not in used]
+    board = list(board_cards)
+    missing_board = 5 - len(board)
+    # Por mão do oponente: cartas, produto dos primos e nibbles de naipe.
+    opponents = [
+        (
+            card_a,
+            card_b,
+            (card_a & 0xFF) * (card_b & 0xFF),
+            SUIT_NIBBLE[(card_a >> 12) & 0xF] + SUIT_NIBBLE[(card_b >> 12) & 0xF],
+        )
+        for card_a, card_b in combos(deck, 2)
+    ]
+    hero_now = EVALUATOR.evaluate(board, list(hero_cards))
+    # 0 = Hero à frente, 1 = empate, 2 = Hero atrás (menor valor = mão melhor).
+    states = []
+    for card_a, card_b, _, _ in opponents:
+        opponent_now = EVALUATOR.evaluate(board, [card_a, card_b])
+        states.append(0 if hero_now < opponent_now else 1 if hero_now == opponent_now else 2)
+    state_totals = [states.count(state) for state in range(3)]
+    transitions = [[0, 0, 0] for _ in range(3)]
+    runouts = 0
+    for runout in combos(deck, missing_board):
+        runouts += 1
+        full_board = board + list(runout)
+        product = 1
+        suit_counts = 0
+        for card in full_board:
+            product *= card & 0xFF
+            suit_counts += SUIT_NIBBLE[(card >> 12) & 0xF]
+        hero_product = product * (hero_cards[0] & 0xFF) * (hero_cards[1] & 0xFF)
+        hero_suits = suit_counts
+        for card in hero_cards:
+            hero_suits += SUIT_NIBBLE[(card >> 12) & 0xF]
+        hero_final = unsuited[hero_product]
+        if (hero_suits + FLUSH_CARRY) & FLUSH_MASK:
+            hero_final = min(hero_final, _flush_value(full_board + list(hero_cards), hero_suits, flushes))
+        for (card_a, card_b, hand_product, hand_suits), state in zip(opponents, states):
+            if card_a in runout or card_b in runout:
+                continue
+            opponent_final = unsuited[product * hand_product]
+            if (suit_counts + hand_suits + FLUSH_CARRY) & FLUSH_MASK:
+                opponent_final = min(
+                    opponent_final, _flush_value(full_board + [card_a, card_b], suit_counts + hand_suits, flushes)
+                )
+            row = transitions[state]
+            if hero_final < opponent_final:
+                row[0] += 1
+            elif hero_final == opponent_final:
+                row[1] += 1
+            else:
+                row[2] += 1
+    ahead, tied, behind = state_totals
+    hand_strength = (ahead + tied / 2) / len(opponents)
+    # Cada mão do oponente vê o mesmo número de runouts (C(n - 2, faltantes)).
+    per_hand = math.comb(len(deck) - 2, missing_board)
+    behind_base = per_hand * (behind + tied / 2)
+    ahead_base = per_hand * (ahead + tied / 2)
+    positive = (
+        (transitions[2][0] + transitions[2][1] / 2 + transitions[1][0] / 2) / behind_base if behind_base else 0.0
+    )
+    negative = (
+        (transitions[0][2] + transitions[1][2] / 2 + transitions[0][1] / 2) / ahead_base if ahead_base else 0.0
+    )
+    return HandPotential(
+        hand_strength=hand_strength,
+        positive_potential=positive,
+        negative_potential=negative,
+        effective_strength=hand_strength * (1 - negative) + (1 - hand_strength) * positive,
+        opponent_hands=len(opponents),
+        runouts=runouts,
+    )
+
+
+def run_equity_calculation(
+    hero_cards: Sequence[Card],
+    board_cards: Sequence[Card],
+    num_opponents: int,
+    known_opponents: Optional[Sequence[Sequence[Card]]],
+    equity_method: EquityMethod,
+    time_budget: float,
+    analysis_mode: bool,
+    use_parallel: bool,
+    batch_size: int = 1500,
+    stacks: Optional[Sequence[int]] = None,
+    importance_sampling: bool = False,
+) -> Tuple[EquityResult, Dict[str, object]]:
+    """Executa o método escolhido e retorna (resultado compacto, meta), registrando as métricas do cálculo.
+
+    ``stacks`` (all-in do modo torneio) só chega aos métodos usados com todos os
+    oponentes conhecidos: exato, matriz heads-up, Monte Carlo e amostragem por importância.
+    ``importance_sampling`` troca o Monte Carlo rápido pela amostragem por importância.
+    """
+    start = time.perf_counter()
+    result, meta = _dispatch_equity_method(
+        hero_cards,
+        board_cards,
+        num_opponents,
+        known_opponents,
+        equity_method,
+        time_budget,
+        analysis_mode,
+        use_parallel,
+        batch_size,
+        stacks,
+        importance_sampling,
+    )
+    iterations = int(meta.get("iterations") or result.total)  # type: ignore[arg-type]
+    record_calculation(equity_method, iterations, time.perf_counter() - start)
+    return result, meta
+
+
+def _dispatch_equity_method(
+    hero_cards: Sequence[Card],
+    board_cards: Sequence[Card],
+    num_opponents: int,
+    known_opponents: Optional[Sequence[Sequence[Card]]],
+    equity_method: EquityMethod,
+    time_budget: float,
+    analysis_mode: bool,
+    use_parallel: bool,
+    batch_size: int = 1500,
+    stacks: Optional[Sequence[int]] = None,
+    importance_sampling: bool = False,
+) -> Tuple[EquityResult, Dict[str, object]]:
+    if equity_method == "PRECOMPUTED":
+        if board_cards:
+            found = lookup_flop_equity(hero_cards, board_cards, num_opponents)
+        else:
+            found = lookup_preflop_matchup(hero_cards, known_opponents, num_opponents)
+        if found is None:
+            raise ValueError("Cenário ausente das tabelas pré-calculadas.")
+        result, meta = found
+        stacks = normalize_stacks(stacks, num_opponents)
+        if stacks and result.table is not None:
+            result.side_pots = SidePotAccumulator.from_table(stacks, result.table)
+        return result, meta
+    if equity_method == "EXACT":
+        exact_start = time.perf_counter()
+        result = simulate_exact(
+            tuple(hero_cards),
+            tuple(board_cards),
+            num_opponents,
+            known_opponents,
+            use_parallel=use_parallel,
+            stacks=stacks,
+        )
+        return result, {"elapsed": time.perf_counter() - exact_start}
+    if equity_method == "STRATIFIED":
+        result, meta = simulate_stratified_runouts(
+            tuple(hero_cards),
+            tuple(board_cards),
+            num_opponents,
+            time_budget,
+            known_opponents,
+            use_parallel=use_parallel,
+        )
+    elif equity_method == "ANYTIME":
+        result, meta = simulate_exact_anytime(
+            tuple(hero_cards),
+            tuple(board_cards),
+            num_opponents,
+            time_budget,
+            known_opponents,
+            use_parallel=use_parallel,
+        )
+    elif importance_sampling and not analysis_mode:
+        result, meta = simulate_monte_carlo_importance(
+            tuple(hero_cards),
+            tuple(board_cards),
+            num_opponents,
+            time_budget,
+            known_opponents,
+            batch_size=batch_size,
+            use_parallel=use_parallel,
+            stacks=stacks,
+        )
+    else:
+        result, meta = simulate_monte_carlo(
+            tuple(hero_cards),
+            tuple(board_cards),
+            num_opponents,
+            time_budget,
+            known_opponents,
+            batch_size=batch_size,
+            collect_breakdown=analysis_mode,
+            use_parallel=use_parallel and not analysis_mode,
+            stacks=stacks,
+        )
+    # Os métodos amostrados avaliam mãos pelo backend escolhido (nos workers, o de cada processo).
+    meta["evaluator"] = get_evaluator_backend().meta()
+    return result, meta
+
+
+# Pré-cálculo especulativo da próxima street
+# Tarefas especulativas no pool (na fila dele ou rodando) por worker, somando todas as sessões do processo.
+SPECULATIVE_IN_FLIGHT_PER_WORKER = 2
+# Menor orçamento de tempo de uma carta especulativa (s).
+SPECULATIVE_MIN_CARD_BUDGET = 0.05
+# Nos workers especulativos: ticket vigente de cada slot (memória compartilhada com o app).
+_SPECULATIVE_TICKETS: Optional[Sequence[int]] = None
+
+
+def _init_speculative_worker(tickets: Sequence[int]) -> None:
+    """Initializer dos workers especulativos: guarda os tickets e cede CPU para os cálculos do usuário."""
+    global _SPECULATIVE_TICKETS
+    _SPECULATIVE_TICKETS = tickets
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+class SpeculativeScheduler:
+    """Fila única do pré-cálculo especulativo, com no máximo ``max_in_flight`` tarefas no pool.
+
+    Cada sessão agenda até 46 cartas; só entram no pool tantas quantas há slots
+    livres, e as demais esperam aqui (onde descartar é de graça). Cada tarefa no
+    pool leva o slot e um ticket gravado em ``tickets`` (memória compartilhada);
+    ``discard`` zera os tickets da especulação e o worker que recebe um ticket
+    vencido retorna sem calcular. Uma tarefa que já começou vai até o fim do
+    próprio orçamento de tempo (``clamp_time_budget``).
+    """
+
+    __slots__ = ("pool", "workers", "max_in_flight", "tickets", "_free", "_pending", "_lock", "_last_ticket")
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self.max_in_flight = workers * SPECULATIVE_IN_FLIGHT_PER_WORKER
+        self.tickets = multiprocessing.Array("q", self.max_in_flight, lock=False)
+        self.pool = InstrumentedExecutor(
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_speculative_worker, initargs=(self.tickets,)),
+            "speculative",
+        )
+        self._free = list(range(self.max_in_flight))
+        self._pending: Deque[Tuple["NextStreetSpeculation", Card]] = deque()
+        self._lock = threading.Lock()
+        self._last_ticket = 0
+
+    def schedule(self, speculation: "NextStreetSpeculation") -> None:
+        with self._lock:
+            self._pending.extend((speculation, card) for card in speculation.cards)
+        self._drain()
+
+    def discard(self, speculation: "NextStreetSpeculation") -> None:
+        """Tira da fila as cartas ainda não enviadas e vence os tickets das que estão no pool."""
+        with self._lock:
+            self._pending = deque(item for item in self._pending if item[0] is not speculation)
+            for slot, ticket in speculation.tickets.values():
+                if self.tickets[slot] == ticket:
+                    self.tickets[slot] = 0
+
+    def in_flight(self) -> int:
+        return self.max_in_flight - len(self._free)
+
+    def _drain(self) -> None:
+        while True:
+            with self._lock:
+                if not self._free or not self._pending:
+                    return
+                speculation, card = self._pending.popleft()
+                slot = self._free.pop()
+                self._last_ticket += 1
+                ticket = self._last_ticket
+                self.tickets[slot] = ticket
+                speculation.tickets[card] = (slot, ticket)
+            future = self.pool.submit(_speculative_next_card_worker, *speculation.worker_args(card), slot, ticket)
+            speculation.futures[card] = future
+            future.add_done_callback(lambda _, slot=slot: self._release(slot))
+
+    def _release(self, slot: int) -> None:
+        with self._lock:
+            self._free.append(slot)
+        self._drain()
+
+
+@metered_cache(st.cache_resource(show_spinner=False), "get_speculative_scheduler")
+def get_speculative_scheduler() -> Optional[SpeculativeScheduler]:
+    """Pool de baixa prioridade (e sua fila) usado apenas para o pré-cálculo da próxima carta.
+
+    Só com o backend de processos: a prioridade reduzida vale por processo, e em
+    threads ou sub-interpretadores o pré-cálculo disputaria os núcleos do usuário.
+    """
+    workers = (os.cpu_count() or 1) - 1
+    if workers < 1 or choose_parallel_backend() != "process":
+        return None
+    return SpeculativeScheduler(workers)
+
+
+def _speculative_next_card_worker(
+    hero_cards: Tuple[Card, ...],
+    board_cards: Tuple[Card, ...],
+    num_opponents: int,
+    known_opponents: Optional[Tuple[Tuple[int, Tuple[Card, Card]], ...]],
+    time_budget: float,
+    analysis_mode: bool,
+    stacks: Optional[Tuple[int, ...]] = None,
+    card_budget: Optional[float] = None,
+    slot: Optional[int] = None,
+    ticket: int = 0,
+) -> Optional[Tuple[str, EquityResult, Dict[str, object]]]:
+    """Calcula o cenário de uma carta futura como o main() calcularia.
+
+    O método é planejado com o orçamento interativo (``time_budget``), para
+    coincidir com o do main(); o cálculo roda com ``card_budget``, a fatia da
+    carta no pré-cálculo. None, sem calcular, se o ticket do slot venceu
+    (especulação descartada enquanto a tarefa esperava na fila do pool).
+    """
+    if slot is not None and _SPECULATIVE_TICKETS is not None and _SPECULATIVE_TICKETS[slot] != ticket:
+        return None
+    equity_method, _ = plan_equity_method(
+        hero_cards, board_cards, num_opponents, known_opponents, time_budget=time_budget
+    )
+    result, meta = run_equity_calculation(
+        hero_cards,
+        board_cards,
+        num_opponents,
         known_opponents,
-        batch_size,
-        use_parallel,
+        equity_method,
+        time_budget if card_budget is None else card_budget,
+        analysis_mode,
+        use_parallel=False,
+        stacks=stacks,
     )
+    return equity_method, result, meta
 
 
-def simulate_monte_carlo_fast(
-    hero_cards: Sequence[Card],
-    board_cards: Sequence[Card],
-    num_opponents: int,
-    time_budget: float,
-    known_opponents: Optional[Sequence[Sequence[Card]]] = None,
-    batch_size: int = 2000,
-    use_parallel: bool = False,
-) -> Tuple[Dict[str, float], Dict[str, float]]:
-    """Modo rápido: apenas win/tie/lose, sem Counters ou estruturas extras no hot loop."""
-    hero_tuple = tuple(hero_cards)
-    board_tuple = tuple(board_cards)
-    known_cards, _ = normalize_known_opponents_entries(known_opponents)
-    flattened_known: List[Card] = []
-    for opp_cards in known_cards:
-        if len(opp_cards) != 2:
-            raise ValueError("Cada oponente conhecido deve possuir exatamente 2 cartas.")
-        flattened_known.extend(opp_cards)
-    deck = remove_known_cards(build_deck(), hero_tuple + board_tuple + tuple(flattened_known))
-    missing_board = 5 - len(board_tuple)
-    random_opponents = num_opponents - len(known_cards)
-    if random_opponents < 0:
-        raise ValueError("Número de oponentes conhecidos maior que o total configurado.")
-    cards_needed = missing_board + 2 * random_opponents
-    if cards_needed > len(deck):
-        raise ValueError("Cartas insuficientes para completar a simulação.")
-    max_seconds = max(0.5, min(time_budget, 10.0))
-    batch_size = max(200, batch_size)
-    if use_parallel:
-        pool = get_monte_carlo_pool()
-        if pool:
-            wins, ties, losses, elapsed_parallel, profile = _run_parallel_fast(
-                pool,
-                hero_tuple,
-                board_tuple,
-                num_opponents,
-                tuple(tuple(cards) for cards in known_cards),
-                tuple(deck),
-                max_seconds,
-                batch_size,
-            )
-            result = build_fast_mode_result(wins, ties, losses)
-            result["confidence"] = _compute_confidence_intervals(wins, ties, losses, result["total_scenarios"])
-            meta = {
-                "iterations": wins + ties + losses,
-                "elapsed": elapsed_parallel,
-                "iter_per_sec": (wins + ties + losses) / elapsed_parallel if elapsed_parallel > 0 else 0.0,
-                "time_budget": max_seconds,
-                "analysis_mode": False,
-                "profile": profile,
-            }
-            result["mc_meta"] = meta
-            return result, meta
-    # Single-process hot loop.
-    hero_list = list(hero_tuple)
-    board_base = list(board_tuple)
-    board_extra = [0] * missing_board
-    board_buffer = board_base + board_extra
-    base_len = len(board_base)
-    deck_buffer = list(deck)
-    start = time.perf_counter()
-    wins = ties = losses = 0
-    iterations = 0
-    while time.perf_counter() - start < max_seconds:
-        for _ in range(batch_size):
-            if time.perf_counter() - start >= max_seconds:
-                break
-            random.shuffle(deck_buffer)
-            for idx in range(missing_board):
-                board_buffer[base_len + idx] = deck_buffer[idx]
-            hero_rank = best_hand_rank_7(hero_list, board_buffer)
-            best_opponent_rank: Tuple[int, int] = (-1, 0)
-            for opp_cards in known_cards:
-                rank = best_hand_rank_7(opp_cards, board_buffer)
-                if rank > best_opponent_rank:
-                    best_opponent_rank = rank
-            offset = missing_board
-            for _ in range(random_opponents):
-                card_a = deck_buffer[offset]
-                card_b = deck_buffer[offset + 1]
-                offset += 2
-                rank = best_hand_rank_7((card_a, card_b), board_buffer)
-                if rank > best_opponent_rank:
-                    best_opponent_rank = rank
-            if hero_rank > best_opponent_rank:
-                wins += 1
-            elif hero_rank == best_opponent_rank:
-                ties += 1
-            else:
-                losses += 1
-            iterations += 1
-    elapsed = time.perf_counter() - start
-    result = build_fast_mode_result(wins, ties, losses)
-    result["confidence"] = _compute_confidence_intervals(wins, ties, losses, result["total_scenarios"])
-    meta = {
-        "iterations": iterations,
-        "elapsed": elapsed,
-        "iter_per_sec": iterations / elapsed if elapsed > 0 else 0.0,
-        "time_budget": max_seconds,
-        "analysis_mode": False,
-        "profile": {},
-    }
-    result["mc_meta"] = meta
-    return result, meta
+def speculation_key(params_signature: Dict[str, object]) -> Tuple:
+    """Chave do cenário sem a mesa: muda quando hero, oponentes ou configurações mudam."""
+    ignored = ("board", "manual", "method", "exact_fallback", "min_required")
+    return tuple((key, value) for key, value in params_signature.items() if key not in ignored)
 
 
-def simulate_monte_carlo_analysis(
-    hero_cards: Sequence[Card],
-    board_cards: Sequence[Card],
+@dataclass
+class NextStreetSpeculation:
+    key: Tuple
+    board: Tuple[Card, ...]
+    cards: Tuple[Card, ...]
+    params: Tuple
+    scheduler: Optional[SpeculativeScheduler] = None
+    futures: Dict[Card, Future] = field(default_factory=dict)
+    tickets: Dict[Card, Tuple[int, int]] = field(default_factory=dict)
+
+    def worker_args(self, card: Card) -> Tuple:
+        """Argumentos de ``_speculative_next_card_worker`` para a carta (sem slot e ticket)."""
+        hero_cards, num_opponents, known_opponents, time_budget, analysis_mode, stacks, card_budget = self.params
+        return (
+            hero_cards,
+            self.board + (card,),
+            num_opponents,
+            known_opponents,
+            time_budget,
+            analysis_mode,
+            stacks,
+            card_budget,
+        )
+
+    def is_relevant(self, key: Tuple, board: Tuple[Card, ...]) -> bool:
+        """Ainda útil se o cenário é o mesmo ou apenas recebeu a próxima carta da mesa."""
+        if key != self.key:
+            return False
+        if board == self.board:
+            return True
+        return len(board) == len(self.board) + 1 and board[:-1] == self.board
+
+    def take(self, board: Tuple[Card, ...]) -> Optional[Tuple[str, EquityResult, Dict[str, object]]]:
+        """Retorna o resultado pré-calculado da carta nova, se já estiver pronto."""
+        if len(board) != len(self.board) + 1 or board[:-1] != self.board:
+            return None
+        future = self.futures.get(board[-1])
+        if future is None or not future.done() or future.cancelled() or future.exception() is not None:
+            return None
+        return future.result()
+
+    def progress(self) -> Tuple[int, int]:
+        done = sum(
+            1
+            for future in self.futures.values()
+            if future.done() and not future.cancelled() and future.exception() is None and future.result() is not None
+        )
+        return done, len(self.cards)
+
+    def cancel(self) -> None:
+        if self.scheduler is not None:
+            self.scheduler.discard(self)
+        for future in list(self.futures.values()):
+            future.cancel()
+
+
+def start_next_street_speculation(
+    scheduler: SpeculativeScheduler,
+    key: Tuple,
+    hero_cards: Tuple[Card, ...],
+    board_cards: Tuple[Card, ...],
     num_opponents: int,
+    known_opponents: Optional[Tuple[Tuple[int, Tuple[Card, Card]], ...]],
     time_budget: float,
-    known_opponents: Optional[Sequence[Sequence[Card]]] = None,
-    batch_size: int = 2000,
-) -> Tuple[Dict[str, float], Dict[str, float]]:
-    """Modo análise: coleta completa de breakdowns."""
-    hero_cards = list(hero_cards)
-    board_cards = list(board_cards)
-    known_cards, known_labels = normalize_known_opponents_entries(known_opponents)
-    flattened_known: List[Card] = []
+    analysis_mode: bool,
+    stacks: Optional[Tuple[int, ...]] = None,
+) -> NextStreetSpeculation:
+    """Agenda na fila especulativa o cálculo de cada carta possível da próxima street.
+
+    Cada carta recebe uma fatia do orçamento interativo, ``time_budget × workers /
+    cartas`` (no mínimo ``SPECULATIVE_MIN_CARD_BUDGET``): as ~46 cartas terminam
+    em cerca de um orçamento interativo, em vez de 46 em série nos workers.
+    """
+    known_cards, _ = normalize_known_opponents_entries(known_opponents)
+    used_cards: List[Card] = list(hero_cards) + list(board_cards)
     for opp_cards in known_cards:
-        if len(opp_cards) != 2:
-            raise ValueError("Cada oponente conhecido deve possuir exatamente 2 cartas.")
-        flattened_known.extend(opp_cards)
-    deck = remove_known_cards(build_deck(), hero_cards + board_cards + flattened_known)
-    missing_board = 5 - len(board_cards)
-    random_opponents = num_opponents - len(known_cards)
-    if random_opponents < 0:
-        raise ValueError("Número de oponentes conhecidos maior que o total configurado.")
-    cards_needed = missing_board + 2 * random_opponents
-    if cards_needed > len(deck):
-        raise ValueError("Cartas insuficientes para completar a simulação.")
-    max_seconds = max(0.2, min(time_budget, 2.0))
-    batch_size = max(200, batch_size)
-    random_labels = [f"Oponente {len(known_labels) + idx + 1}" for idx in range(random_opponents)]
-    draw_buffer = list(deck)
-    hero_category_counter: Counter = Counter()
-    hero_win_category_counter: Counter = Counter()
-    loss_category_counter: Counter = Counter()
-    loss_winner_counter: Counter = Counter()
-    losing_examples_data: Dict[int, Counter] = defaultdict(Counter)
-    tie_category_counter: Counter = Counter()
-    tie_size_counter: Counter = Counter()
-    board_only_ties = 0
-    wins = ties = losses = 0
-    start = time.perf_counter()
-    iterations = 0
-    while time.perf_counter() - start < max_seconds:
-        for _ in range(batch_size):
-            if time.perf_counter() - start >= max_seconds:
-                break
-            random.shuffle(draw_buffer)
-            board_draw = draw_buffer[:missing_board] if missing_board else []
-            simulated_board = board_cards + board_draw
-            hero_rank = best_hand_rank_7(hero_cards, simulated_board)
-            hero_category_counter[hero_rank[0]] += 1
-            board_rank = board_only_rank_value(simulated_board)
-            opponent_hands: List[Tuple[Tuple[int, int], List[Card], str]] = []
-            for idx, opp_cards in enumerate(known_cards):
-                opponent_hands.append(((0, 0), list(opp_cards), known_labels[idx]))
-            offset = missing_board
-            for rand_idx in range(random_opponents):
-                card_a = draw_buffer[offset]
-                card_b = draw_buffer[offset + 1]
-                offset += 2
-                opponent_hands.append(((0, 0), [card_a, card_b], random_labels[rand_idx]))
-            for idx, entry in enumerate(opponent_hands):
-                cards = entry[1]
-                rank = best_hand_rank_7(cards, simulated_board)
-                opponent_hands[idx] = (rank, cards, entry[2])
-            best_opponent_rank, best_opponent_cards, best_label = (
-                max(opponent_hands, key=lambda item: item[0]) if opponent_hands else ((-1, 0), [], "")
-            )
-            if hero_rank > best_opponent_rank:
-                wins += 1
-                hero_win_category_counter[hero_rank[0]] += 1
-            elif hero_rank == best_opponent_rank:
-                ties += 1
-                tie_category_counter[hero_rank[0]] += 1
-                tied_players = 1 + sum(1 for entry in opponent_hands if entry[0] == hero_rank)
-                tie_size_counter[tied_players] += 1
-                if board_rank and board_rank == hero_rank:
-                    board_only_ties += 1
-            else:
-                losses += 1
-                loss_category_value = best_opponent_rank[0]
-                loss_category_counter[loss_category_value] += 1
-                loss_winner_counter[(loss_category_value, best_label or "Oponente desconhecido")] += 1
-                if best_opponent_cards:
-                    formatted = format_hand(best_opponent_cards)
-                    losing_examples_data[loss_category_value][formatted] += 1
-            iterations += 1
-    if wins != sum(hero_win_category_counter.values()):
-        raise ValueError("Inconsistência ao contabilizar vitórias do Hero (MC).")
-    if losses != sum(loss_category_counter.values()):
-        raise ValueError("Inconsistência ao contabilizar derrotas do Hero (MC).")
-    if ties != sum(tie_category_counter.values()):
-        raise ValueError("Inconsistência ao contabilizar empates do Hero (MC).")
-    result = _build_result_dict(
-        wins,
-        ties,
-        losses,
-        hero_category_counter,
-        loss_category_counter,
-        losing_examples_data,
+        used_cards.extend(opp_cards)
+    cards = tuple(remove_known_cards(build_deck(), used_cards))
+    card_budget = max(
+        SPECULATIVE_MIN_CARD_BUDGET, min(time_budget, time_budget * scheduler.workers / max(1, len(cards)))
     )
-    result["hero_most_common_category"] = (
-        category_label(hero_category_counter.most_common(1)[0][0]) if hero_category_counter else None
+    speculation = NextStreetSpeculation(
+        key=key,
+        board=board_cards,
+        cards=cards,
+        params=(hero_cards, num_opponents, known_opponents, time_budget, analysis_mode, stacks, card_budget),
+        scheduler=scheduler,
     )
-    result["hero_most_common_category_wins"] = (
-        category_label(hero_win_category_counter.most_common(1)[0][0]) if hero_win_category_counter else None
-    )
-    result["loss_breakdown"] = build_loss_breakdown(loss_category_counter, loss_winner_counter)
-    result["tie_breakdown"] = build_tie_breakdown(tie_category_counter, tie_size_counter, board_only_ties)
-    result["confidence"] = _compute_confidence_intervals(wins, ties, losses, result["total_scenarios"])
-    elapsed = time.perf_counter() - start
-    meta = {
-        "iterations": iterations,
-        "elapsed": elapsed,
-        "iter_per_sec": iterations / elapsed if elapsed > 0 else 0.0,
-        "time_budget": max_seconds,
-        "analysis_mode": True,
-        "profile": {},
-    }
-    result["mc_meta"] = meta
-    return result, meta
+    scheduler.schedule(speculation)
+    return speculation
 
 
 def identify_stage(board_size: int) -> str:
@@ -1476,6 +5598,7 @@ def main() -> None:
         "Monte Carlo = estimativa estatística. Enumeração Exata = todos os runouts possíveis."
     )
 
+    start_metrics_export()
     state = ensure_state()
     if "initial_cards_applied" not in st.session_state:
         if not state.hero:
@@ -1511,6 +5634,47 @@ def main() -> None:
             key=opponent_slider_key,
             help="Número de jogadores adversários no pote.",
         )
+        all_in_stacks: Optional[Tuple[int, ...]] = None
+        if tournament_enabled and st.checkbox(
+            "All-in com stacks (potes laterais)",
+            value=False,
+            help="Informe as fichas de cada jogador para ver as fichas esperadas em cada pote.",
+        ):
+            stack_labels = ["Hero"] + [f"Oponente {idx}" for idx in range(1, active_opponents + 1)]
+            all_in_stacks = tuple(
+                int(
+                    st.number_input(
+                        f"Stack {label}",
+                        min_value=1,
+                        value=1000,
+                        step=50,
+                        key=f"all_in_stack_{idx}",
+                    )
+                )
+                for idx, label in enumerate(stack_labels)
+            )
+        icm_payouts: Tuple[float, ...] = ()
+        icm_other_stacks: Tuple[float, ...] = ()
+        if all_in_stacks and st.checkbox(
+            "ICM: $EV do torneio",
+            value=False,
+            help="Converte os desfechos do all-in em equity de prêmios (modelo de Malmuth–Harville).",
+        ):
+            try:
+                icm_payouts = parse_amounts(st.text_input("Prêmios (1º, 2º, ...)", value="50, 30, 20", key="icm_payouts"))
+                icm_other_stacks = parse_amounts(
+                    st.text_input(
+                        "Stacks dos jogadores fora da mão",
+                        value="",
+                        key="icm_other_stacks",
+                        help="Separados por vírgula; eles não entram no pote, mas mudam o ICM.",
+                    )
+                )
+                if len(all_in_stacks) + len(icm_other_stacks) > MAX_ICM_PLAYERS:
+                    raise ValueError(f"ICM suporta até {MAX_ICM_PLAYERS} jogadores.")
+            except ValueError as exc:
+                st.error(str(exc))
+                icm_payouts = ()
 
         st.divider()
         st.markdown("### Monte Carlo")
@@ -1533,6 +5697,23 @@ def main() -> None:
             effective_time_budget = min(time_budget_seconds, analysis_cap)
             st.warning("Modo análise é mais lento por coletar explicações detalhadas.")
             st.caption(f"Tempo efetivo limitado a {effective_time_budget:.2f}s (≈10k–50k iterações).")
+        importance_sampling = False
+        if not analysis_mode:
+            importance_sampling = st.checkbox(
+                "Amostragem por importância (eventos raros)",
+                value=False,
+                help=(
+                    "Favorece os runouts do desfecho mais raro (empates, derrotas runner-runner) e "
+                    "repondera as amostras; o IC95% usa a razão de verossimilhança."
+                ),
+            )
+        curve_mode = False
+        if not tournament_enabled and not analysis_mode:
+            curve_mode = st.checkbox(
+                "Curva de equity por número de oponentes",
+                value=False,
+                help="Uma única simulação com 8 oponentes dá a equity contra 1 a 8; mover o slider vira consulta.",
+            )
 
         st.divider()
         st.markdown("### Cálculo")
@@ -1623,26 +5804,35 @@ def main() -> None:
         st.warning("Adicione cartas seguindo a ordem do jogo (Flop com 3, Turn com 4, River com 5).")
 
     board_volatility = detect_board_volatility(parsed_board)
-    equity_method = choose_equity_method(parsed_board)
-
-    # Enumeração completa explode combinatoriamente com múltiplos oponentes e pode travar a UI.
-    exact_fallback_reason: Optional[str] = None
-    if equity_method == "EXACT":
-        known_count = len(known_opponents_tuple) if tournament_enabled else 0
-        random_opponents = max(0, active_opponents - known_count)
-        missing_board = max(0, 5 - len(parsed_board))
-        deck_size = 52 - len(set(combined_cards))
-        estimated = estimate_exact_scenarios(deck_size, missing_board, random_opponents)
-        max_exact_scenarios = 2_000_000
-        if estimated > max_exact_scenarios:
-            exact_fallback_reason = (
-                f"Enumeração completa estimada em {estimated:,} cenários "
-                f"(limite: {max_exact_scenarios:,})."
-            )
-            equity_method = "MONTE_CARLO"
+    equity_method, exact_fallback_reason = plan_equity_method(
+        parsed_hero,
+        parsed_board,
+        active_opponents,
+        known_opponents_tuple if tournament_enabled else None,
+        analysis_mode=analysis_mode,
+        time_budget=effective_time_budget,
+        use_parallel=parallel_enabled,
+    )
 
-    if equity_method == "EXACT":
+    if curve_mode:
+        # A curva inteira vem de uma simulação Monte Carlo; o slider apenas escolhe o ponto.
+        equity_method, exact_fallback_reason = "MONTE_CARLO", None
+        st.markdown("🟡 **Curva Monte Carlo (1 a 8 oponentes na mesma simulação)**")
+    elif equity_method == "PRECOMPUTED" and not parsed_board:
+        st.markdown("⚡ **Matriz Pré-flop Heads-up (exata)**")
+    elif equity_method == "PRECOMPUTED":
+        st.markdown("⚡ **Base Pré-calculada de Flops**")
+        st.caption(
+            "Exata contra 1 oponente; contra 2–3 oponentes, estimativa estratificada gerada offline."
+        )
+    elif equity_method == "EXACT":
         st.markdown("🔵 **Cálculo Exato (Enumeração Completa)**")
+    elif equity_method == "ANYTIME":
+        st.markdown("🔵 **Enumeração Exata Progressiva**")
+        st.caption(exact_fallback_reason or "")
+    elif equity_method == "STRATIFIED":
+        st.markdown("🟣 **Runouts Exatos + Oponentes Amostrados**")
+        st.caption(exact_fallback_reason or "")
     else:
         if exact_fallback_reason:
             st.markdown("🟡 **Estimativa Monte Carlo (fallback por performance)**")
@@ -1655,7 +5845,7 @@ def main() -> None:
 
     min_required = 0
     mc_reasons: List[str] = []
-    if equity_method == "MONTE_CARLO" and not analysis_mode:
+    if equity_method == "MONTE_CARLO" and not analysis_mode and not curve_mode:
         min_required, mc_reasons = determine_monte_carlo_min(parsed_board, active_opponents, board_volatility)
 
     hero_tuple = tuple(parsed_hero)
@@ -1675,41 +5865,95 @@ def main() -> None:
         "analysis": analysis_mode,
         "parallel": parallel_enabled,
         "min_required": min_required,
+        "stacks": all_in_stacks,
+        "curve": curve_mode,
+        "importance": importance_sampling,
     }
+    # Pré-cálculo especulativo: descarta o trabalho assim que deixa de ser relevante.
+    spec_key = speculation_key(params_signature)
+    speculation: Optional[NextStreetSpeculation] = st.session_state.get("speculation")
+    if speculation is not None and not speculation.is_relevant(spec_key, board_tuple):
+        speculation.cancel()
+        st.session_state.pop("speculation", None)
+        speculation = None
+
+    recorder = get_workload_recorder()
     # Debounce simples: só recalcula se algo relevante mudou ou o usuário clicou no botão.
-    if (
+    needs_calculation = (
         "last_result" not in st.session_state
         or st.session_state.get("last_params") != params_signature
-    ):
-        spinner_label = (
-            "Enumerando todos os cenários possíveis..." if equity_method == "EXACT" else "Executando simulação Monte Carlo..."
-        )
-        with st.spinner(spinner_label):
-            try:
-                if equity_method == "EXACT":
-                    exact_start = time.perf_counter()
-                    st.session_state["last_result"] = simulate_exact(
-                        hero_tuple,
-                        board_tuple,
-                        active_opponents,
-                        known_opponents_tuple if tournament_enabled else None,
-                    )
-                    exact_elapsed = time.perf_counter() - exact_start
-                    st.session_state["last_meta"] = {"elapsed": exact_elapsed}
-                else:
-                    result, meta = simulate_monte_carlo(
+    )
+    if needs_calculation and curve_mode:
+        manual_trigger = st.session_state["manual_trigger"]
+        curve_key = (hero_tuple, board_tuple, effective_time_budget, parallel_enabled, manual_trigger)
+        if st.session_state.get("opponent_curve_key") != curve_key:
+            curve_start = time.perf_counter()
+            with st.spinner("Simulando a curva de 1 a 8 oponentes..."):
+                try:
+                    curve, _ = simulate_opponent_curve(
                         hero_tuple,
                         board_tuple,
-                        active_opponents,
+                        8,
                         effective_time_budget,
-                        known_opponents_tuple if tournament_enabled else None,
                         batch_size=3000 if parallel_enabled else 1500,
-                        collect_breakdown=analysis_mode,
-                        use_parallel=parallel_enabled and not analysis_mode,
+                        use_parallel=parallel_enabled,
                     )
-                    st.session_state["last_result"] = result
-                    st.session_state["last_meta"] = meta
+                except ValueError as exc:
+                    st.error(str(exc))
+                    st.stop()
+            st.session_state["opponent_curve"] = curve
+            st.session_state["opponent_curve_key"] = curve_key
+            record_calculation(
+                "CURVE", int(curve.meta.get("iterations", 0)), time.perf_counter() - curve_start  # type: ignore[arg-type]
+            )
+            if recorder is not None:
+                recorder.record(
+                    params_signature, "CURVE", None, curve.meta, time.perf_counter() - curve_start, source="curve"
+                )
+        curve = st.session_state["opponent_curve"]
+        st.session_state["last_result"] = curve.results[active_opponents - 1]
+        st.session_state["last_meta"] = dict(curve.meta)
+        st.session_state["last_params"] = params_signature
+        needs_calculation = False
+    if needs_calculation and speculation is not None:
+        speculative = speculation.take(board_tuple)
+        if speculative is not None and speculative[0] == equity_method:
+            _, spec_result, spec_meta = speculative
+            st.session_state["last_result"] = spec_result
+            st.session_state["last_meta"] = dict(spec_meta, speculative=True)
+            st.session_state["last_params"] = params_signature
+            needs_calculation = False
+            if recorder is not None:
+                recorder.record(params_signature, equity_method, spec_result, spec_meta, 0.0, source="speculative")
+    if needs_calculation:
+        spinner_label = (
+            "Executando simulação Monte Carlo..."
+            if equity_method == "MONTE_CARLO"
+            else "Enumerando todos os cenários possíveis..."
+        )
+        with st.spinner(spinner_label):
+            try:
+                calculation_start = time.perf_counter()
+                result, meta = run_equity_calculation(
+                    hero_tuple,
+                    board_tuple,
+                    active_opponents,
+                    known_opponents_tuple if tournament_enabled else None,
+                    equity_method,
+                    effective_time_budget,
+                    analysis_mode,
+                    use_parallel=parallel_enabled,
+                    batch_size=3000 if parallel_enabled else 1500,
+                    stacks=all_in_stacks,
+                    importance_sampling=importance_sampling,
+                )
+                st.session_state["last_result"] = result
+                st.session_state["last_meta"] = meta
                 st.session_state["last_params"] = params_signature
+                if exact_fallback_reason:
+                    METRICS.inc("poker_exact_fallbacks_total", method=equity_method)
+                if recorder is not None:
+                    recorder.record(params_signature, equity_method, result, meta, time.perf_counter() - calculation_start)
             except ValueError as exc:
                 _log(
                     "debug-session",
@@ -1733,10 +5977,17 @@ def main() -> None:
                 st.error(f"Erro inesperado: {str(exc)}")
                 st.stop()
 
-    result = st.session_state["last_result"]
+    result = st.session_state["last_result"].to_dict()
     result_meta = st.session_state.get("last_meta")
     # UI: EXACT vs MC — padroniza campos sem alterar equity.
-    display_method: Literal["exact", "monte_carlo"] = "exact" if equity_method == "EXACT" else "monte_carlo"
+    # A enumeração progressiva só é "exata" quando cobriu todos os cenários.
+    display_method: Literal["exact", "monte_carlo"] = "monte_carlo"
+    if equity_method == "EXACT":
+        display_method = "exact"
+    elif equity_method == "PRECOMPUTED" and result_meta and result_meta.get("exact"):
+        display_method = "exact"
+    elif equity_method == "ANYTIME" and result_meta and result_meta.get("coverage", 0.0) >= 1.0:
+        display_method = "exact"
     display = build_display_result(display_method, result, result_meta)
     _log(
         "debug-session",
@@ -1780,12 +6031,43 @@ def main() -> None:
     if display["method"] == "exact":
         st.markdown("🔵 **Resultado exato (enumeração completa)**")
         st.caption(f"Cenários avaliados: {display['n_samples']:,}")
+    elif equity_method == "ANYTIME" and result_meta:
+        st.markdown("🟡 **Estimativa (enumeração parcial em ordem aleatória)**")
+        st.caption(
+            f"Cobertura: {float(result_meta.get('coverage', 0.0)) * 100:.2f}% de "
+            f"{int(result_meta.get('scenario_space', 0)):,} cenários. Com mais tempo o resultado converge ao exato."
+        )
+    elif equity_method == "PRECOMPUTED" and result_meta:
+        st.markdown("⚡ **Estimativa pré-calculada (base de flops)**")
+        st.caption(
+            f"Amostras estratificadas: {int(result_meta.get('iterations', 0)):,} "
+            f"({int(result_meta.get('samples_per_runout', 0)):,} por runout, geradas offline)."
+        )
+    elif equity_method == "STRATIFIED" and result_meta:
+        st.markdown("🟣 **Estimativa estratificada por runout**")
+        st.caption(
+            f"{int(result_meta.get('runouts', 0)):,} runouts enumerados × "
+            f"{int(result_meta.get('samples_per_runout', 0)):,} amostras de oponentes cada."
+        )
+    elif result_meta and result_meta.get("importance_sampling"):
+        st.markdown("🟡 **Monte Carlo com amostragem por importância (Estimativa)**")
+        target = result_meta.get("importance_target")
+        target_label = {"win": "vitória", "tie": "empate", "loss": "derrota"}.get(str(target))
+        if target_label:
+            proposal_text = f"Proposta ajustada ao desfecho mais raro ({target_label})."
+        else:
+            proposal_text = "Nenhum desfecho raro: amostragem uniforme."
+        st.caption(f"{proposal_text} Os contadores são somas dos pesos L, não números de amostras.")
     else:
         st.markdown("🟡 **Monte Carlo (Estimativa)**")
 
     metrics_line: List[str] = []
     if display["method"] == "monte_carlo":
-        metrics_line.append(f"Amostras: {display['n_samples']:,}")
+        if display.get("effective_samples") is not None:
+            metrics_line.append(f"Sorteios: {display['n_samples']:,}")
+            metrics_line.append(f"Amostras efetivas: {display['effective_samples']:,.0f}")
+        else:
+            metrics_line.append(f"Amostras: {display['n_samples']:,}")
         if display.get("it_per_s") is not None:
             metrics_line.append(f"Iterações/s: {display['it_per_s']:.0f}")
         if display.get("elapsed_s") is not None:
@@ -1806,17 +6088,225 @@ def main() -> None:
         st.caption(" • ".join(metrics_line))
 
     if display["method"] == "monte_carlo":
-        actual_iterations = int(display.get("n_samples") or 0)
+        actual_iterations = int(display.get("effective_samples") or display.get("n_samples") or 0)
         if min_required and actual_iterations < min_required and not analysis_mode:
             st.warning(
                 "Número de iterações abaixo do recomendado para este cenário. "
                 "Considere aumentar o tempo do Monte Carlo."
             )
 
+    # Equity de todos os jogadores, acumulada no mesmo passe do Hero.
+    table_rows = result.get("table_equity")
+    if tournament_enabled and table_rows and len(table_rows) > 1:
+        st.markdown("**Equity da mesa**")
+        lines = ["| Jogador | Vitória | Equity (pote) |", "| --- | ---: | ---: |"]
+        for row in table_rows:
+            equity_text = f"{row['equity_pct']:.2f}%"
+            if row["players"] > 1:
+                equity_text += f" ({row['equity_pct'] / row['players']:.2f}% cada)"
+            lines.append(f"| {row['player']} | {row['win_pct']:.2f}% | {equity_text} |")
+        st.markdown("\n".join(lines))
+        st.caption("Equity (pote) = vitórias + fração dos potes divididos.")
+
+    # Potes principal/laterais do all-in, repartidos com as mesmas avaliações de cada runout.
+    side_pot_summary = result.get("side_pots")
+    if side_pot_summary:
+        st.markdown("**Potes do all-in**")
+        lines = ["| Pote | Fichas | Fichas esperadas |", "| --- | ---: | --- |"]
+        for pot in side_pot_summary["pots"]:
+            shares = ", ".join(
+                f"{entry['player']} {entry['expected']:,.1f} ({entry['share_pct']:.1f}%)" for entry in pot["players"]
+            )
+            lines.append(f"| {pot['name']} | {pot['amount']:,} | {shares} |")
+        st.markdown("\n".join(lines))
+        last_result = st.session_state["last_result"]
+        icm_rows = (
+            build_icm_summary(last_result.side_pots, last_result.opponent_labels, icm_other_stacks, icm_payouts)
+            if icm_payouts
+            else None
+        )
+        if icm_rows:
+            lines = [
+                "| Jogador | Stack | Fichas esperadas | EV | $ antes | $EV (ICM) | Δ$ |",
+                "| --- | ---: | ---: | ---: | ---: | ---: | ---: |",
+            ]
+            for entry, icm in zip(side_pot_summary["players"], icm_rows):
+                lines.append(
+                    f"| {entry['player']} | {entry['stack']:,} | {entry['expected']:,.1f} | {entry['ev']:+,.1f} | "
+                    f"{icm['before']:,.2f} | {icm['ev']:,.2f} | {icm['delta']:+,.2f} |"
+                )
+            for icm in icm_rows[len(side_pot_summary["players"]) :]:
+                lines.append(
+                    f"| {icm['player']} | {icm['stack']:,.0f} | — | — | "
+                    f"{icm['before']:,.2f} | {icm['ev']:,.2f} | {icm['delta']:+,.2f} |"
+                )
+        else:
+            lines = ["| Jogador | Stack | Fichas esperadas | EV |", "| --- | ---: | ---: | ---: |"]
+            for entry in side_pot_summary["players"]:
+                lines.append(
+                    f"| {entry['player']} | {entry['stack']:,} | {entry['expected']:,.1f} | {entry['ev']:+,.1f} |"
+                )
+        st.markdown("\n".join(lines))
+        st.caption("EV = fichas esperadas somando todos os potes − stack colocado no all-in.")
+        if icm_rows:
+            st.caption(
+                "$EV (ICM) = média do ICM dos stacks finais de cada desfecho do all-in; "
+                "$ antes = ICM dos stacks atuais. Eliminados na mesma mão: o stack inicial maior fica à frente."
+            )
+        elif icm_payouts:
+            st.caption("ICM indisponível: este resultado não traz a distribuição dos desfechos do all-in.")
+
+    if result_meta and result_meta.get("speculative"):
+        st.caption("⚡ Resultado pré-calculado em segundo plano enquanto a carta não era informada.")
+
+    if curve_mode:
+        curve_rows = st.session_state["opponent_curve"].rows()
+        st.markdown("**Equity por número de oponentes**")
+        st.line_chart(
+            {
+                "Oponentes": [row["opponents"] for row in curve_rows],
+                "Equity (%)": [row["equity_pct"] for row in curve_rows],
+            },
+            x="Oponentes",
+            y="Equity (%)",
+        )
+        lines = [
+            "| Oponentes | Vitória | IC95% vitória | Empate | Equity (pote) |",
+            "| ---: | ---: | --- | ---: | ---: |",
+        ]
+        for row in curve_rows:
+            marker = " ◀" if row["opponents"] == active_opponents else ""
+            lines.append(
+                f"| {row['opponents']}{marker} | {row['win_pct']:.2f}% | "
+                f"{row['ci95_win']['low']:.2f}%–{row['ci95_win']['high']:.2f}% | "
+                f"{row['tie_pct']:.2f}% | {row['equity_pct']:.2f}% |"
+            )
+        st.markdown("\n".join(lines))
+        st.caption("Cada iteração distribui 8 mãos; o resultado com k oponentes usa as k primeiras.")
+
+    # Com o resultado do flop/turn na tela, antecipa todas as cartas possíveis da próxima street.
+    if parallel_enabled and len(board_tuple) in (3, 4) and not curve_mode and not importance_sampling:
+        if speculation is None or speculation.board != board_tuple:
+            if speculation is not None:
+                speculation.cancel()
+            speculative_scheduler = get_speculative_scheduler()
+            if speculative_scheduler is not None:
+                speculation = start_next_street_speculation(
+                    speculative_scheduler,
+                    spec_key,
+                    hero_tuple,
+                    board_tuple,
+                    active_opponents,
+                    known_opponents_tuple if tournament_enabled else None,
+                    effective_time_budget,
+                    analysis_mode,
+                    all_in_stacks,
+                )
+                st.session_state["speculation"] = speculation
+        if speculation is not None:
+            ready, total = speculation.progress()
+            st.caption(f"Pré-cálculo da próxima carta: {ready}/{total} prontas.")
+
     st.markdown("</div>", unsafe_allow_html=True)
 
+    if not tournament_enabled and len(board_tuple) >= 3:
+        with st.expander("Mapa de equity de todas as mãos do Hero"):
+            if st.checkbox("Calcular o mapa 13×13 para esta mesa", value=False, key="hand_grid_enabled"):
+                grid_key = (board_tuple, active_opponents, effective_time_budget, parallel_enabled)
+                if st.session_state.get("hand_grid_key") != grid_key:
+                    with st.spinner("Avaliando todos os combos do Hero..."):
+                        grid, grid_meta = simulate_hand_grid(
+                            board_tuple,
+                            active_opponents,
+                            effective_time_budget,
+                            use_parallel=parallel_enabled,
+                        )
+                    st.session_state["hand_grid"] = (build_hand_grid(grid), grid_meta)
+                    st.session_state["hand_grid_key"] = grid_key
+                cells, grid_meta = st.session_state["hand_grid"]
+                st.markdown(render_hand_grid_html(cells), unsafe_allow_html=True)
+                if grid_meta.get("source") == "flop_db":
+                    st.caption("Valores da base pré-calculada de flops.")
+                else:
+                    st.caption(
+                        f"{int(grid_meta.get('iterations', 0)):,} amostras de runout e oponentes, "
+                        "compartilhadas por todos os combos. Equity média dos combos de cada célula; "
+                        "suited acima da diagonal, offsuit abaixo."
+                    )
+
+    with st.expander("Perfil do cálculo"):
+        profile = (result_meta or {}).get("profile") or {}
+        if profile.get("sampled_iterations"):
+            iterations = int(result_meta.get("iterations", 0))  # type: ignore[union-attr]
+            lines = ["| Fase | Tempo medido | µs por iteração |", "| --- | ---: | ---: |"]
+            for row in profile_breakdown(profile, iterations):
+                if not row["share"]:
+                    continue
+                lines.append(
+                    f"| {PROFILE_PHASE_LABELS[row['phase']]} | {row['share'] * 100:.1f}% | "
+                    f"{row['us_per_iteration']:.2f} |"
+                )
+            st.markdown("\n".join(lines))
+            notes = [f"{int(profile['sampled_iterations']):,} iterações medidas (1 a cada {profile['sample_every']})."]
+            initial_rate = float(profile.get("iter_per_sec_initial", 0.0))  # type: ignore[arg-type]
+            if initial_rate:
+                notes.append(
+                    f"Taxa no primeiro lote: {initial_rate:,.0f} it/s; "
+                    f"média: {float(result_meta.get('iter_per_sec', 0.0)):,.0f} it/s."  # type: ignore[union-attr]
+                )
+            if profile.get("parallel_workers"):
+                notes.append("Tempos somados dos workers paralelos.")
+            st.caption(" ".join(notes))
+        else:
+            st.caption("Este método não mede fases (resultado exato, tabela pré-calculada ou pré-cálculo).")
+        if not curve_mode and st.button("Capturar cProfile deste cálculo", key="capture_cprofile"):
+            with st.spinner("Repetindo o cálculo sob o cProfile (sem workers paralelos)..."):
+                try:
+                    _, report = capture_cprofile(
+                        run_equity_calculation,
+                        hero_tuple,
+                        board_tuple,
+                        active_opponents,
+                        known_opponents_tuple if tournament_enabled else None,
+                        equity_method,
+                        effective_time_budget,
+                        analysis_mode,
+                        use_parallel=False,
+                        stacks=all_in_stacks,
+                        importance_sampling=importance_sampling,
+                    )
+                except ValueError as exc:
+                    report = str(exc)
+            st.session_state["cprofile_report"] = (params_signature, report)
+        stored_report = st.session_state.get("cprofile_report")
+        if stored_report is not None and stored_report[0] == params_signature:
+            st.code(stored_report[1], language="text")
+
     breakdown_expander = st.expander("Análise Detalhada da Mão")
     with breakdown_expander:
+        # O expander roda a cada rerun mesmo fechado: a enumeração (~1 s no flop) só sai
+        # quando pedida, e o LRU de compute_hand_potential vale enquanto as cartas não mudam.
+        show_potential = len(board_tuple) in (3, 4) and st.checkbox(
+            "Calcular força e potencial da mão (HS/PPot/NPot, enumeração exata)",
+            value=False,
+            key="show_hand_potential",
+        )
+        if show_potential:
+            dead_cards = tuple(sorted(card for _, cards in known_opponents_tuple for card in cards))
+            with st.spinner("Enumerando runouts e mãos do oponente..."):
+                potential = compute_hand_potential(tuple(sorted(hero_tuple)), tuple(sorted(board_tuple)), dead_cards)
+            st.markdown("**Força e potencial da mão (contra 1 mão aleatória)**")
+            potential_cols = st.columns(4)
+            potential_cols[0].metric("HS (agora)", f"{potential.hand_strength * 100:.1f}%")
+            potential_cols[1].metric("PPot", f"{potential.positive_potential * 100:.1f}%")
+            potential_cols[2].metric("NPot", f"{potential.negative_potential * 100:.1f}%")
+            potential_cols[3].metric("EHS", f"{potential.effective_strength * 100:.1f}%")
+            st.caption(
+                f"Enumeração exata: {potential.opponent_hands:,} mãos do oponente × "
+                f"{potential.runouts:,} runouts até o river. PPot = chance de passar à frente estando "
+                "atrás; NPot = chance de ficar atrás estando à frente. EHS = HS·(1−NPot) + (1−HS)·PPot."
+            )
+            st.divider()
         hero_overall = result.get("hero_most_common_category")
         hero_wins_category = result.get("hero_most_common_category_wins")
         if hero_overall:
@@ -1863,6 +6353,24 @@ def main() -> None:
                         st.write(f"- {entry['players']} jogadores: {entry['count']}")
                 st.caption(f"Empates formados apenas pelo board: {tie_breakdown.get('board_only_ties', 0)}")
 
+    backend_labels = {
+        "process": "processos",
+        "interpreter": "sub-interpretadores",
+        "thread": "threads (sem GIL)" if gil_disabled() else "threads (Monte Carlo em numpy)" if np is not None else "threads",
+        "serial": "desativada",
+    }
+    st.sidebar.caption(f"Execução paralela: {backend_labels[choose_parallel_backend()]}")
+    evaluator = get_evaluator_backend()
+    evaluator_rate = evaluator.rates.get(evaluator.backend.name, 0.0)
+    st.sidebar.caption(f"Avaliador de mãos: {evaluator.backend.name} ({evaluator_rate / 1000:,.0f} mil mãos/s)")
+    memory = memory_usage_snapshot()
+    st.sidebar.caption(
+        f"Memória: sessão ≈ {memory['session_bytes'] / 1024:.1f} KB • "
+        f"cache exato {memory['exact_cache_entries']} entradas ≈ {memory['exact_cache_bytes'] / 1024:.1f} KB "
+        f"(hits {memory['exact_cache_hits']}, misses {memory['exact_cache_misses']}, "
+        f"descartes {memory['exact_cache_evictions']})"
+    )
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,285 @@
+"""Gera offline a base de equities de flop consultada pelo app (``flop_equity.db``).
+
+Para cada uma das 1.755 classes de flop (isomorfismo de naipes) e cada uma das
+1.176 mãos possíveis do Hero grava (vitórias, empates, fração do pote nos
+empates) contra 1 a 3 oponentes
+aleatórios: enumeração completa contra 1 oponente e amostragem estratificada
+por runout (mesmo número de amostras em cada turn/river) contra 2 e 3. O
+cabeçalho guarda as amostras por runout e o maior erro padrão estratificado
+(vitória, empate ou derrota) medido entre todos os registros de cada número de
+oponentes, usado pelo app nos IC95% e para preferir o cálculo ao vivo quando
+o orçamento de tempo dá mais precisão que a base.
+
+O trabalho é dividido por classe de flop entre processos; cada flop concluído é
+marcado no índice do arquivo, então uma execução interrompida continua de onde parou.
+
+Uso:
+    python build_flop_db.py --workers 8
+    python build_flop_db.py --output /dados/flop_equity.db --samples-per-runout 16
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+from typing import List, Optional, Tuple
+
+from app import (
+    FLOP_DB_HEADER,
+    FLOP_DB_HERO_COMBOS,
+    FLOP_DB_INDEX_ENTRY,
+    FLOP_DB_MAGIC,
+    FLOP_DB_MAX_OPPONENTS,
+    FLOP_DB_PATH,
+    FLOP_DB_RECORD,
+    FLOP_DB_VERSION,
+    FLUSH_CARRY,
+    FLOP_DB_RUNOUTS,
+    FLUSH_MASK,
+    SHARE_UNITS,
+    SUIT_NIBBLE,
+    _flush_value,
+    _seven_card_tables,
+    build_deck,
+    canonical_flops,
+)
+
+
+def flop_class_counts(
+    flop_class: int, max_opponents: int, samples_per_runout: int, seed: int
+) -> Tuple[List[bytes], List[float]]:
+    """Contadores (vitórias, empates, frações de pote dos empates) por combo do Hero, um bloco por número de oponentes.
+
+    A fração do pote soma ``SHARE_UNITS // jogadores empatados`` em cada empate:
+    contra 2+ oponentes um empate pode dividir o pote em três ou quatro.
+
+    Também retorna, por número de oponentes, o maior erro padrão estratificado entre
+    os combos do flop: Var(p̂) = (1/B²) Σ_b s_b² / n, como no motor estratificado do app.
+    """
+    unsuited, flushes, _ = _seven_card_tables()
+    deck = build_deck()
+    flop = [deck[idx] for idx in canonical_flops()[flop_class]]
+    rest = [card for card in deck if card not in flop]
+    rng = random.Random(f"{seed}:{flop_class}")
+    counts = [array("I", [0]) * (3 * FLOP_DB_HERO_COMBOS) for _ in range(max_opponents)]
+    # Σ_b (contagem no runout)² de vitórias, empates e derrotas, para o erro padrão.
+    squares = [array("Q", [0]) * (3 * FLOP_DB_HERO_COMBOS) for _ in range(max_opponents)]
+    live_size = len(rest) - 2
+    villain_cards = 2 * max_opponents
+    for turn, river in combinations(range(len(rest)), 2):
+        board = flop + [rest[turn], rest[river]]
+        product = 1
+        suit_counts = 0
+        for card in board:
+            product *= card & 0xFF
+            suit_counts += SUIT_NIBBLE[(card >> 12) & 0xF]
+        live = [position for position in range(len(rest)) if position != turn and position != river]
+        # Ranking de todas as mãos com as 47 cartas vivas (tabela cheia, simétrica).
+        values = [0] * (live_size * live_size)
+        by_card: List[List[int]] = [[] for _ in range(live_size)]
+        all_values: List[int] = []
+        for idx_a, idx_b in combinations(range(live_size), 2):
+            card_a = rest[live[idx_a]]
+            card_b = rest[live[idx_b]]
+            hand_suits = suit_counts + SUIT_NIBBLE[(card_a >> 12) & 0xF] + SUIT_NIBBLE[(card_b >> 12) & 0xF]
+            value = unsuited[product * (card_a & 0xFF) * (card_b & 0xFF)]
+            if (hand_suits + FLUSH_CARRY) & FLUSH_MASK:
+                value = min(value, _flush_value(board + [card_a, card_b], hand_suits, flushes))
+            values[idx_a * live_size + idx_b] = values[idx_b * live_size + idx_a] = value
+            by_card[idx_a].append(value)
+            by_card[idx_b].append(value)
+            all_values.append(value)
+        all_values.sort()
+        for card_values in by_card:
+            card_values.sort()
+
+        heads_up = counts[0]
+        for idx_a, idx_b in combinations(range(live_size), 2):
+            hero_value = values[idx_a * live_size + idx_b]
+            # Menor valor = mão melhor. Descontam-se as mãos que usam uma carta do Hero
+            # (a própria mão do Hero aparece nas três listas e é somada de volta).
+            worse = (
+                len(all_values)
+                - bisect_right(all_values, hero_value)
+                - len(by_card[idx_a])
+                + bisect_right(by_card[idx_a], hero_value)
+                - len(by_card[idx_b])
+                + bisect_right(by_card[idx_b], hero_value)
+            )
+            equal = (
+                bisect_right(all_values, hero_value)
+                - bisect_left(all_values, hero_value)
+                - bisect_right(by_card[idx_a], hero_value)
+                + bisect_left(by_card[idx_a], hero_value)
+                - bisect_right(by_card[idx_b], hero_value)
+                + bisect_left(by_card[idx_b], hero_value)
+                + 1
+            )
+            low, high = live[idx_a], live[idx_b]
+            slot = 3 * (high * (high - 1) // 2 + low)
+            heads_up[slot] += worse
+            heads_up[slot + 1] += equal
+            heads_up[slot + 2] += equal * (SHARE_UNITS // 2)
+
+            if max_opponents < 2:
+                continue
+            # 2+ oponentes: as mesmas cartas sorteadas servem a todos (prefixos de 2k cartas).
+            runout = [0] * (3 * max_opponents)
+            for _ in range(samples_per_runout):
+                dealt = rng.sample(range(live_size), villain_cards)
+                while idx_a in dealt or idx_b in dealt:
+                    dealt = rng.sample(range(live_size), villain_cards)
+                best = values[dealt[0] * live_size + dealt[1]]
+                best_count = 1
+                for opponents in range(2, max_opponents + 1):
+                    value = values[dealt[2 * opponents - 2] * live_size + dealt[2 * opponents - 1]]
+                    if value < best:
+                        best = value
+                        best_count = 1
+                    elif value == best:
+                        best_count += 1
+                    if hero_value < best:
+                        runout[3 * opponents - 3] += 1
+                    elif hero_value == best:
+                        runout[3 * opponents - 2] += 1
+                        runout[3 * opponents - 1] += SHARE_UNITS // (1 + best_count)
+            for opponents in range(2, max_opponents + 1):
+                runout_wins = runout[3 * opponents - 3]
+                runout_ties = runout[3 * opponents - 2]
+                runout_losses = samples_per_runout - runout_wins - runout_ties
+                counts[opponents - 1][slot] += runout_wins
+                counts[opponents - 1][slot + 1] += runout_ties
+                counts[opponents - 1][slot + 2] += runout[3 * opponents - 1]
+                squares[opponents - 1][slot] += runout_wins * runout_wins
+                squares[opponents - 1][slot + 1] += runout_ties * runout_ties
+                squares[opponents - 1][slot + 2] += runout_losses * runout_losses
+    max_errors = [0.0] * max_opponents
+    n = samples_per_runout
+    total = FLOP_DB_RUNOUTS * n
+    for opponents in range(2, max_opponents + 1):
+        block, block_squares = counts[opponents - 1], squares[opponents - 1]
+        worst = 0.0
+        for combo in range(FLOP_DB_HERO_COMBOS):
+            wins, ties = block[3 * combo], block[3 * combo + 1]
+            for label, count in enumerate((wins, ties, total - wins - ties)):
+                if n > 1:
+                    # Σ_b s_b² = (Σx - Σx²/n) / (n - 1), com x = contagem do runout.
+                    variance = (count - block_squares[3 * combo + label] / n) / (n - 1) / n
+                    variance /= FLOP_DB_RUNOUTS * FLOP_DB_RUNOUTS
+                else:
+                    # Uma amostra por runout não mede a variância interna: limite binomial.
+                    variance = count * (total - count) / (total * total * total)
+                worst = max(worst, variance)
+        max_errors[opponents - 1] = worst ** 0.5
+    blocks = []
+    for block in counts:
+        if sys.byteorder != "little":
+            block.byteswap()
+        blocks.append(block.tobytes())
+    return blocks, max_errors
+
+
+def open_database(path: str, max_opponents: int, samples_per_runout: int) -> int:
+    """Cria o arquivo (esparso) ou valida o existente; retorna o offset dos dados."""
+    flops = canonical_flops()
+    index_size = len(flops) * FLOP_DB_INDEX_ENTRY.size
+    data_start = FLOP_DB_HEADER.size + index_size
+    expected = (
+        FLOP_DB_MAGIC,
+        FLOP_DB_VERSION,
+        len(flops),
+        FLOP_DB_HERO_COMBOS,
+        max_opponents,
+        0,
+        samples_per_runout,
+    )
+    if os.path.exists(path):
+        with open(path, "rb") as handle:
+            header = FLOP_DB_HEADER.unpack(handle.read(FLOP_DB_HEADER.size))
+        if header[:7] != expected:
+            raise SystemExit(
+                f"{path} foi gerado com outros parâmetros {header[:2] + header[4:7]} "
+                f"(versão, máx. oponentes, reservado, amostras por runout); apague-o ou use os mesmos."
+            )
+        return data_start
+    with open(path, "wb") as handle:
+        handle.write(FLOP_DB_HEADER.pack(*expected, 0.0, 0.0, 0.0))
+        for flop in flops:
+            handle.write(FLOP_DB_INDEX_ENTRY.pack(*flop, 0))
+        handle.truncate(data_start + len(flops) * max_opponents * FLOP_DB_HERO_COMBOS * FLOP_DB_RECORD.size)
+    return data_start
+
+
+def build(
+    path: str,
+    workers: int,
+    max_opponents: int,
+    samples_per_runout: int,
+    seed: int,
+    limit: Optional[int] = None,
+) -> None:
+    data_start = open_database(path, max_opponents, samples_per_runout)
+    flops = canonical_flops()
+    done_mask = (1 << max_opponents) - 1
+    with open(path, "r+b") as handle:
+        pending = []
+        for flop_class in range(len(flops)):
+            handle.seek(FLOP_DB_HEADER.size + flop_class * FLOP_DB_INDEX_ENTRY.size)
+            if FLOP_DB_INDEX_ENTRY.unpack(handle.read(FLOP_DB_INDEX_ENTRY.size))[3] != done_mask:
+                pending.append(flop_class)
+        print(f"{len(flops) - len(pending)} flops já prontos, {len(pending)} pendentes.")
+        if limit is not None:
+            pending = pending[:limit]
+        start = time.perf_counter()
+        block_size = FLOP_DB_HERO_COMBOS * FLOP_DB_RECORD.size
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(flop_class_counts, flop_class, max_opponents, samples_per_runout, seed): flop_class
+                for flop_class in pending
+            }
+            for finished, future in enumerate(as_completed(futures), start=1):
+                flop_class = futures[future]
+                blocks, errors = future.result()
+                for opponents, block in enumerate(blocks):
+                    handle.seek(data_start + (flop_class * max_opponents + opponents) * block_size)
+                    handle.write(block)
+                handle.seek(0)
+                header = FLOP_DB_HEADER.unpack(handle.read(FLOP_DB_HEADER.size))
+                worst = [max(old, new) for old, new in zip(header[7:], errors + [0.0] * FLOP_DB_MAX_OPPONENTS)]
+                handle.seek(0)
+                handle.write(FLOP_DB_HEADER.pack(*header[:7], *worst))
+                # Dados primeiro, marca depois: um flop só conta como pronto se foi gravado inteiro.
+                handle.flush()
+                os.fsync(handle.fileno())
+                handle.seek(FLOP_DB_HEADER.size + flop_class * FLOP_DB_INDEX_ENTRY.size + 3)
+                handle.write(bytes([done_mask]))
+                handle.flush()
+                elapsed = time.perf_counter() - start
+                remaining = elapsed / finished * (len(pending) - finished)
+                print(f"[{finished}/{len(pending)}] flop {flop_class} ({elapsed:.0f}s, ~{remaining:.0f}s restantes)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gera a base de equities de flop do app.")
+    parser.add_argument("--output", default=FLOP_DB_PATH, help="Arquivo de saída (padrão: POKER_FLOP_DB).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-opponents", type=int, default=FLOP_DB_MAX_OPPONENTS, choices=(1, 2, 3))
+    parser.add_argument(
+        "--samples-per-runout",
+        type=int,
+        default=4,
+        help="Amostras de oponentes por runout e combo do Hero para 2–3 oponentes (erro padrão até 0,5/√(1.081·n)).",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--limit", type=int, default=None, help="Calcula no máximo N flops nesta execução.")
+    args = parser.parse_args()
+    build(args.output, args.workers, args.max_opponents, args.samples_per_runout, args.seed, args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Gera offline a matriz de confrontos heads-up pré-flop consultada pelo app.
+
+Enumera uma vez cada classe de board de 5 cartas por isomorfismo de naipes
+(134.459 classes, com peso igual ao tamanho da órbita), ranqueia as 1.326 mãos
+iniciais em cada board e acumula a comparação de todas contra todas em
+matrizes 1326x1326. A simetrização Σ_σ P_σ A P_σᵀ / 24 devolve as contagens
+exatas de todos os 1.712.304 boards de cada confronto.
+
+O arquivo guarda só os confrontos canônicos (por naipes) com vitórias/empates e
+as médias 169x169 por classe de mão.
+
+Uso:
+    python build_preflop_matrix.py --workers 8
+
+Requer numpy (apenas o gerador; o app lê o arquivo com a biblioteca padrão).
+"""
+
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from typing import List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende do ambiente
+    raise SystemExit("build_preflop_matrix.py requer numpy: pip install numpy")
+
+from app import (
+    FLUSH_CARRY,
+    FLUSH_MASK,
+    PREFLOP_HAND_COUNT,
+    PREFLOP_MATRIX_HEADER,
+    PREFLOP_MATRIX_MAGIC,
+    PREFLOP_MATRIX_PATH,
+    PREFLOP_MATRIX_VERSION,
+    SUIT_NIBBLE,
+    _all_suit_symmetries,
+    _deck_positions,
+    _flush_value,
+    _seven_card_tables,
+    build_deck,
+    preflop_class_index,
+    preflop_hand_permutations,
+    preflop_hands,
+)
+
+BOARDS_PER_MATCHUP = math.comb(48, 5)
+
+
+def board_classes() -> List[Tuple[Tuple[int, ...], int]]:
+    """Um representativo por órbita de boards de 5 cartas e o tamanho da órbita."""
+    deck = build_deck()
+    position = _deck_positions()
+    card_permutations = [[position[card_map[card]] for card in deck] for card_map in _all_suit_symmetries()]
+    binomial = [[math.comb(n, k) for k in range(6)] for n in range(53)]
+    visited = bytearray(math.comb(52, 5))
+    classes = []
+    for board in combinations(range(52), 5):
+        rank = sum(binomial[card][slot + 1] for slot, card in enumerate(board))
+        if visited[rank]:
+            continue
+        images = set()
+        for permutation in card_permutations:
+            image = sorted(permutation[card] for card in board)
+            images.add(sum(binomial[card][slot + 1] for slot, card in enumerate(image)))
+        for image_rank in images:
+            visited[image_rank] = 1
+        classes.append((board, len(images)))
+    return classes
+
+
+def accumulate(boards: Sequence[Tuple[Tuple[int, ...], int]]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Soma ponderada de [mão i vence mão j] e [empate] sobre os boards recebidos."""
+    unsuited, flushes, _ = _seven_card_tables()
+    deck = build_deck()
+    hands = [(deck[a], deck[b]) for a, b in preflop_hands()]
+    wins = np.zeros((PREFLOP_HAND_COUNT, PREFLOP_HAND_COUNT), dtype=np.int64)
+    ties = np.zeros_like(wins)
+    # Boards de mesmo peso somam num acumulador int32 sem multiplicação por board.
+    batch_wins = np.zeros((PREFLOP_HAND_COUNT, PREFLOP_HAND_COUNT), dtype=np.int32)
+    batch_ties = np.zeros_like(batch_wins)
+    batch_weight = 0
+    values = np.empty(PREFLOP_HAND_COUNT, dtype=np.float64)
+    for board_positions, weight in sorted(boards, key=lambda item: item[1]):
+        if weight != batch_weight:
+            wins += batch_weight * batch_wins.astype(np.int64)
+            ties += batch_weight * batch_ties.astype(np.int64)
+            batch_wins[:] = 0
+            batch_ties[:] = 0
+            batch_weight = weight
+        board = [deck[idx] for idx in board_positions]
+        board_set = set(board)
+        product = 1
+        suit_counts = 0
+        for card in board:
+            product *= card & 0xFF
+            suit_counts += SUIT_NIBBLE[(card >> 12) & 0xF]
+        for idx, (card_a, card_b) in enumerate(hands):
+            if card_a in board_set or card_b in board_set:
+                # NaN nunca é menor nem igual: mãos que usam carta do board não entram.
+                values[idx] = math.nan
+                continue
+            hand_suits = suit_counts + SUIT_NIBBLE[(card_a >> 12) & 0xF] + SUIT_NIBBLE[(card_b >> 12) & 0xF]
+            value = unsuited[product * (card_a & 0xFF) * (card_b & 0xFF)]
+            if (hand_suits + FLUSH_CARRY) & FLUSH_MASK:
+                value = min(value, _flush_value(board + [card_a, card_b], hand_suits, flushes))
+            values[idx] = value
+        np.add(batch_wins, values[:, None] < values[None, :], out=batch_wins, casting="unsafe")
+        np.add(batch_ties, values[:, None] == values[None, :], out=batch_ties, casting="unsafe")
+    wins += batch_weight * batch_wins.astype(np.int64)
+    ties += batch_weight * batch_ties.astype(np.int64)
+    return wins, ties
+
+
+def build(path: str, workers: int) -> None:
+    start = time.perf_counter()
+    classes = board_classes()
+    print(f"{len(classes)} classes de board ({time.perf_counter() - start:.0f}s).")
+    chunks = [classes[offset :: workers * 4] for offset in range(workers * 4)]
+    wins = np.zeros((PREFLOP_HAND_COUNT, PREFLOP_HAND_COUNT), dtype=np.int64)
+    ties = np.zeros_like(wins)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for finished, (chunk_wins, chunk_ties) in enumerate(pool.map(accumulate, chunks), start=1):
+            wins += chunk_wins
+            ties += chunk_ties
+            print(f"[{finished}/{len(chunks)}] ({time.perf_counter() - start:.0f}s)")
+
+    # Cada órbita entrou com seu representativo; somar as 24 imagens e dividir por 24
+    # reconstrói a soma sobre todos os boards.
+    permutations_by_suit = [np.array(permutation) for permutation in preflop_hand_permutations()]
+    full_wins = np.zeros_like(wins)
+    full_ties = np.zeros_like(ties)
+    for permutation in permutations_by_suit:
+        full_wins[np.ix_(permutation, permutation)] += wins
+        full_ties[np.ix_(permutation, permutation)] += ties
+    if (full_wins % 24).any() or (full_ties % 24).any():
+        raise SystemExit("Simetrização inconsistente: contagens não divisíveis por 24.")
+    full_wins //= 24
+    full_ties //= 24
+
+    hands = preflop_hands()
+    disjoint = np.array([[not set(a) & set(b) for b in hands] for a in hands])
+    hero_idx, villain_idx = np.nonzero(disjoint)
+    keys = np.full(hero_idx.shape, np.iinfo(np.int64).max, dtype=np.int64)
+    for permutation in permutations_by_suit:
+        keys = np.minimum(keys, permutation[hero_idx] * PREFLOP_HAND_COUNT + permutation[villain_idx])
+    canonical = hero_idx * PREFLOP_HAND_COUNT + villain_idx == keys
+    canonical_keys = keys[canonical]
+    order = np.argsort(canonical_keys)
+    canonical_hero = hero_idx[canonical][order]
+    canonical_villain = villain_idx[canonical][order]
+    if (full_wins[hero_idx, villain_idx] + full_ties[hero_idx, villain_idx] > BOARDS_PER_MATCHUP).any():
+        raise SystemExit("Contagem acima do número de boards de um confronto.")
+
+    class_of = np.array([preflop_class_index(a, b) for a, b in hands])
+    class_wins = np.zeros((169, 169), dtype=np.float64)
+    class_ties = np.zeros((169, 169), dtype=np.float64)
+    class_total = np.zeros((169, 169), dtype=np.float64)
+    np.add.at(class_wins, (class_of[hero_idx], class_of[villain_idx]), full_wins[hero_idx, villain_idx])
+    np.add.at(class_ties, (class_of[hero_idx], class_of[villain_idx]), full_ties[hero_idx, villain_idx])
+    np.add.at(class_total, (class_of[hero_idx], class_of[villain_idx]), BOARDS_PER_MATCHUP)
+
+    with open(path + ".tmp", "wb") as handle:
+        handle.write(
+            PREFLOP_MATRIX_HEADER.pack(
+                PREFLOP_MATRIX_MAGIC, PREFLOP_MATRIX_VERSION, len(canonical_keys), BOARDS_PER_MATCHUP
+            )
+        )
+        handle.write(canonical_keys[order].astype("<u4").tobytes())
+        handle.write(full_wins[canonical_hero, canonical_villain].astype("<u4").tobytes())
+        handle.write(full_ties[canonical_hero, canonical_villain].astype("<u4").tobytes())
+        handle.write((class_wins / class_total * 100).astype("<f4").tobytes())
+        handle.write((class_ties / class_total * 100).astype("<f4").tobytes())
+    os.replace(path + ".tmp", path)
+    print(f"{len(canonical_keys)} confrontos canônicos gravados em {path} ({time.perf_counter() - start:.0f}s).")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gera a matriz de confrontos heads-up pré-flop do app.")
+    parser.add_argument("--output", default=PREFLOP_MATRIX_PATH, help="Arquivo de saída (padrão: POKER_PREFLOP_MATRIX).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    build(args.output, max(1, args.workers))
+
+
+if __name__ == "__main__":
+    main()
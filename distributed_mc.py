@@ -0,0 +1,337 @@
+"""Monte Carlo distribuído: um coordenador e workers em vários nós conectados por TCP.
+
+O coordenador abre (ou retoma) o mesmo job de ``long_run.py``, no mesmo formato
+de checkpoint, e entrega aos workers blocos (cenário, semente, iterações). A
+semente de cada bloco vem de ``spawn_seed``, então o resultado é idêntico ao de
+``long_run.py`` com a mesma semente, qualquer que seja o número de nós. Cada
+worker roda o kernel ``_mc_worker_fast`` num pool de processos local, um por
+núcleo, e mantém o dobro de blocos em voo para a rede não deixar núcleos parados.
+
+Um worker que cai (conexão fechada) ou fica mais de ``--lease-seconds`` sem
+devolver um bloco é desconectado, e os blocos dele voltam para o início da fila.
+Um bloco só entra nos contadores uma vez, mesmo que seja recalculado.
+
+As mensagens são JSON com prefixo de tamanho e não são cifradas: rode numa rede
+confiável. ``--token`` (ou ``POKER_CLUSTER_TOKEN``) recusa workers sem o segredo.
+
+Uso:
+    python distributed_mc.py coordinator job.json --hero "As Kd" --board "7h 8h 9c" --opponents 3 \\
+        --iterations 500000000 --host 0.0.0.0 --port 8766
+    python distributed_mc.py worker --connect coordenador:8766 --processes 32   # em cada nó
+    python distributed_mc.py coordinator job.json --local-workers 4             # workers locais
+"""
+
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import socket
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Deque, Dict, Optional, Set, Tuple
+
+from app import SidePotAccumulator, TableEquityAccumulator
+from long_run import (
+    LongRun,
+    add_job_arguments,
+    chunk_arguments,
+    decode_outcomes,
+    encode_outcomes,
+    ignore_interrupts,
+    open_job,
+    print_report,
+    run_chunk,
+    spawn_seed,
+    write_checkpoint,
+)
+
+FRAME = struct.Struct(">I")
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+DEFAULT_PORT = 8766
+
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[Dict[str, object]]:
+    """Próxima mensagem da conexão; ``None`` quando o outro lado fecha."""
+    try:
+        header = await reader.readexactly(FRAME.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (size,) = FRAME.unpack(header)
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Mensagem de {size} bytes excede o limite.")
+    try:
+        return json.loads(await reader.readexactly(size))
+    except asyncio.IncompleteReadError:
+        return None
+
+
+def send_message(writer: asyncio.StreamWriter, message: Dict[str, object]) -> None:
+    body = json.dumps(message, separators=(",", ":")).encode()
+    writer.write(FRAME.pack(len(body)) + body)
+
+
+class Coordinator:
+    """Fila de blocos, concessões por worker e contadores somados do job."""
+
+    def __init__(self, path: str, run: LongRun, token: str, lease_seconds: float) -> None:
+        self.path = path
+        self.run = run
+        self.token = token
+        self.lease_seconds = lease_seconds
+        self.queue: Deque[int] = deque(run.pending())
+        self.workers: Dict[str, int] = {}
+        self.completed = 0
+
+    @property
+    def finished(self) -> bool:
+        return len(self.run.done) >= self.run.target
+
+    def complete(self, index: int, message: Dict[str, object]) -> None:
+        if index in self.run.done:
+            return
+        job = self.run.job
+        table = TableEquityAccumulator(int(job["opponents"]), len(job["known"]))  # type: ignore[arg-type]
+        table.wins = list(message["table"]["wins"])  # type: ignore[index]
+        table.shares = list(message["table"]["shares"])  # type: ignore[index]
+        side_pots = None
+        if self.run.side_pots is not None:
+            side_pots = SidePotAccumulator(self.run.side_pots.stacks, lower_is_better=False)
+            side_pots.chips = [list(chips) for chips in message["side_pots"]]  # type: ignore[union-attr]
+            side_pots.outcomes = decode_outcomes(message.get("side_pot_outcomes"))  # type: ignore[arg-type]
+        wins, ties, losses = message["counts"]  # type: ignore[misc]
+        self.run.merge(index, (int(wins), int(ties), int(losses)), table, side_pots)
+        self.completed += 1
+
+    async def handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = "%s:%s" % writer.get_extra_info("peername")[:2]
+        leased: Set[int] = set()
+        try:
+            hello = await asyncio.wait_for(read_message(reader), 30)
+            if not hello or hello.get("type") != "hello":
+                return
+            if not hmac.compare_digest(str(hello.get("token", "")), self.token):
+                print(f"Worker {peer} recusado: token inválido.", file=sys.stderr)
+                return
+            slots = max(1, int(hello.get("slots", 1)))  # type: ignore[arg-type]
+            self.workers[peer] = slots
+            print(f"Worker {hello.get('node', '?')} ({peer}) conectado com {slots} processos.")
+            send_message(writer, {"type": "job", "job": self.run.job})
+            chunk = int(self.run.job["chunk"])  # type: ignore[arg-type]
+            seed = int(self.run.job["seed"])  # type: ignore[arg-type]
+            while True:
+                # Dois blocos por processo: enquanto um roda, o próximo já está no nó.
+                while len(leased) < 2 * slots and self.queue:
+                    index = self.queue.popleft()
+                    if index in self.run.done:
+                        continue
+                    leased.add(index)
+                    send_message(
+                        writer, {"type": "chunk", "index": index, "seed": spawn_seed(seed, index), "iterations": chunk}
+                    )
+                await writer.drain()
+                if not leased:
+                    if self.finished:
+                        send_message(writer, {"type": "done"})
+                        await writer.drain()
+                        return
+                    # Os blocos restantes estão com outros workers; espera sobrar ou voltar algum.
+                    await asyncio.sleep(0.5)
+                    continue
+                message = await asyncio.wait_for(read_message(reader), self.lease_seconds)
+                if message is None:
+                    raise ConnectionError("conexão fechada")
+                index = int(message.get("index", -1))  # type: ignore[arg-type]
+                if message.get("type") == "result" and index in leased:
+                    leased.discard(index)
+                    self.complete(index, message)
+        except (OSError, ValueError, KeyError, TypeError, asyncio.TimeoutError) as exc:
+            reason = "sem resposta" if isinstance(exc, asyncio.TimeoutError) else str(exc) or type(exc).__name__
+            print(f"Worker {peer} perdido ({reason}); {len(leased)} blocos voltam para a fila.", file=sys.stderr)
+        finally:
+            for index in sorted(leased, reverse=True):
+                if index not in self.run.done:
+                    self.queue.appendleft(index)
+            self.workers.pop(peer, None)
+            writer.close()
+
+
+async def coordinate(
+    coordinator: Coordinator, host: str, port: int, checkpoint_seconds: float, local_workers: int, local_processes: int
+) -> None:
+    run = coordinator.run
+    server = await asyncio.start_server(coordinator.handle_worker, host, port)
+    bound = server.sockets[0].getsockname()
+    print(
+        f"Coordenador em {bound[0]}:{bound[1]}: {len(run.done)} blocos já prontos "
+        f"({run.iterations:,} iterações), {len(coordinator.queue)} pendentes."
+    )
+    children = []
+    for _ in range(local_workers):
+        children.append(
+            await asyncio.create_subprocess_exec(
+                sys.executable,
+                os.path.abspath(__file__),
+                "worker",
+                "--connect",
+                f"127.0.0.1:{bound[1]}",
+                "--processes",
+                str(local_processes),
+                "--token",
+                coordinator.token,
+            )
+        )
+    start = last_checkpoint = time.perf_counter()
+    try:
+        while not coordinator.finished:
+            await asyncio.sleep(0.2)
+            now = time.perf_counter()
+            if now - last_checkpoint >= checkpoint_seconds:
+                run.elapsed += now - last_checkpoint
+                last_checkpoint = now
+                write_checkpoint(coordinator.path, run)
+                cores = sum(coordinator.workers.values())
+                rate = coordinator.completed * int(run.job["chunk"]) / (now - start)  # type: ignore[arg-type]
+                print(
+                    f"[{len(run.done)}/{run.target}] {run.iterations:,} iterações, {len(coordinator.workers)} workers "
+                    f"({cores} processos), {rate:,.0f} it/s — checkpoint gravado"
+                )
+    finally:
+        run.elapsed += time.perf_counter() - last_checkpoint
+        write_checkpoint(coordinator.path, run)
+    # Dá tempo aos workers de receberem o "done" antes de fechar o servidor.
+    for child in children:
+        try:
+            await asyncio.wait_for(child.wait(), 10)
+        except asyncio.TimeoutError:
+            child.kill()
+    server.close()
+    await server.wait_closed()
+
+
+async def open_connection(address: str, retry_seconds: float) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    host, _, port = address.rpartition(":")
+    deadline = time.monotonic() + retry_seconds
+    while True:
+        try:
+            return await asyncio.open_connection(host or "127.0.0.1", int(port or DEFAULT_PORT))
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise SystemExit(f"Coordenador {address} inacessível.")
+            await asyncio.sleep(1.0)
+
+
+async def work(address: str, processes: int, token: str, retry_seconds: float) -> None:
+    pool = ProcessPoolExecutor(max_workers=processes, initializer=ignore_interrupts)
+    try:
+        # Processos criados antes de conectar: com fork eles herdariam o socket e, se este
+        # processo morresse, a conexão não fecharia e o coordenador só notaria pela concessão.
+        pool.submit(int).result()
+        finished = await serve_chunks(pool, address, processes, token, retry_seconds)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    print(f"Worker encerrado: {finished} blocos calculados.")
+
+
+async def serve_chunks(
+    pool: ProcessPoolExecutor, address: str, processes: int, token: str, retry_seconds: float
+) -> int:
+    """Calcula os blocos recebidos até o coordenador mandar ``done`` ou fechar; retorna quantos."""
+    reader, writer = await open_connection(address, retry_seconds)
+    loop = asyncio.get_running_loop()
+    running: Set[asyncio.Task] = set()
+    finished = 0
+
+    async def compute(fixed: Tuple[object, ...], index: int, seed: int, iterations: int) -> None:
+        nonlocal finished
+        counts, table, side_pots = await loop.run_in_executor(pool, run_chunk, fixed, iterations, seed)
+        send_message(
+            writer,
+            {
+                "type": "result",
+                "index": index,
+                "counts": counts,
+                "table": {"wins": table.wins, "shares": table.shares},
+                "side_pots": side_pots.chips if side_pots is not None else None,
+                "side_pot_outcomes": encode_outcomes(side_pots),
+            },
+        )
+        finished += 1
+
+    try:
+        send_message(writer, {"type": "hello", "slots": processes, "token": token, "node": socket.gethostname()})
+        await writer.drain()
+        message = await read_message(reader)
+        if not message or message.get("type") != "job":
+            raise SystemExit("Coordenador recusou o worker (token?) ou fechou a conexão.")
+        fixed = chunk_arguments(message["job"])  # type: ignore[arg-type]
+        while True:
+            message = await read_message(reader)
+            if message is None or message.get("type") != "chunk":
+                break
+            task = asyncio.create_task(
+                compute(fixed, int(message["index"]), int(message["seed"]), int(message["iterations"]))  # type: ignore[arg-type]
+            )
+            running.add(task)
+            task.add_done_callback(running.discard)
+    finally:
+        for task in running:
+            task.cancel()
+        writer.close()
+    return finished
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Monte Carlo distribuído (coordenador e workers via TCP).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    token_default = os.environ.get("POKER_CLUSTER_TOKEN", "")
+
+    coordinator_parser = commands.add_parser("coordinator", help="Distribui os blocos e grava o checkpoint.")
+    add_job_arguments(coordinator_parser)
+    coordinator_parser.add_argument("--host", default="127.0.0.1", help="Interface (0.0.0.0 para outros nós).")
+    coordinator_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    coordinator_parser.add_argument("--token", default=token_default, help="Segredo exigido dos workers.")
+    coordinator_parser.add_argument(
+        "--lease-seconds", type=float, default=300.0, help="Espera máxima por um resultado antes de reatribuir."
+    )
+    coordinator_parser.add_argument("--local-workers", type=int, default=0, help="Workers locais iniciados junto.")
+    coordinator_parser.add_argument("--local-processes", type=int, default=1, help="Processos de cada worker local.")
+
+    worker_parser = commands.add_parser("worker", help="Conecta ao coordenador e calcula blocos.")
+    worker_parser.add_argument("--connect", default=f"127.0.0.1:{DEFAULT_PORT}", help="host:porta do coordenador.")
+    worker_parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    worker_parser.add_argument("--token", default=token_default)
+    worker_parser.add_argument("--retry-seconds", type=float, default=60.0, help="Tenta conectar por até N segundos.")
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        try:
+            asyncio.run(work(args.connect, max(1, args.processes), args.token, args.retry_seconds))
+        except KeyboardInterrupt:
+            pass
+        return
+    run = open_job(args)
+    if run.target > len(run.done):
+        coordinator = Coordinator(args.checkpoint, run, args.token, args.lease_seconds)
+        try:
+            asyncio.run(
+                coordinate(
+                    coordinator,
+                    args.host,
+                    args.port,
+                    args.checkpoint_seconds,
+                    max(0, args.local_workers),
+                    max(1, args.local_processes),
+                )
+            )
+        except KeyboardInterrupt:
+            write_checkpoint(args.checkpoint, run)
+            raise SystemExit(f"Interrompido: {len(run.done)} blocos salvos em {args.checkpoint}.")
+    print_report(run)
+
+
+if __name__ == "__main__":
+    main()
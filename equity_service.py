@@ -0,0 +1,387 @@
+"""Serviço HTTP/JSON local com os motores de equity do app, para bots e scripts.
+
+Cada pedido é um ``POST /equity`` com o cenário em JSON; a resposta traz as
+porcentagens de vitória/empate/derrota, os contadores e, para estimativas, o IC95%.
+
+- Pedidos idênticos em andamento compartilham o mesmo cálculo.
+- Pedidos amostrados contra oponentes aleatórios (Monte Carlo, estratificado ou
+  exato progressivo no plano do app) que chegam dentro da janela de lote e dividem
+  mesa, número de oponentes e orçamento viram um único passe
+  (``simulate_board_batch``): runout e oponentes sorteados uma vez para todas as mãos.
+  Com todos os workers ocupados, a mesa espera um worker livre e o lote cresce
+  em vez de enfileirar passes que já nasceriam fora do prazo.
+- Exato, ``method: exact`` e oponentes conhecidos passam pelos motores do app
+  (cache LRU do exato).
+- ``deadline_ms`` limita o tempo do pedido: o orçamento dos motores com tempo é
+  cortado para caber (sem o piso de 0,5 s da interface), e um pedido que estoura
+  o prazo recebe 504 sem cancelar os demais.
+- ``GET /metrics`` expõe as métricas do processo no formato do Prometheus.
+
+Uso:
+    python equity_service.py --port 8765
+    curl -s localhost:8765/equity -d '{"hero": ["As", "Kd"], "board": ["7h", "8h", "9h"], "opponents": 2}'
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from app import (
+    METRICS,
+    EquityResult,
+    _compute_confidence_intervals,
+    allow_parallel_workers,
+    parse_card,
+    plan_equity_method,
+    record_calculation,
+    run_equity_calculation,
+    simulate_board_batch,
+)
+
+DEFAULT_TIME_BUDGET = 0.2
+DEFAULT_DEADLINE_MS = 2000
+# Margem reservada para montar e enviar a resposta dentro do prazo.
+DEADLINE_MARGIN = 0.02
+MAX_BODY_BYTES = 64 * 1024
+# Planos que o serviço troca pelo passe em lote quando não há oponentes conhecidos.
+BATCHED_METHODS = ("MONTE_CARLO", "STRATIFIED", "ANYTIME")
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    504: "Gateway Timeout",
+}
+
+Card = int
+
+
+class EquityRequest:
+    """Cenário validado de um pedido; ``key`` identifica cálculos idênticos."""
+
+    __slots__ = ("hero", "board", "opponents", "known", "method", "time_budget", "deadline")
+
+    def __init__(self, payload: Dict[str, object], received: float) -> None:
+        try:
+            self.hero = tuple(parse_card(str(token)) for token in payload["hero"])  # type: ignore[union-attr]
+            self.board = tuple(parse_card(str(token)) for token in payload.get("board", ()))  # type: ignore[union-attr]
+            known = payload.get("known", ()) or ()
+            self.known = tuple(tuple(parse_card(str(token)) for token in hand) for hand in known)  # type: ignore[union-attr]
+            self.opponents = int(payload.get("opponents", max(1, len(self.known))))  # type: ignore[arg-type]
+            self.method = str(payload.get("method", "auto"))
+            self.time_budget = float(payload.get("time_budget", DEFAULT_TIME_BUDGET))  # type: ignore[arg-type]
+            deadline_ms = float(payload.get("deadline_ms", DEFAULT_DEADLINE_MS))  # type: ignore[arg-type]
+        except (KeyError, TypeError) as exc:
+            raise ValueError(f"Pedido inválido: {exc}") from exc
+        if len(self.hero) != 2:
+            raise ValueError("Informe exatamente 2 cartas do Hero.")
+        if len(self.board) > 5:
+            raise ValueError("A mesa pode conter no máximo 5 cartas.")
+        if any(len(hand) != 2 for hand in self.known):
+            raise ValueError("Cada oponente conhecido deve possuir exatamente 2 cartas.")
+        cards = list(self.hero) + list(self.board) + [card for hand in self.known for card in hand]
+        if len(cards) != len(set(cards)):
+            raise ValueError("Existem cartas duplicadas no pedido.")
+        if not 1 <= self.opponents <= 8 or self.opponents < len(self.known):
+            raise ValueError("O número de oponentes deve ficar entre 1 e 8 e cobrir os conhecidos.")
+        if self.method not in ("auto", "exact", "monte_carlo"):
+            raise ValueError("method deve ser auto, exact ou monte_carlo.")
+        self.deadline = received + max(0.0, deadline_ms) / 1000
+
+    @property
+    def key(self) -> Tuple:
+        return (
+            tuple(sorted(self.hero)),
+            tuple(sorted(self.board)),
+            self.opponents,
+            self.known,
+            self.method,
+            self.time_budget,
+        )
+
+    def known_hands(self) -> Optional[List[List[Card]]]:
+        # Listas, não tuplas: ``normalize_known_opponents_entries`` lê uma 2-tupla
+        # iniciada por int como ``(id, cartas)``.
+        return [list(hand) for hand in self.known] or None
+
+    def budget(self, now: float) -> float:
+        """Orçamento do Monte Carlo cortado para caber no prazo do pedido."""
+        return max(0.0, min(self.time_budget, self.deadline - now - DEADLINE_MARGIN))
+
+
+def result_payload(result: EquityResult, meta: Dict[str, object], method: str) -> Dict[str, object]:
+    summary = result.to_dict()
+    payload: Dict[str, object] = {
+        "method": method,
+        "win_pct": summary["win_pct"],
+        "tie_pct": summary["tie_pct"],
+        "loss_pct": summary["loss_pct"],
+        "counts": summary["counts"],
+        "exact": not result.sampled and method != "monte_carlo",
+        "elapsed": meta.get("elapsed"),
+    }
+    if result.sampled or method == "monte_carlo":
+        samples = int(meta.get("iterations", result.total))  # type: ignore[arg-type]
+        standard_errors = meta.get("standard_errors")
+        ci = _compute_confidence_intervals(
+            result.wins,
+            result.ties,
+            result.losses,
+            samples,
+            meta.get("scenario_space"),  # type: ignore[arg-type]
+            standard_errors,  # type: ignore[arg-type]
+        )
+        payload["samples"] = samples
+        payload["ci95"] = {label: {"low": ci[label]["low"], "high": ci[label]["high"]} for label in ci}
+    if meta.get("batched_heroes"):
+        payload["batched_heroes"] = meta["batched_heroes"]
+    return payload
+
+
+class EquityBatcher:
+    """Agrupa pedidos concorrentes: deduplica cenários e junta Monte Carlo da mesma mesa."""
+
+    def __init__(self, batch_window: float, workers: int, use_parallel: bool) -> None:
+        self.batch_window = batch_window
+        self.use_parallel = use_parallel
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="equity-batch")
+        self.in_flight: Dict[Tuple, "asyncio.Future[Dict[str, object]]"] = {}
+        # (mesa, oponentes, orçamento) -> pedidos aguardando o fechamento da janela.
+        self.pending: Dict[Tuple, List[Tuple[EquityRequest, "asyncio.Future[Dict[str, object]]"]]] = {}
+        # Grupos com a janela fechada esperando um worker livre; enquanto esperam, continuam
+        # recebendo pedidos da mesma mesa, então o lote cresce com a carga.
+        self.ready: Deque[Tuple] = deque()
+        self.workers = workers
+        self.running_batches = 0
+        self.stats = {"requests": 0, "deduplicated": 0, "batches": 0, "batched_requests": 0, "timeouts": 0}
+
+    async def submit(self, request: EquityRequest) -> Dict[str, object]:
+        self.stats["requests"] += 1
+        key = request.key
+        future = self.in_flight.get(key)
+        if future is None:
+            method = self._plan(request)
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+            self._schedule(request, method, future)
+        else:
+            self.stats["deduplicated"] += 1
+        remaining = request.deadline - time.perf_counter()
+        if remaining <= 0:
+            self.stats["timeouts"] += 1
+            raise asyncio.TimeoutError
+        try:
+            # shield: o prazo deste pedido não cancela o cálculo compartilhado.
+            return await asyncio.wait_for(asyncio.shield(future), remaining)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+
+    def _schedule(self, request: EquityRequest, method: str, future: "asyncio.Future[Dict[str, object]]") -> None:
+        loop = asyncio.get_running_loop()
+        # Todo plano amostrado contra oponentes só aleatórios entra no lote da mesa:
+        # estratificado e exato progressivo também só estimam dentro do prazo curto.
+        if method in BATCHED_METHODS and not request.known and request.method != "exact":
+            group = (tuple(sorted(request.board)), request.opponents, request.time_budget)
+            waiting = self.pending.setdefault(group, [])
+            waiting.append((request, future))
+            if len(waiting) == 1:
+                loop.call_later(self.batch_window, self._flush, group)
+            return
+        task = loop.run_in_executor(self.executor, self._run_single, request, method, time.perf_counter())
+        self._chain(task, [future])
+
+    def _plan(self, request: EquityRequest) -> str:
+        if request.method == "monte_carlo":
+            return "MONTE_CARLO"
+        method, _ = plan_equity_method(
+            request.hero,
+            request.board,
+            request.opponents,
+            request.known_hands(),
+            time_budget=request.time_budget,
+            use_parallel=self.use_parallel,
+        )
+        if request.method == "exact" and method == "MONTE_CARLO":
+            raise ValueError("Cenário grande demais para enumeração exata; use monte_carlo.")
+        return method
+
+    def _flush(self, group: Tuple) -> None:
+        self.ready.append(group)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Inicia os grupos prontos enquanto houver worker livre para lotes."""
+        loop = asyncio.get_running_loop()
+        while self.ready and self.running_batches < self.workers:
+            waiting = self.pending.pop(self.ready.popleft(), [])
+            now = time.perf_counter()
+            live = []
+            for request, future in waiting:
+                if request.budget(now) > 0:
+                    live.append((request, future))
+                elif not future.done():
+                    future.set_exception(asyncio.TimeoutError())
+            if not live:
+                continue
+            self.stats["batches"] += 1
+            self.stats["batched_requests"] += len(live)
+            self.running_batches += 1
+            requests = [request for request, _ in live]
+            task = loop.run_in_executor(self.executor, self._run_batch, requests, now)
+            task.add_done_callback(self._batch_done)
+            self._chain(task, [future for _, future in live])
+
+    def _batch_done(self, _: "asyncio.Future") -> None:
+        self.running_batches -= 1
+        self._dispatch()
+
+    def _chain(self, task: "asyncio.Future", futures: Sequence["asyncio.Future[Dict[str, object]]"]) -> None:
+        def deliver(done: "asyncio.Future") -> None:
+            error = done.exception()
+            payloads = None if error else done.result()
+            for idx, future in enumerate(futures):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(payloads[idx] if isinstance(payloads, list) else payloads)
+
+        task.add_done_callback(deliver)
+
+    def _run_single(self, request: EquityRequest, method: str, now: float) -> Dict[str, object]:
+        result, meta = run_equity_calculation(
+            request.hero,
+            request.board,
+            request.opponents,
+            request.known_hands(),
+            method,  # type: ignore[arg-type]
+            request.budget(now),
+            False,
+            use_parallel=self.use_parallel,
+        )
+        label = "exact" if method in ("EXACT", "PRECOMPUTED") and not result.sampled else method.lower()
+        return result_payload(result, meta, label)
+
+    def _run_batch(self, requests: Sequence[EquityRequest], now: float) -> List[Dict[str, object]]:
+        # Um só passe para o lote: o orçamento é o do pedido com prazo mais curto.
+        budget = min(request.budget(now) for request in requests)
+        start = time.perf_counter()
+        results, meta = simulate_board_batch(
+            requests[0].board,
+            requests[0].opponents,
+            [request.hero for request in requests],
+            budget,
+            use_parallel=self.use_parallel,
+        )
+        record_calculation("BATCH", int(meta.get("iterations", 0)), time.perf_counter() - start)  # type: ignore[arg-type]
+        return [result_payload(result, result.mc_meta or {}, "monte_carlo") for result in results]
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    if length > MAX_BODY_BYTES:
+        raise OverflowError
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+def write_response(
+    writer: asyncio.StreamWriter,
+    status: int,
+    payload: Dict[str, object],
+    keep_alive: bool,
+    text: Optional[str] = None,
+) -> None:
+    """Resposta JSON; com ``text``, texto puro no formato de exposição do Prometheus."""
+    body = json.dumps(payload).encode() if text is None else text.encode()
+    content_type = "application/json" if text is None else "text/plain; version=0.0.4; charset=utf-8"
+    head = (
+        f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode() + body)
+
+
+async def handle_connection(batcher: EquityBatcher, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            try:
+                parsed = await read_request(reader)
+            except OverflowError:
+                write_response(writer, 413, {"error": "Corpo do pedido grande demais."}, False)
+                break
+            except (ValueError, asyncio.IncompleteReadError):
+                break
+            if parsed is None:
+                break
+            method, path, headers, body = parsed
+            keep_alive = headers.get("connection", "").lower() != "close"
+            received = time.perf_counter()
+            if method == "GET" and path == "/health":
+                write_response(writer, 200, {"status": "ok", "stats": batcher.stats}, keep_alive)
+            elif method == "GET" and path == "/metrics":
+                write_response(writer, 200, {}, keep_alive, text=METRICS.render())
+            elif method == "POST" and path == "/equity":
+                try:
+                    request = EquityRequest(json.loads(body or b"{}"), received)
+                    write_response(writer, 200, await batcher.submit(request), keep_alive)
+                except asyncio.TimeoutError:
+                    write_response(writer, 504, {"error": "Prazo do pedido esgotado."}, keep_alive)
+                except ValueError as exc:
+                    write_response(writer, 400, {"error": str(exc)}, keep_alive)
+                except Exception as exc:  # noqa: BLE001
+                    # Falha inesperada de um motor: o cliente recebe 500 em vez de uma conexão derrubada.
+                    write_response(writer, 500, {"error": f"Erro interno: {type(exc).__name__}: {exc}"}, keep_alive)
+            else:
+                write_response(writer, 404, {"error": "Use POST /equity, GET /health ou GET /metrics."}, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int, batch_window_ms: float, workers: int) -> None:
+    batcher = EquityBatcher(batch_window_ms / 1000, workers, use_parallel=allow_parallel_workers())
+    server = await asyncio.start_server(lambda r, w: handle_connection(batcher, r, w), host, port)
+    print(f"Serviço de equity em http://{host}:{port} (janela de lote {batch_window_ms:g} ms)")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serviço HTTP local de equity do app.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--batch-window-ms", type=float, default=5.0, help="Espera para juntar pedidos da mesma mesa.")
+    parser.add_argument("--workers", type=int, default=4, help="Lotes calculados ao mesmo tempo.")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.batch_window_ms, args.workers))
+
+
+if __name__ == "__main__":
+    main()
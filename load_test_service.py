@@ -0,0 +1,172 @@
+"""Teste de carga do serviço HTTP de equity (``equity_service.py``) com pedidos sintéticos.
+
+Dispara ``--requests`` pedidos pós-flop contra oponentes aleatórios, com mãos do
+Hero sorteadas sobre ``--boards`` mesas fixas, por ``--concurrency`` sessões sem
+pausa (carga fechada). Sem ``--url`` o serviço sobe no próprio processo, numa
+porta livre. No fim lê ``GET /health`` e falha (código 1) se nenhum lote foi
+formado ou se a fração de pedidos com 504 passar de ``--max-timeout-rate``: a
+taxa de pedidos por segundo informada só vale se o prazo foi cumprido.
+
+Uso:
+    python load_test_service.py
+    python load_test_service.py --requests 500 --concurrency 50 --opponents 3 --boards 4
+    python load_test_service.py --url http://127.0.0.1:8765
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+
+from treys import Card as TreysCard
+
+from app import build_deck
+from equity_service import serve
+from replay_workload import percentile
+
+
+def start_local_service(batch_window_ms: float, workers: int) -> str:
+    """Sobe o serviço numa thread daemon, numa porta livre, e espera o ``/health`` responder."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    thread = threading.Thread(
+        target=lambda: asyncio.run(serve("127.0.0.1", port, batch_window_ms, workers)), daemon=True
+    )
+    thread.start()
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            fetch_health(url)
+            return url
+        except OSError:
+            time.sleep(0.05)
+    raise SystemExit("O serviço local não respondeu.")
+
+
+def fetch_health(url: str) -> Dict[str, object]:
+    with urllib.request.urlopen(url + "/health", timeout=5) as response:
+        return json.loads(response.read())["stats"]
+
+
+def build_requests(
+    count: int, boards: int, opponents: int, time_budget: float, deadline_ms: float, seed: int
+) -> List[Dict[str, object]]:
+    """Pedidos sorteados: ``boards`` flops fixos e uma mão do Hero nova em cada pedido."""
+    rng = random.Random(seed)
+    deck = build_deck()
+    flops = [rng.sample(deck, 3) for _ in range(max(1, boards))]
+    bodies = []
+    for _ in range(count):
+        board = rng.choice(flops)
+        hero = rng.sample([card for card in deck if card not in board], 2)
+        bodies.append(
+            {
+                "hero": [TreysCard.int_to_str(card) for card in hero],
+                "board": [TreysCard.int_to_str(card) for card in board],
+                "opponents": opponents,
+                "time_budget": time_budget,
+                "deadline_ms": deadline_ms,
+            }
+        )
+    return bodies
+
+
+def post_equity(url: str, body: Dict[str, object]) -> Tuple[int, str]:
+    """Envia um pedido; retorna (status HTTP, método da resposta)."""
+    request = urllib.request.Request(
+        url + "/equity", data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return response.status, str(json.loads(response.read()).get("method"))
+    except urllib.error.HTTPError as exc:
+        return exc.code, ""
+
+
+def run_load(url: str, bodies: Sequence[Dict[str, object]], concurrency: int) -> Tuple[Counter, Counter, List[float], float]:
+    statuses: Counter = Counter()
+    methods: Counter = Counter()
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def execute(body: Dict[str, object]) -> None:
+        began = time.perf_counter()
+        status, method = post_equity(url, body)
+        with lock:
+            latencies.append(time.perf_counter() - began)
+            statuses[status] += 1
+            if method:
+                methods[method] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load") as sessions:
+        list(sessions.map(execute, bodies))
+    return statuses, methods, latencies, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Teste de carga sintético do serviço HTTP de equity.")
+    parser.add_argument("--url", default=None, help="Serviço já em execução (padrão: sobe um no processo).")
+    parser.add_argument("--requests", type=int, default=200, help="Total de pedidos.")
+    parser.add_argument("--concurrency", type=int, default=50, help="Sessões simultâneas.")
+    parser.add_argument("--opponents", type=int, default=3, help="Oponentes aleatórios por pedido.")
+    parser.add_argument("--boards", type=int, default=1, help="Mesas distintas sorteadas.")
+    parser.add_argument("--time-budget", type=float, default=0.2, help="Orçamento pedido (s).")
+    parser.add_argument("--deadline-ms", type=float, default=2000, help="Prazo de cada pedido.")
+    parser.add_argument("--batch-window-ms", type=float, default=5.0, help="Janela de lote do serviço local.")
+    parser.add_argument("--workers", type=int, default=4, help="Lotes simultâneos do serviço local.")
+    parser.add_argument("--max-timeout-rate", type=float, default=0.02, help="Fração máxima de 504 aceita.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    url = args.url.rstrip("/") if args.url else start_local_service(args.batch_window_ms, args.workers)
+    before = fetch_health(url)
+    bodies = build_requests(
+        args.requests, args.boards, args.opponents, args.time_budget, args.deadline_ms, args.seed
+    )
+    statuses, methods, latencies, elapsed = run_load(url, bodies, max(1, args.concurrency))
+    after = fetch_health(url)
+    delta = {name: int(after[name]) - int(before.get(name, 0)) for name in after}  # type: ignore[arg-type]
+
+    served = statuses.get(200, 0)
+    timeout_rate = statuses.get(504, 0) / max(1, len(bodies))
+    print(
+        f"{len(bodies)} pedidos em {elapsed:.1f}s: {served / elapsed:.1f} respostas 200/s "
+        f"({args.concurrency} sessões, {args.opponents} oponentes, {args.boards} mesa(s))"
+    )
+    print("Status: " + ", ".join(f"{code} x{count}" for code, count in sorted(statuses.items())))
+    print("Métodos: " + ", ".join(f"{name} {count}" for name, count in methods.most_common()))
+    print(
+        "Latência (ms): "
+        + " ".join(
+            f"{label} {percentile(latencies, fraction) * 1000:.0f}"
+            for label, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("máx", 1.0))
+        )
+    )
+    batches = delta.get("batches", 0)
+    print(
+        f"Lotes: {batches} ({delta.get('batched_requests', 0)} pedidos, "
+        f"{delta.get('batched_requests', 0) / max(1, batches):.1f} por lote), "
+        f"deduplicados {delta.get('deduplicated', 0)}, timeouts {delta.get('timeouts', 0)}"
+    )
+    failures = []
+    if batches <= 0:
+        failures.append("nenhum lote formado")
+    if timeout_rate > args.max_timeout_rate:
+        failures.append(f"{timeout_rate * 100:.1f}% dos pedidos com 504 (máximo {args.max_timeout_rate * 100:.1f}%)")
+    if failures:
+        raise SystemExit("FALHOU: " + "; ".join(failures))
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""Simulações Monte Carlo longas (dezenas de milhões de iterações), determinísticas e retomáveis.
+
+O job é dividido em blocos de ``--chunk`` iterações. A semente de cada bloco é
+derivada da semente do job (``spawn_seed(semente, bloco)``), então o bloco N
+sorteia sempre as mesmas cartas, não importa quantos workers rodam nem em que
+ordem os blocos terminam: a mesma semente reproduz exatamente os mesmos
+contadores.
+
+Os contadores somados (win/tie/loss, equity da mesa e potes laterais) e a lista
+de blocos concluídos vão para um checkpoint JSON a cada ``--checkpoint-seconds``
+e ao final (gravação atômica). Ao rodar de novo com o mesmo arquivo, só os blocos
+que faltam são calculados, sem repetir nem perder amostras; um ``--iterations``
+maior estende um job já concluído com novos blocos.
+
+Uso:
+    python long_run.py job.json --hero "As Kd" --board "7h 8h 9c" --opponents 3 --iterations 50000000
+    python long_run.py job.json                            # retoma com os parâmetros gravados
+    python long_run.py job.json --iterations 100000000     # estende o mesmo job
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from treys import Card as TreysCard
+
+from app import (
+    EquityResult,
+    SidePotAccumulator,
+    TableEquityAccumulator,
+    _mc_worker_fast,
+    build_deck,
+    build_display_result,
+    normalize_known_opponents_entries,
+    normalize_stacks,
+    parse_card,
+    remove_known_cards,
+)
+
+CHECKPOINT_VERSION = 1
+# Parâmetros que definem as amostras: mudar qualquer um deles invalida o checkpoint.
+JOB_KEYS = ("hero", "board", "opponents", "known", "stacks", "seed", "chunk")
+DEFAULT_ITERATIONS = 10_000_000
+
+
+def spawn_seed(root: int, *path: int) -> int:
+    """Semente filha de 64 bits derivada de ``root`` e do caminho (ex.: job → bloco).
+
+    Hash em vez de ``root + índice``: sementes vizinhas não geram sequências
+    correlacionadas e cada nível da hierarquia pode ser subdividido depois.
+    """
+    key = ":".join(str(part) for part in (root,) + path).encode()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def parse_cards(text: str) -> List[int]:
+    return [parse_card(token) for token in text.replace(",", " ").split()]
+
+
+def cards_text(cards: Sequence[int]) -> str:
+    return " ".join(TreysCard.int_to_str(card) for card in cards)
+
+
+def compress_chunks(done: Set[int]) -> List[List[int]]:
+    """Blocos concluídos como intervalos ``[início, fim)`` para o checkpoint não crescer com o job."""
+    ranges: List[List[int]] = []
+    for index in sorted(done):
+        if ranges and ranges[-1][1] == index:
+            ranges[-1][1] = index + 1
+        else:
+            ranges.append([index, index + 1])
+    return ranges
+
+
+def expand_chunks(ranges: Sequence[Sequence[int]]) -> Set[int]:
+    return {index for start, end in ranges for index in range(start, end)}
+
+
+def encode_outcomes(side_pots: Optional[SidePotAccumulator]) -> Optional[List[object]]:
+    """Desfechos dos potes (vencedores de cada pote disputado) como lista JSON."""
+    if side_pots is None:
+        return None
+    return [[[list(winners) for winners in outcome], count] for outcome, count in side_pots.outcomes.items()]
+
+
+def decode_outcomes(encoded: Optional[Sequence[Sequence[object]]]) -> Dict[Tuple[Tuple[int, ...], ...], int]:
+    return {
+        tuple(tuple(winners) for winners in outcome): int(count)  # type: ignore[arg-type, union-attr]
+        for outcome, count in encoded or ()
+    }
+
+
+class LongRun:
+    """Estado de um job: parâmetros, blocos concluídos e contadores somados."""
+
+    __slots__ = ("job", "target", "done", "wins", "ties", "losses", "table", "side_pots", "elapsed")
+
+    def __init__(self, job: Dict[str, object], target: int) -> None:
+        self.job = job
+        self.target = target
+        self.done: Set[int] = set()
+        self.wins = self.ties = self.losses = 0
+        opponents = int(job["opponents"])  # type: ignore[arg-type]
+        self.table = TableEquityAccumulator(opponents, len(job["known"]))  # type: ignore[arg-type]
+        stacks = job["stacks"]
+        self.side_pots = SidePotAccumulator(stacks, lower_is_better=False) if stacks else None  # type: ignore[arg-type]
+        self.elapsed = 0.0
+
+    @property
+    def iterations(self) -> int:
+        return self.wins + self.ties + self.losses
+
+    def pending(self) -> Iterator[int]:
+        return (index for index in range(self.target) if index not in self.done)
+
+    def merge(
+        self,
+        index: int,
+        counts: Tuple[int, int, int],
+        table: TableEquityAccumulator,
+        side_pots: Optional[SidePotAccumulator],
+    ) -> None:
+        # Somas inteiras: o total independe da ordem em que os blocos chegam.
+        self.wins += counts[0]
+        self.ties += counts[1]
+        self.losses += counts[2]
+        self.table.merge(table)
+        if self.side_pots is not None and side_pots is not None:
+            self.side_pots.merge(side_pots)
+        self.done.add(index)
+
+    def to_json(self) -> Dict[str, object]:
+        return {
+            "version": CHECKPOINT_VERSION,
+            "job": self.job,
+            "target_chunks": self.target,
+            "done": compress_chunks(self.done),
+            "counts": {"win": self.wins, "tie": self.ties, "loss": self.losses},
+            "table": {"wins": self.table.wins, "shares": self.table.shares},
+            "side_pots": self.side_pots.chips if self.side_pots is not None else None,
+            "side_pot_outcomes": encode_outcomes(self.side_pots),
+            "elapsed": self.elapsed,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, object], target: int) -> "LongRun":
+        run = cls(data["job"], max(target, int(data["target_chunks"])))  # type: ignore[arg-type]
+        run.done = expand_chunks(data["done"])  # type: ignore[arg-type]
+        counts = data["counts"]
+        run.wins, run.ties, run.losses = counts["win"], counts["tie"], counts["loss"]  # type: ignore[index]
+        run.table.wins = list(data["table"]["wins"])  # type: ignore[index]
+        run.table.shares = list(data["table"]["shares"])  # type: ignore[index]
+        if run.side_pots is not None:
+            run.side_pots.chips = [list(chips) for chips in data["side_pots"]]  # type: ignore[union-attr]
+            run.side_pots.outcomes = decode_outcomes(data.get("side_pot_outcomes"))  # type: ignore[arg-type]
+        run.elapsed = float(data.get("elapsed", 0.0))  # type: ignore[arg-type]
+        return run
+
+
+def write_checkpoint(path: str, run: LongRun) -> None:
+    """Grava num temporário, sincroniza e troca: um crash deixa o checkpoint anterior intacto."""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        json.dump(run.to_json(), handle)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+
+
+def chunks_for(iterations: Optional[int], chunk: int) -> int:
+    return -(-iterations // chunk) if iterations else 0
+
+
+def load_run(path: str, job: Optional[Dict[str, object]], iterations: Optional[int]) -> LongRun:
+    """Abre o checkpoint existente (validando os parâmetros) ou começa um job novo.
+
+    Sem ``iterations`` o job retoma até o alvo gravado; com um alvo maior, estende.
+    """
+    if not os.path.exists(path):
+        if job is None:
+            raise SystemExit(f"{path} não existe; informe --hero e --opponents para criar o job.")
+        return LongRun(job, chunks_for(iterations or DEFAULT_ITERATIONS, int(job["chunk"])))  # type: ignore[arg-type]
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    if data.get("version") != CHECKPOINT_VERSION:
+        raise SystemExit(f"{path} tem versão {data.get('version')} de checkpoint; esperado {CHECKPOINT_VERSION}.")
+    if job is not None:
+        changed = [key for key in JOB_KEYS if job[key] != data["job"].get(key)]
+        if changed:
+            raise SystemExit(
+                f"{path} foi gerado com outros parâmetros ({', '.join(changed)}); "
+                "apague-o, use outro arquivo ou omita os parâmetros para retomar."
+            )
+    return LongRun.from_json(data, chunks_for(iterations, int(data["job"]["chunk"])))
+
+
+def build_job(args: argparse.Namespace) -> Optional[Dict[str, object]]:
+    if not args.hero:
+        return None
+    hero = parse_cards(args.hero)
+    board = parse_cards(args.board)
+    known = [parse_cards(hand) for hand in args.known]
+    if len(hero) != 2 or len(board) not in (0, 3, 4, 5):
+        raise SystemExit("O Hero precisa de 2 cartas e o board de 0, 3, 4 ou 5.")
+    stacks = normalize_stacks([int(stack) for stack in args.stacks.split(",")] if args.stacks else None, args.opponents)
+    return {
+        "hero": cards_text(hero),
+        "board": cards_text(board),
+        "opponents": args.opponents,
+        "known": [cards_text(hand) for hand in known],
+        "stacks": list(stacks) if stacks else None,
+        "seed": args.seed,
+        "chunk": args.chunk,
+    }
+
+
+def chunk_arguments(job: Dict[str, object]) -> Tuple[object, ...]:
+    """Argumentos fixos de ``_mc_worker_fast`` (tudo menos iterações e semente)."""
+    hero = parse_cards(str(job["hero"]))
+    board = parse_cards(str(job["board"]))
+    known_cards, _ = normalize_known_opponents_entries([parse_cards(hand) for hand in job["known"]])  # type: ignore[union-attr]
+    used = tuple(hero + board + [card for hand in known_cards for card in hand])
+    deck = remove_known_cards(build_deck(), used)
+    missing = 5 - len(board) + 2 * (int(job["opponents"]) - len(known_cards))  # type: ignore[arg-type]
+    if len(known_cards) > int(job["opponents"]) or missing > len(deck):  # type: ignore[arg-type]
+        raise SystemExit("Cartas ou oponentes conhecidos incompatíveis com o job.")
+    stacks = tuple(job["stacks"]) if job["stacks"] else None  # type: ignore[arg-type]
+    return tuple(hero), tuple(board), int(job["opponents"]), tuple(map(tuple, known_cards)), tuple(deck), stacks  # type: ignore[arg-type]
+
+
+def ignore_interrupts() -> None:
+    """Ctrl+C chega a todo o grupo de processos; só o principal trata (e grava o checkpoint)."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def run_chunk(fixed: Tuple[object, ...], iterations: int, seed: int) -> Tuple[object, ...]:
+    hero, board, opponents, known, deck, stacks = fixed
+    wins, ties, losses, table, side_pots, _ = _mc_worker_fast(
+        hero, board, opponents, known, deck, iterations, seed, stacks  # type: ignore[arg-type]
+    )
+    return (wins, ties, losses), table, side_pots
+
+
+def execute(path: str, run: LongRun, workers: int, checkpoint_seconds: float) -> None:
+    fixed = chunk_arguments(run.job)
+    chunk = int(run.job["chunk"])  # type: ignore[arg-type]
+    seed = int(run.job["seed"])  # type: ignore[arg-type]
+    pending = list(run.pending())
+    print(f"{len(run.done)} blocos já prontos ({run.iterations:,} iterações), {len(pending)} pendentes.")
+    start = time.perf_counter()
+    last_checkpoint = start
+    finished = 0
+
+    def record(index: int, outcome: Tuple[object, ...]) -> None:
+        nonlocal finished, last_checkpoint
+        run.merge(index, *outcome)  # type: ignore[arg-type]
+        finished += 1
+        now = time.perf_counter()
+        if now - last_checkpoint >= checkpoint_seconds or finished == len(pending):
+            run.elapsed += now - last_checkpoint
+            last_checkpoint = now
+            write_checkpoint(path, run)
+            elapsed = now - start
+            remaining = elapsed / finished * (len(pending) - finished)
+            print(
+                f"[{finished}/{len(pending)}] {run.iterations:,} iterações "
+                f"({elapsed:.0f}s, ~{remaining:.0f}s restantes) — checkpoint gravado"
+            )
+
+    try:
+        if workers <= 1:
+            for index in pending:
+                record(index, run_chunk(fixed, chunk, spawn_seed(seed, index)))
+            return
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=ignore_interrupts)
+        try:
+            # Janela limitada de blocos em voo: milhões de blocos não viram milhões de futures.
+            queue = iter(pending)
+            in_flight = {}
+            for index in queue:
+                in_flight[pool.submit(run_chunk, fixed, chunk, spawn_seed(seed, index))] = index
+                if len(in_flight) >= 2 * workers:
+                    break
+            while in_flight:
+                completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    record(in_flight.pop(future), future.result())
+                    index = next(queue, None)
+                    if index is not None:
+                        in_flight[pool.submit(run_chunk, fixed, chunk, spawn_seed(seed, index))] = index
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+    except KeyboardInterrupt:
+        # Blocos em andamento não entram no checkpoint; a retomada os recalcula com as mesmas sementes.
+        run.elapsed += time.perf_counter() - last_checkpoint
+        write_checkpoint(path, run)
+        raise SystemExit(f"Interrompido: {len(run.done)} blocos salvos em {path}.")
+
+
+def print_report(run: LongRun) -> None:
+    job = run.job
+    print(
+        f"\nHero {job['hero']} | board {job['board'] or '-'} | {job['opponents']} oponente(s)"
+        + (f" | conhecidos {', '.join(job['known'])}" if job["known"] else "")  # type: ignore[arg-type]
+        + f" | semente {job['seed']}"
+    )
+    if not run.iterations:
+        print("Nenhuma iteração concluída ainda.")
+        return
+    _, known_labels = normalize_known_opponents_entries([parse_cards(hand) for hand in job["known"]])  # type: ignore[union-attr]
+    meta = {
+        "iterations": run.iterations,
+        "elapsed": run.elapsed,
+        "iter_per_sec": run.iterations / run.elapsed if run.elapsed > 0 else 0.0,
+    }
+    result = EquityResult(
+        run.wins,
+        run.ties,
+        run.losses,
+        opponent_labels=known_labels,
+        sampled=True,
+        mc_meta=meta,
+        table=run.table,
+        side_pots=run.side_pots,
+    ).to_dict()
+    display = build_display_result("monte_carlo", result, meta)
+    complete = "completo" if len(run.done) == run.target else f"{len(run.done)}/{run.target} blocos"
+    print(f"{run.iterations:,} iterações ({complete}), {meta['iter_per_sec']:,.0f} it/s")
+    for label, key in (("Vitória", "win"), ("Empate", "tie"), ("Derrota", "lose")):
+        interval = display[f"ci95_{key}"]
+        bounds = f" (IC95% {interval['low']:.4f}–{interval['high']:.4f})" if interval else ""
+        print(f"{label:<8} {display[key]:.4f}%{bounds}")
+    for row in result.get("table_equity") or []:  # type: ignore[union-attr]
+        print(f"Equity {row['player']}: {row['equity_pct']:.4f}%")
+    side_pots = result.get("side_pots")
+    if side_pots:
+        for player in side_pots["players"]:  # type: ignore[index]
+            print(f"EV {player['player']}: {player['ev']:+.2f} fichas")
+
+
+def add_job_arguments(parser: argparse.ArgumentParser) -> None:
+    """Argumentos do job, compartilhados com o modo distribuído (``distributed_mc.py``)."""
+    parser.add_argument("checkpoint", help="Arquivo JSON do job (criado na primeira execução).")
+    parser.add_argument("--hero", help='Cartas do Hero, ex.: "As Kd" (omita para retomar).')
+    parser.add_argument("--board", default="", help='Board, ex.: "7h 8h 9c".')
+    parser.add_argument("--opponents", type=int, default=1)
+    parser.add_argument("--known", action="append", default=[], help='Mão de um oponente conhecido (repetível), ex.: "Qs Qd".')
+    parser.add_argument("--stacks", default=None, help="Stacks do all-in, Hero primeiro, separados por vírgula.")
+    parser.add_argument(
+        "--iterations", type=int, default=None, help="Total de iterações desejado (padrão: 10M ou o alvo gravado)."
+    )
+    parser.add_argument("--chunk", type=int, default=100_000, help="Iterações por bloco (fixo por job).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint-seconds", type=float, default=30.0, help="Intervalo entre checkpoints.")
+
+
+def open_job(args: argparse.Namespace) -> LongRun:
+    if args.chunk <= 0 or (args.iterations is not None and args.iterations <= 0):
+        raise SystemExit("--chunk e --iterations precisam ser positivos.")
+    return load_run(args.checkpoint, build_job(args), args.iterations)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Monte Carlo longo, determinístico e retomável via checkpoint.")
+    add_job_arguments(parser)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    run = open_job(args)
+    if run.target > len(run.done):
+        execute(args.checkpoint, run, max(1, args.workers), args.checkpoint_seconds)
+    print_report(run)
+
+
+if __name__ == "__main__":
+    main()
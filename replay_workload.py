@@ -0,0 +1,227 @@
+"""Reproduz um log de carga gravado pelo app (``POKER_WORKLOAD_LOG``) como teste de carga.
+
+Cada linha do log é um cálculo real de um usuário (``params_signature``, método,
+iterações e latência). O replay executa o mesmo mix contra os motores no
+processo (mesmo pool compartilhado ``get_monte_carlo_pool`` e mesmo cache exato
+que as sessões do Streamlit, que rodam em threads) ou contra o serviço HTTP
+(``equity_service.py``), com concorrência configurável, e informa percentis de
+latência, iterações entregues por pedido e a saturação do pool.
+
+Sem ``--speed`` é carga fechada: ``--concurrency`` sessões disparando pedidos
+sem pausa. Com ``--speed`` os pedidos saem nos instantes gravados (acelerados
+pelo fator) e a latência inclui a espera por uma sessão livre.
+
+Uso:
+    POKER_WORKLOAD_LOG=carga.jsonl streamlit run app.py   # gravação
+    python replay_workload.py carga.jsonl --concurrency 8
+    python replay_workload.py carga.jsonl --speed 4 --target http --url http://127.0.0.1:8765
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from treys import Card as TreysCard
+
+from app import (
+    allow_parallel_workers,
+    decode_params_signature,
+    executor_load,
+    get_monte_carlo_pool,
+    run_equity_calculation,
+    simulate_opponent_curve,
+)
+
+
+def read_workload(path: str, sources: Sequence[str], limit: Optional[int]) -> List[Dict[str, object]]:
+    records = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry.get("src", "ui") not in sources:
+                continue
+            entry["p"] = decode_params_signature(entry["p"])
+            records.append(entry)
+            if limit is not None and len(records) >= limit:
+                break
+    return records
+
+
+def run_engine(entry: Dict[str, object]) -> int:
+    """Executa o cálculo gravado como a UI faria; retorna as iterações entregues."""
+    params = entry["p"]
+    parallel = bool(params.get("parallel")) and allow_parallel_workers()  # type: ignore[union-attr]
+    batch_size = 3000 if parallel else 1500
+    budget = float(params.get("effective_budget") or params.get("time_budget") or 1.0)  # type: ignore[union-attr]
+    if entry.get("m") == "CURVE":
+        curve, meta = simulate_opponent_curve(
+            params["hero"], params["board"], 8, budget, batch_size=batch_size, use_parallel=parallel  # type: ignore[index]
+        )
+        return int(meta.get("iterations", 0))  # type: ignore[arg-type]
+    result, meta = run_equity_calculation(
+        params["hero"],  # type: ignore[index]
+        params["board"],  # type: ignore[index]
+        int(params["opponents"]),  # type: ignore[index]
+        params["known"] if params.get("tournament") else None,  # type: ignore[index, union-attr]
+        entry["m"],  # type: ignore[arg-type]
+        budget,
+        bool(params.get("analysis")),  # type: ignore[union-attr]
+        use_parallel=parallel,
+        batch_size=batch_size,
+        stacks=params.get("stacks"),  # type: ignore[union-attr]
+        importance_sampling=bool(params.get("importance")),  # type: ignore[union-attr]
+    )
+    return int(meta.get("iterations") or result.total)  # type: ignore[arg-type]
+
+
+def run_http(entry: Dict[str, object], url: str) -> int:
+    """Envia o cálculo gravado ao serviço HTTP; retorna as iterações (amostras ou cenários)."""
+    params = entry["p"]
+    body = {
+        "hero": [TreysCard.int_to_str(card) for card in params["hero"]],  # type: ignore[index]
+        "board": [TreysCard.int_to_str(card) for card in params["board"]],  # type: ignore[index]
+        "opponents": params["opponents"],  # type: ignore[index]
+        "method": "monte_carlo" if entry.get("m") in ("MONTE_CARLO", "CURVE") else "auto",
+        "time_budget": params.get("effective_budget") or params.get("time_budget") or 1.0,  # type: ignore[union-attr]
+        "deadline_ms": 60000,
+    }
+    if params.get("tournament"):  # type: ignore[union-attr]
+        body["known"] = [[TreysCard.int_to_str(card) for card in cards] for _, cards in params["known"]]  # type: ignore[index]
+    request = urllib.request.Request(
+        url.rstrip("/") + "/equity",
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=120) as response:
+        payload = json.loads(response.read())
+    return int(payload.get("samples") or sum(payload["counts"].values()))
+
+
+class PoolSampler(threading.Thread):
+    """Amostra a fila do pool compartilhado a cada ``interval`` segundos durante o replay."""
+
+    def __init__(self, interval: float = 0.02) -> None:
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples: List[Tuple[int, int]] = []
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        pool = get_monte_carlo_pool() if allow_parallel_workers() else None
+        while not self._stop_event.is_set():
+            load = executor_load(pool)
+            if load is not None:
+                self.samples.append((load["workers"], load["pending"]))
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def schedule(records: Sequence[Dict[str, object]], speed: float) -> Iterator[Tuple[Dict[str, object], float]]:
+    """(registro, atraso desde o início); atraso zero em carga fechada."""
+    first = float(records[0]["t"]) if records else 0.0  # type: ignore[arg-type]
+    for entry in records:
+        yield entry, (float(entry["t"]) - first) / speed if speed > 0 else 0.0  # type: ignore[arg-type]
+
+
+def replay(records: Sequence[Dict[str, object]], target: str, url: str, concurrency: int, speed: float) -> None:
+    latencies: List[float] = []
+    iterations: List[int] = []
+    methods: Counter = Counter()
+    errors: Counter = Counter()
+    lock = threading.Lock()
+    sampler = PoolSampler() if target == "engine" else None
+    start = time.perf_counter()
+
+    def execute(entry: Dict[str, object], release_at: float) -> None:
+        began = time.perf_counter()
+        try:
+            delivered = run_engine(entry) if target == "engine" else run_http(entry, url)
+        except (ValueError, OSError, urllib.error.URLError) as exc:
+            with lock:
+                errors[type(exc).__name__] += 1
+            return
+        finished = time.perf_counter()
+        # Carga aberta: a latência conta desde o instante gravado (inclui a espera na fila).
+        latency = finished - (release_at if speed > 0 else began)
+        with lock:
+            latencies.append(latency)
+            iterations.append(delivered)
+            methods[str(entry.get("m"))] += 1
+
+    if sampler is not None:
+        sampler.start()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="replay") as sessions:
+        for entry, delay in schedule(records, speed):
+            release_at = start + delay
+            wait = release_at - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            sessions.submit(execute, entry, release_at)
+    elapsed = time.perf_counter() - start
+    if sampler is not None:
+        sampler.stop()
+
+    print(f"{len(latencies)} pedidos em {elapsed:.1f}s ({len(latencies) / elapsed:.1f}/s), alvo {target}")
+    if errors:
+        print("Erros: " + ", ".join(f"{name} x{count}" for name, count in errors.items()))
+    print("Métodos: " + ", ".join(f"{name} {count}" for name, count in methods.most_common()))
+    print(
+        "Latência (ms): "
+        + " ".join(
+            f"{label} {percentile(latencies, fraction) * 1000:.0f}"
+            for label, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("máx", 1.0))
+        )
+    )
+    if iterations:
+        print(
+            f"Iterações por pedido: média {sum(iterations) / len(iterations):,.0f} "
+            f"p50 {percentile(iterations, 0.5):,.0f} p10 {percentile(iterations, 0.1):,.0f}"
+        )
+    if sampler is not None and sampler.samples:
+        workers = sampler.samples[-1][0]
+        pending = [sample[1] for sample in sampler.samples]
+        saturated = sum(1 for count in pending if count >= workers) / len(pending)
+        print(
+            f"Pool: {workers} workers, pendentes média {sum(pending) / len(pending):.1f} "
+            f"máx {max(pending)}, saturado {saturated * 100:.0f}% do tempo"
+        )
+    elif sampler is not None:
+        print("Pool: sem paralelismo neste ambiente (motores seriais nas threads das sessões).")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Teste de carga a partir do log gravado pelo app.")
+    parser.add_argument("log", help="Arquivo gravado via POKER_WORKLOAD_LOG.")
+    parser.add_argument("--target", choices=("engine", "http"), default="engine")
+    parser.add_argument("--url", default="http://127.0.0.1:8765", help="Serviço HTTP (alvo http).")
+    parser.add_argument("--concurrency", type=int, default=4, help="Sessões simultâneas.")
+    parser.add_argument("--speed", type=float, default=0.0, help="Fator sobre os instantes gravados (0 = sem pausa).")
+    parser.add_argument("--sources", default="ui,curve", help="Origens reproduzidas (ui, curve, speculative).")
+    parser.add_argument("--limit", type=int, default=None, help="Reproduz só os N primeiros pedidos.")
+    args = parser.parse_args()
+    records = read_workload(args.log, args.sources.split(","), args.limit)
+    if not records:
+        raise SystemExit("Nenhum pedido no log para as origens escolhidas.")
+    replay(records, args.target, args.url, max(1, args.concurrency), args.speed)
+
+
+if __name__ == "__main__":
+    main()
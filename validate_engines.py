@@ -0,0 +1,417 @@
+"""Confere os motores rápidos contra a enumeração exata (viés, IC95% e rankings).
+
+Sorteia situações em que ``simulate_exact`` é viável, calcula a verdade exata e
+roda cada motor estimado (Monte Carlo serial e paralelo, análise, estratificado,
+exato progressivo, amostragem por importância serial e paralela e lote por mesa). Para cada
+estimativa confere se a equity exata cai dentro do IC95% exibido pelo app; ao
+final a cobertura observada de cada motor é comparada com os 95% nominais.
+Também confere que todos os backends de avaliação registrados (e
+``best_hand_rank_7``, inclusive em lote) dão o mesmo ranking do Treys, que a enumeração exata paralela soma os mesmos contadores
+da serial (num pool de cada backend disponível, inclusive os que só entram se
+pedidos, como os sub-interpretadores) e que o planejador (``plan_equity_method``) escolhe o método esperado em cada ramo.
+
+Modo rápido (padrão) termina em alguns minutos e sai com código 1 se algo falhar,
+para rodar como suíte de testes. Com ``--soak-minutes`` roda sem parar até o
+tempo acabar, mostrando o acumulado a cada minuto, para pegar vieses pequenos.
+
+Uso:
+    python validate_engines.py
+    python validate_engines.py --soak-minutes 120 --spots 0 --seed 7
+    POKER_PARALLEL_BACKEND=thread python validate_engines.py
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from treys import Card as TreysCard
+
+import app
+from app import (
+    EVALUATOR,
+    EVALUATOR_BACKENDS,
+    _enumerate_exact,
+    _seven_card_tables,
+    best_hand_rank_7,
+    build_deck,
+    build_display_result,
+    choose_parallel_backend,
+    estimate_exact_scenarios,
+    fast_rank_value,
+    get_monte_carlo_pool,
+    parse_card,
+    plan_equity_method,
+    simulate_board_batch,
+    simulate_exact,
+    simulate_exact_anytime,
+    simulate_monte_carlo_analysis,
+    simulate_monte_carlo_fast,
+    simulate_monte_carlo_importance,
+    simulate_stratified_runouts,
+)
+
+Card = int
+OUTCOMES = (("win", "win"), ("tie", "tie"), ("loss", "lose"))
+# Cobertura aceita: 95% menos 3 desvios padrão binomiais. Win e loss de uma execução
+# erram juntos, então o tamanho efetivo é o número de execuções, não de checagens.
+NOMINAL_COVERAGE = 0.95
+
+
+class Spot:
+    __slots__ = ("hero", "board", "opponents", "known", "seed")
+
+    def __init__(self, hero: List[Card], board: List[Card], opponents: int, known: List[List[Card]], seed: int) -> None:
+        self.hero = hero
+        self.board = board
+        self.opponents = opponents
+        self.known = known
+        self.seed = seed
+
+    def __str__(self) -> str:
+        known = " | ".join(" ".join(_card_text(card) for card in hand) for hand in self.known)
+        return (
+            f"seed={self.seed} hero={' '.join(_card_text(card) for card in self.hero)} "
+            f"board={' '.join(_card_text(card) for card in self.board) or '-'} "
+            f"oponentes={self.opponents} conhecidos=[{known}]"
+        )
+
+
+def _card_text(card: Card) -> str:
+    return TreysCard.int_to_str(card)
+
+
+def random_spot(seed: int, max_scenarios: int) -> Spot:
+    """Situação aleatória (flop, turn ou river; 1–3 oponentes) pequena o bastante para o exato."""
+    rng = random.Random(seed)
+    while True:
+        deck = list(build_deck())
+        rng.shuffle(deck)
+        board_size = rng.choice((3, 4, 4, 5, 5))
+        opponents = rng.randint(1, 3)
+        known_count = rng.randint(0, opponents) if rng.random() < 0.3 else 0
+        hero = deck[:2]
+        board = deck[2 : 2 + board_size]
+        rest = deck[2 + board_size :]
+        known = [rest[2 * idx : 2 * idx + 2] for idx in range(known_count)]
+        deck_size = len(rest) - 2 * known_count
+        estimated = estimate_exact_scenarios(deck_size, 5 - board_size, opponents - known_count)
+        if 0 < estimated <= max_scenarios:
+            return Spot(hero, board, opponents, known, seed)
+
+
+def _known(spot: Spot) -> Optional[List[List[Card]]]:
+    return spot.known or None
+
+
+Engine = Callable[[Spot, float], Optional[Tuple[object, Dict[str, object]]]]
+
+
+def _board_batch(spot: Spot, budget: float) -> Optional[Tuple[object, Dict[str, object]]]:
+    if spot.known:
+        return None
+    results, _ = simulate_board_batch(spot.board, spot.opponents, [spot.hero], budget)
+    return results[0], results[0].mc_meta or {}
+
+
+ENGINES: Dict[str, Engine] = {
+    "monte_carlo": lambda spot, budget: simulate_monte_carlo_fast(
+        spot.hero, spot.board, spot.opponents, budget, _known(spot)
+    ),
+    "monte_carlo_paralelo": lambda spot, budget: simulate_monte_carlo_fast(
+        spot.hero, spot.board, spot.opponents, budget, _known(spot), use_parallel=True
+    ),
+    "analise": lambda spot, budget: simulate_monte_carlo_analysis(
+        spot.hero, spot.board, spot.opponents, budget, _known(spot)
+    ),
+    "estratificado": lambda spot, budget: simulate_stratified_runouts(
+        spot.hero, spot.board, spot.opponents, budget, _known(spot)
+    ),
+    "exato_progressivo": lambda spot, budget: simulate_exact_anytime(
+        spot.hero, spot.board, spot.opponents, budget, _known(spot), chunk_size=200
+    ),
+    "importancia": lambda spot, budget: simulate_monte_carlo_importance(
+        spot.hero, spot.board, spot.opponents, budget, _known(spot)
+    ),
+    "importancia_paralela": lambda spot, budget: simulate_monte_carlo_importance(
+        spot.hero, spot.board, spot.opponents, budget, _known(spot), use_parallel=True
+    ),
+    "lote_por_mesa": _board_batch,
+}
+
+
+class Coverage:
+    """Checagens de IC por motor: quantas contêm a verdade e a soma dos z²."""
+
+    __slots__ = ("checks", "covered", "z_squares", "runs", "skipped")
+
+    def __init__(self) -> None:
+        self.checks = 0
+        self.covered = 0
+        self.z_squares = 0.0
+        self.runs = 0
+        self.skipped = 0
+
+    @property
+    def rate(self) -> float:
+        return self.covered / self.checks if self.checks else 1.0
+
+    def acceptable(self) -> bool:
+        if not self.runs:
+            return True
+        margin = 3 * math.sqrt(NOMINAL_COVERAGE * (1 - NOMINAL_COVERAGE) / self.runs)
+        return self.rate >= NOMINAL_COVERAGE - margin
+
+
+def check_ranks(samples: int, seed: int) -> List[str]:
+    """Compara cada backend de avaliação e ``best_hand_rank_7`` com o Treys em mãos de 7 cartas aleatórias."""
+    rng = random.Random(seed)
+    deck = list(build_deck())
+    categories = _seven_card_tables()[2]
+    failures = []
+    for _ in range(samples):
+        cards = rng.sample(deck, 7)
+        expected = EVALUATOR.evaluate(cards[:2], cards[2:])
+        ranks = {name: backend.rank(cards[:2], cards[2:]) for name, backend in EVALUATOR_BACKENDS.items()}
+        category, value = best_hand_rank_7(cards)
+        ranks["best_hand_rank_7"] = -value
+        if category != categories[expected] or fast_rank_value(cards) != expected:
+            ranks["categoria/tabela"] = -1
+        for name, rank in ranks.items():
+            if rank != expected:
+                text = " ".join(_card_text(card) for card in cards)
+                failures.append(f"ranking divergente ({name}) em {text}: {rank} vs {expected}")
+    hands = [rng.sample(deck, 7) for _ in range(samples)]
+    truth = [EVALUATOR.evaluate(cards[:2], cards[2:]) for cards in hands]
+    for name, backend in EVALUATOR_BACKENDS.items():
+        if backend.rank_batch is None:
+            continue
+        for cards, value, expected in zip(hands, backend.rank_batch(hands), truth):
+            if value != expected:
+                text = " ".join(_card_text(card) for card in cards)
+                failures.append(f"ranking divergente ({name} em lote) em {text}: {value} vs {expected}")
+    return failures
+
+
+def check_parallel_exact(spot: Spot) -> Optional[str]:
+    """A enumeração exata dividida no pool deve somar exatamente os contadores da serial."""
+    pool = get_monte_carlo_pool()
+    if pool is None:
+        return None
+    serial = _enumerate_exact(spot.hero, spot.board, spot.opponents, _known(spot))
+    parallel = _enumerate_exact(spot.hero, spot.board, spot.opponents, _known(spot), pool)
+    serial_counts = (serial.wins, serial.ties, serial.losses, serial.table.shares)  # type: ignore[union-attr]
+    parallel_counts = (parallel.wins, parallel.ties, parallel.losses, parallel.table.shares)  # type: ignore[union-attr]
+    if serial_counts != parallel_counts:
+        return f"exato paralelo {parallel_counts[:3]} != serial {serial_counts[:3]} em {spot}"
+    return None
+
+
+def check_parallel_backends(spot: Spot, budget: float) -> List[str]:
+    """Roda a enumeração exata e o Monte Carlo paralelos num pool de cada backend disponível.
+
+    Inclui os que ``choose_parallel_backend`` não escolhe sozinho (sub-interpretadores);
+    com numpy, o de threads roda o kernel vetorizado (``_mc_worker_numpy``). O
+    exato precisa somar os contadores da serial e o Monte Carlo cair a menos de
+    5 desvios padrão da verdade.
+    """
+    serial = _enumerate_exact(spot.hero, spot.board, spot.opponents, _known(spot))
+    total = serial.wins + serial.ties + serial.losses  # type: ignore[union-attr]
+    known = tuple(tuple(cards) for cards in spot.known)
+    used = set(spot.hero + spot.board + [card for cards in spot.known for card in cards])
+    deck = tuple(card for card in build_deck() if card not in used)
+    failures = []
+    for backend in ("process", "interpreter", "thread"):
+        if not app.parallel_backend_available(backend):  # type: ignore[arg-type]
+            print(f"backend {backend}: indisponível neste ambiente")
+            continue
+        pool = app.create_parallel_pool(backend, 2)  # type: ignore[arg-type]
+        try:
+            parallel = _enumerate_exact(spot.hero, spot.board, spot.opponents, _known(spot), pool)
+            if (parallel.wins, parallel.ties, parallel.table.shares) != (  # type: ignore[union-attr]
+                serial.wins,  # type: ignore[union-attr]
+                serial.ties,  # type: ignore[union-attr]
+                serial.table.shares,  # type: ignore[union-attr]
+            ):
+                failures.append(f"exato no backend {backend} diverge da serial em {spot}")
+            wins, ties, losses, _, _, _, profile = app._run_parallel_fast(
+                pool, tuple(spot.hero), tuple(spot.board), spot.opponents, known, deck, budget, 2000
+            )
+        finally:
+            pool.shutdown()
+        samples = wins + ties + losses
+        for label, count, exact in (("win", wins, serial.wins), ("tie", ties, serial.ties)):  # type: ignore[union-attr]
+            expected = exact / total
+            error = math.sqrt(max(expected * (1 - expected), 1e-12) / samples)
+            if abs(count / samples - expected) > 5 * error:
+                failures.append(
+                    f"Monte Carlo no backend {backend}: {label} {count / samples:.4f} vs exato {expected:.4f} em {spot}"
+                )
+        print(f"backend {backend}: {samples} cenários, kernel {profile['parallel_kernel']}")
+    return failures
+
+
+class _FakeFlopDB:
+    """Base de flops falsa para o teste do planejador: tem qualquer flop, com ``samples_per_runout`` amostras."""
+
+    beats_live = app.FlopEquityDB.beats_live
+
+    def __init__(self, samples_per_runout: int) -> None:
+        self.samples_per_runout = samples_per_runout
+
+    def has(self, *_: object) -> bool:
+        return True
+
+
+def check_planner() -> List[str]:
+    """Percorre cada ramo de ``plan_equity_method`` com situações fixas.
+
+    A vazão medida dos motores é fixada (baixa e alta) para exercitar a escolha
+    entre estratificado e progressivo e entre a base de flops e o cálculo ao vivo,
+    e as tabelas pré-calculadas são trocadas por falsas para o ramo
+    ``PRECOMPUTED``; tudo é restaurado no fim.
+    """
+    hero = [parse_card("As"), parse_card("Kd")]
+    flop = [parse_card(text) for text in ("2h", "7d", "9s")]
+    turn = flop + [parse_card("Tc")]
+    river = turn + [parse_card("3c")]
+    known = [[parse_card("Qh"), parse_card("Qc")]]
+    throughput = app.ENGINE_THROUGHPUT
+    saved = (throughput.hands_per_sec, throughput.runs, app.get_flop_equity_db, app.get_preflop_matrix)
+    cases = []
+    try:
+        app.get_flop_equity_db = lambda: None
+        app.get_preflop_matrix = lambda: None
+        cases += [
+            ("pré-flop contra aleatórios", plan_equity_method(hero, [], 2), "MONTE_CARLO"),
+            ("river contra 1", plan_equity_method(hero, river, 1), "EXACT"),
+            ("flop com todos conhecidos", plan_equity_method(hero, flop, 1, known), "EXACT"),
+            ("pré-flop contra conhecida sem matriz", plan_equity_method(hero, [], 1, known), "EXACT"),
+        ]
+        throughput.hands_per_sec = 1.0
+        cases.append(("turn contra 2, vazão baixa", plan_equity_method(hero, turn, 2), "STRATIFIED"))
+        cases.append(("river contra 3, vazão baixa", plan_equity_method(hero, river, 3), "STRATIFIED"))
+        throughput.hands_per_sec = 1e12
+        cases.append(("turn contra 2, vazão alta", plan_equity_method(hero, turn, 2), "ANYTIME"))
+        # O orçamento entra na conta: com vazão que cobre 25% em 10 s, 1 s não basta.
+        throughput.hands_per_sec = 0.25 * 20_561_310 * 3 / 10
+        cases.append(("turn contra 2, 10 s", plan_equity_method(hero, turn, 2, time_budget=10.0), "ANYTIME"))
+        cases.append(("turn contra 2, 1 s", plan_equity_method(hero, turn, 2, time_budget=1.0), "STRATIFIED"))
+        app.get_flop_equity_db = lambda: _FakeFlopDB(4)
+        app.get_preflop_matrix = lambda: object()
+        # 4 amostras por runout = 4.324 cenários: vence 0,2 s ao vivo, perde para 10 s.
+        throughput.hands_per_sec = 4324 * 3 / 1.0
+        cases += [
+            ("flop na base, orçamento curto", plan_equity_method(hero, flop, 2, time_budget=0.2), "PRECOMPUTED"),
+            ("flop na base, orçamento longo", plan_equity_method(hero, flop, 2, time_budget=10.0), "STRATIFIED"),
+            ("flop na base contra 1 (exata)", plan_equity_method(hero, flop, 1, time_budget=10.0), "PRECOMPUTED"),
+            ("flop na base, modo análise", plan_equity_method(hero, flop, 1, analysis_mode=True), "EXACT"),
+            ("pré-flop contra conhecida com matriz", plan_equity_method(hero, [], 1, known), "PRECOMPUTED"),
+            ("pré-flop contra 1 aleatório com matriz", plan_equity_method(hero, [], 1), "PRECOMPUTED"),
+            ("pré-flop contra 2 aleatórios com matriz", plan_equity_method(hero, [], 2), "MONTE_CARLO"),
+        ]
+    finally:
+        throughput.hands_per_sec, throughput.runs, app.get_flop_equity_db, app.get_preflop_matrix = saved
+    return [
+        f"planejador: {label} escolheu {method}, esperado {expected}"
+        for label, (method, _), expected in cases
+        if method != expected
+    ]
+
+
+def check_spot(spot: Spot, budget: float, coverage: Dict[str, Coverage]) -> List[str]:
+    truth = simulate_exact(spot.hero, spot.board, spot.opponents, _known(spot)).to_dict()
+    failures = []
+    for name, engine in ENGINES.items():
+        stats = coverage[name]
+        try:
+            outcome = engine(spot, budget)
+        except ValueError:
+            outcome = None
+        if outcome is None:
+            stats.skipped += 1
+            continue
+        result, meta = outcome
+        display = build_display_result("monte_carlo", result.to_dict(), meta)  # type: ignore[attr-defined]
+        if not display["n_samples"]:
+            stats.skipped += 1
+            continue
+        stats.runs += 1
+        for truth_key, display_key in OUTCOMES:
+            expected = float(truth[f"{truth_key}_pct"])  # type: ignore[arg-type]
+            interval = display[f"ci95_{display_key}"]
+            if interval is None:
+                failures.append(f"{name} sem IC95% em {spot}")
+                continue
+            stats.checks += 1
+            # Folga de arredondamento para intervalos que colapsam no valor exato.
+            if interval["low"] - 1e-9 <= expected <= interval["high"] + 1e-9:
+                stats.covered += 1
+            half_width = (interval["high"] - interval["low"]) / 2
+            if half_width > 0:
+                stats.z_squares += ((display[display_key] - expected) / (half_width / 1.96)) ** 2
+    return failures
+
+
+def print_summary(coverage: Dict[str, Coverage], spots: int, elapsed: float) -> None:
+    print(f"\n{spots} situações em {elapsed:.0f}s (backend paralelo: {choose_parallel_backend()})")
+    print(f"{'motor':<22} {'execuções':>9} {'puladas':>8} {'checagens':>9} {'cobertura':>10} {'z² médio':>9}")
+    for name, stats in coverage.items():
+        mean_z2 = stats.z_squares / stats.checks if stats.checks else 0.0
+        flag = "" if stats.acceptable() else "  <-- abaixo do nominal"
+        print(
+            f"{name:<22} {stats.runs:>9} {stats.skipped:>8} {stats.checks:>9} "
+            f"{stats.rate * 100:>9.1f}% {mean_z2:>9.2f}{flag}"
+        )
+
+
+def run(
+    spots: int, soak_minutes: float, budget: float, max_scenarios: int, rank_samples: int, seed: int
+) -> bool:
+    start = time.perf_counter()
+    failures = check_ranks(rank_samples, seed) + check_planner()
+    failures += check_parallel_backends(random_spot(seed, max_scenarios), max(budget, 0.2))
+    for failure in failures[:10]:
+        print(failure, file=sys.stderr)
+    coverage = {name: Coverage() for name in ENGINES}
+    deadline = start + soak_minutes * 60 if soak_minutes else None
+    last_report = start
+    done = 0
+    while done < spots or (deadline is not None and time.perf_counter() < deadline):
+        spot = random_spot(seed * 1_000_003 + done, max_scenarios)
+        spot_failures = check_spot(spot, budget, coverage)
+        if done % 10 == 0:
+            parallel_failure = check_parallel_exact(spot)
+            if parallel_failure:
+                spot_failures.append(parallel_failure)
+        for failure in spot_failures:
+            print(failure, file=sys.stderr)
+        failures.extend(spot_failures)
+        done += 1
+        if deadline is not None and time.perf_counter() - last_report > 60:
+            last_report = time.perf_counter()
+            print_summary(coverage, done, last_report - start)
+    print_summary(coverage, done, time.perf_counter() - start)
+    below = [name for name, stats in coverage.items() if not stats.acceptable()]
+    ok = not failures and not below
+    print("OK" if ok else f"FALHOU: {len(failures)} divergências, cobertura baixa em {below or 'nenhum'}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Valida os motores de equity contra a enumeração exata.")
+    parser.add_argument("--spots", type=int, default=40, help="Situações sorteadas (mínimo, no modo soak).")
+    parser.add_argument("--soak-minutes", type=float, default=0.0, help="Continua sorteando até o tempo acabar.")
+    parser.add_argument("--budget", type=float, default=0.05, help="Tempo de cada motor por situação (s).")
+    parser.add_argument("--max-scenarios", type=int, default=300_000, help="Maior enumeração exata sorteada.")
+    parser.add_argument("--rank-samples", type=int, default=20_000, help="Mãos de 7 cartas no teste de ranking.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    ok = run(args.spots, args.soak_minutes, args.budget, args.max_scenarios, args.rank_samples, args.seed)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()